@@ -0,0 +1,179 @@
+"""
+Dynamic micro-batching for concurrent single-planet requests.
+
+Requests that arrive within a short window (or until the batch is full) are
+scored together as one matrix, and every caller gets back its own row. Batches
+are scored by an async runner (normally ``InferenceExecutor.run_batch``) so the
+event loop keeps accepting requests while a batch is being scored. Up to
+``max_in_flight`` batches are scored at once (one per executor worker); when
+all of them are busy, the next batch accumulates until one finishes.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+
+class MicroBatcher:
+    """
+    Collects single examples into batches for ``run_batch``.
+
+    Args:
+        run_batch: Coroutine function scoring a list of examples, returning
+            one result per example in the same order
+        window_ms: How long to wait for more requests after the first one
+        max_batch_size: Upper bound on the rows scored together
+        max_in_flight: Batches scored concurrently (normally the executor's
+            worker count)
+    """
+
+    def __init__(self, run_batch: Callable[[List[Dict]], Awaitable[List[Dict]]],
+                 window_ms: float = 2.0, max_batch_size: int = 64, max_in_flight: int = 1):
+        self.run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._scoring = 0
+
+        # Stats
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+        self.max_batch_seen = 0
+        self.max_queue_depth = 0
+        self.max_in_flight_seen = 0
+        self.total_wait = 0.0
+        self.batch_size_histogram: Dict[int, int] = {}
+
+    async def start(self):
+        """Start the background collector on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the collector and the batches being scored; their requests and queued ones fail with an error."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, example: Dict) -> Dict:
+        """Queue one example and wait for its prediction."""
+        if self._task is None:
+            raise RuntimeError("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((example, future, time.perf_counter()))
+        self.requests += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Wait for the first item, then gather more until the window closes or the batch is full."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Collect only once a slot is free, so the batch keeps growing while every slot is busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            # Callers that went away don't need scoring
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+
+            now = time.perf_counter()
+            size = len(batch)
+            self.batches += 1
+            self.rows += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.total_wait += sum(now - queued_at for _, _, queued_at in batch)
+            bucket = 1 << (size - 1).bit_length()
+            self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+
+            self._scoring += 1
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self._scoring)
+            task = asyncio.create_task(self._score(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _score(self, batch: List[tuple]):
+        """Score one batch and resolve its callers' futures; frees the batch's slot when done."""
+        try:
+            results = await self.run_batch([example for example, _, _ in batch])
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher stopped"))
+            raise
+        except Exception as e:
+            self.failed_batches += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._scoring -= 1
+            self._slots.release()
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Counters for tuning the window and batch size."""
+        return {
+            "enabled": True,
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._scoring,
+            "max_in_flight_seen": self.max_in_flight_seen,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "mean_queue_wait_ms": 1000.0 * self.total_wait / self.rows if self.rows else 0.0,
+            "batch_size_histogram": {
+                f"<={bucket}": count for bucket, count in sorted(self.batch_size_histogram.items())
+            },
+        }
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Reproducible performance benchmarks for inference, the HTTP APIs and training.
+
+Measures, for both the FastAPI backend (``main.py``) and the serverless
+handlers in ``api/``:
+
+- single: latency of one single-row prediction (``predict_exoplanet``)
+- batch: throughput in rows/sec at several batch sizes (``api/`` has no batch
+  call, so its rows are predicted one by one, as a client would have to)
+- http: end-to-end request latency. The backend goes through FastAPI's ASGI
+  stack in-process (``httpx.ASGITransport``, lifespan included); the
+  ``api/`` handlers are served by ``http.server`` on a local port.
+- training: ``regenerate_models.py`` stage timings on ``kepler.csv``, run with
+  ``FORCE_RETRAIN=1`` in a temporary directory so ``modelos/`` is untouched
+
+Inputs are rows sampled from ``kepler.csv`` with a fixed seed. The prediction
+cache and the model watcher are off unless set in the environment, so
+repeated inputs measure the models and not the cache.
+
+Results are written as JSON: ``meta`` (commit, libraries, CPUs, model
+versions, settings) and ``metrics`` (``name -> value, unit, better``).
+``compare`` flags every metric that got worse by more than a threshold and
+exits with status 1 if there is any.
+
+Usage:
+    python benchmark.py run --output bench.json
+    python benchmark.py run --only single batch --quick
+    python benchmark.py compare baseline.json bench.json --threshold 0.10
+"""
+import argparse
+import asyncio
+import datetime
+import fnmatch
+import glob
+import http.client
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Benchmark the models, not the cache or a background reload
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL_S", "0")
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(_HERE), "api")
+CSV_PATH = os.path.join(_HERE, "kepler.csv")
+
+SUITES = ("single", "batch", "http", "training")
+IMPLEMENTATIONS = ("backend", "api")
+FEATURES = ("koi_prad", "koi_teq", "koi_period", "koi_model_snr", "koi_steff", "koi_srad")
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+API_MAX_BATCH = 100  # api/ predicts row by row; larger sizes only add run time
+HTTP_BATCH_ROWS = 100
+SEED = 0
+
+
+def sample_examples(n: int, seed: int = SEED) -> List[Dict]:
+    """``n`` request bodies built from random ``kepler.csv`` rows (missing values dropped)."""
+    import pandas as pd
+
+    df = pd.read_csv(CSV_PATH, comment="#", usecols=list(FEATURES))
+    rows = df.sample(n=n, replace=n > len(df), random_state=seed)
+    return [{k: float(v) for k, v in row.items() if pd.notna(v)} for row in rows.to_dict("records")]
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+    }
+
+
+def time_calls(fn: Callable, args: List, warmup: int) -> List[float]:
+    """Call ``fn`` once per argument after ``warmup`` untimed calls; seconds per call."""
+    for arg in args[:warmup]:
+        fn(arg)
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def throughput(fn: Callable[[List[Dict]], object], examples: List[Dict], min_seconds: float,
+               min_repeats: int = 3) -> float:
+    """Best rows/sec over repeated calls lasting at least ``min_seconds`` in total."""
+    fn(examples)  # warm-up
+    best, elapsed, repeats = float("inf"), 0.0, 0
+    while repeats < min_repeats or elapsed < min_seconds:
+        start = time.perf_counter()
+        fn(examples)
+        took = time.perf_counter() - start
+        best, elapsed, repeats = min(best, took), elapsed + took, repeats + 1
+    return len(examples) / best
+
+
+def load_api_module(name: str):
+    """Import an ``api/`` handler module (file names may contain dashes)."""
+    path = os.path.join(API_DIR, f"{name}.py")
+    spec = importlib.util.spec_from_file_location(f"api_{name.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def api_predictor(module) -> Callable[[Dict], Dict]:
+    """The handler's ``predict_exoplanet`` without a request/socket around it."""
+    handler = module.handler.__new__(module.handler)
+    return handler.predict_exoplanet
+
+
+class Results:
+    """Collects metrics as ``name -> {value, unit, better}``."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower"):
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+        print(f"  {name:<56} {value:12.3f} {unit}")
+
+    def add_latency(self, prefix: str, seconds: List[float]):
+        for key, value in latency_stats(seconds).items():
+            self.add(f"{prefix}.{key}", value, "ms")
+
+
+def bench_single(results: Results, implementations, iterations: int):
+    examples = sample_examples(iterations)
+    warmup = min(50, iterations)
+    if "backend" in implementations:
+        import main
+        results.add_latency("single.backend", time_calls(main.predict_exoplanet, examples, warmup))
+    if "api" in implementations:
+        predict = api_predictor(load_api_module("predict"))
+        results.add_latency("single.api", time_calls(predict, examples, warmup))
+
+
+def bench_batch(results: Results, implementations, sizes, min_seconds: float):
+    for size in sizes:
+        examples = sample_examples(size, seed=SEED + size)
+        if "backend" in implementations:
+            import main
+            results.add(f"batch.backend.size_{size}.rows_per_s",
+                        throughput(main.predict_exoplanet_batch, examples, min_seconds), "rows/s", "higher")
+        if "api" in implementations and size <= API_MAX_BATCH:
+            predict = api_predictor(load_api_module("predict"))
+            results.add(f"batch.api.size_{size}.rows_per_s",
+                        throughput(lambda rows: [predict(r) for r in rows], examples, min_seconds),
+                        "rows/s", "higher")
+
+
+async def _backend_http(requests: int) -> Dict[str, List[float]]:
+    import httpx
+    import main
+
+    examples = sample_examples(requests)
+    rows = sample_examples(max(20, requests // 10) * HTTP_BATCH_ROWS, seed=SEED + 1)
+    batches = [rows[i:i + HTTP_BATCH_ROWS] for i in range(0, len(rows), HTTP_BATCH_ROWS)]
+    calls = {
+        "/predict": [("/predict", ex) for ex in examples],
+        "/classify-exoplanet": [("/classify-exoplanet", ex) for ex in examples],
+        f"/predict/batch[{HTTP_BATCH_ROWS}]": [("/predict/batch", {"planets": b}) for b in batches],
+    }
+    timings = {}
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, bodies in calls.items():
+                for path, body in bodies[:10]:
+                    (await client.post(path, json=body)).raise_for_status()
+                times = []
+                for path, body in bodies:
+                    start = time.perf_counter()
+                    response = await client.post(path, json=body)
+                    times.append(time.perf_counter() - start)
+                    response.raise_for_status()
+                timings[name] = times
+    return timings
+
+
+def _api_http(requests: int) -> Dict[str, List[float]]:
+    examples = sample_examples(requests)
+    timings = {}
+    for name in ("predict", "classify-exoplanet"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), load_api_module(name).handler)
+        server.RequestHandlerClass.log_message = lambda *args: None
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            def call(example, port=server.server_address[1], path=f"/api/{name}"):
+                conn = http.client.HTTPConnection("127.0.0.1", port)
+                conn.request("POST", path, json.dumps(example), {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                if response.status != 200:
+                    raise RuntimeError(f"{path} returned {response.status}")
+            timings[f"/api/{name}"] = time_calls(call, examples, min(10, requests))
+        finally:
+            server.shutdown()
+            server.server_close()
+    return timings
+
+
+def bench_http(results: Results, implementations, requests: int):
+    if "backend" in implementations:
+        for name, times in asyncio.run(_backend_http(requests)).items():
+            results.add_latency(f"http.backend.{name}", times)
+    if "api" in implementations:
+        for name, times in _api_http(requests).items():
+            results.add_latency(f"http.api.{name}", times)
+
+
+def bench_training(results: Results, repeats: int):
+    """Run regenerate_models.py in a scratch directory and read the stage timings from its manifest."""
+    runs = []
+    for _ in range(repeats):
+        workdir = tempfile.mkdtemp(prefix="bench-train-")
+        try:
+            shutil.copy(CSV_PATH, workdir)
+            env = dict(os.environ, FORCE_RETRAIN="1", PYTHONPATH=_HERE)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(_HERE, "regenerate_models.py")], cwd=workdir, env=env,
+                           check=True, stdout=subprocess.DEVNULL)
+            wall = time.perf_counter() - start
+            manifest_path = glob.glob(os.path.join(workdir, "modelos", "versions", "*", "manifest.json"))[0]
+            with open(manifest_path) as fh:
+                stages = json.load(fh)["stages"]
+            runs.append({**stages, "script wall clock": wall})
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    # Best of the repeats per stage
+    for stage in runs[0]:
+        name = re.sub(r"[^a-z0-9]+", "_", stage.lower()).strip("_")
+        results.add(f"training.{name}_s", min(run[stage] for run in runs), "s")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_HERE, capture_output=True, text=True,
+                              check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def collect_meta(suites, implementations) -> Dict:
+    from executor import available_cpus
+    from model_store import library_versions
+
+    meta = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "libraries": library_versions(),
+        "cpus": available_cpus(),
+        "suites": list(suites),
+        "implementations": list(implementations),
+        "settings": {k: v for k, v in os.environ.items() if k.startswith((
+            "COMPILED_", "INFERENCE_", "MICROBATCH_", "PREDICTION_CACHE_", "MODEL_", "TRAINING_", "OMP_"))},
+        "model_versions": {},
+    }
+    if "backend" in implementations:
+        from model_registry import get_models
+        meta["model_versions"]["backend"] = get_models(os.path.join(_HERE, "modelos")).version
+    if "api" in implementations:
+        api = load_api_module("predict")
+        predictor = api.get_predictor(api.MODEL_DIR)
+        meta["model_versions"]["api"] = predictor.version
+        meta["api_runtime"] = predictor.runtime
+    return meta
+
+
+def run(args):
+    os.chdir(_HERE)  # main.py and the models resolve "modelos" relative to the cwd
+    sys.path.insert(0, _HERE)
+
+    iterations = 200 if args.quick else args.iterations
+    min_seconds = 0.2 if args.quick else args.min_seconds
+    sizes = [s for s in args.batch_sizes if not args.quick or s <= 1000]
+
+    results = Results()
+    report = {"meta": collect_meta(args.only, args.implementations), "metrics": results.metrics}
+    for suite in args.only:
+        print(f"\n⏱️  {suite}")
+        if suite == "single":
+            bench_single(results, args.implementations, iterations)
+        elif suite == "batch":
+            bench_batch(results, args.implementations, sizes, min_seconds)
+        elif suite == "http":
+            bench_http(results, args.implementations, iterations)
+        elif suite == "training":
+            bench_training(results, args.training_repeats)
+
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+    print(f"\n💾 Saved {len(results.metrics)} metrics to {args.output}")
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float, patterns: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Per-metric change between two reports.
+
+    Returns:
+        One entry per metric present in both, with ``delta`` (relative change
+        of the value), ``change`` (the same, positive = worse) and
+        ``regression`` set when ``change`` exceeds ``threshold``
+    """
+    rows = []
+    for name, base in baseline["metrics"].items():
+        if name not in current["metrics"]:
+            continue
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        new = current["metrics"][name]
+        if base["value"] == 0:
+            continue
+        delta = (new["value"] - base["value"]) / base["value"]
+        change = -delta if base.get("better", "lower") == "higher" else delta
+        rows.append({"name": name, "unit": base["unit"], "baseline": base["value"], "current": new["value"],
+                     "delta": delta, "change": change, "regression": change > threshold})
+    return rows
+
+
+def compare(args):
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+
+    for side, report in (("baseline", baseline), ("current", current)):
+        meta = report["meta"]
+        print(f"{side:<9} {meta.get('created_at')}  commit {meta.get('git_commit')}  cpus {meta.get('cpus')}  "
+              f"models {meta.get('model_versions')}")
+    if baseline["meta"].get("cpus") != current["meta"].get("cpus"):
+        print("⚠️  The reports were recorded on machines with different CPU counts")
+
+    rows = compare_reports(baseline, current, args.threshold, args.metrics)
+    print(f"\n{'metric':<56} {'baseline':>12} {'current':>12} {'delta':>8}")
+    for row in rows:
+        flag = "  ❌ regression" if row["regression"] else ("  ✅ improved" if row["change"] < -args.threshold else "")
+        print(f"{row['name']:<56} {row['baseline']:12.3f} {row['current']:12.3f} {row['delta']:+8.1%}{flag}")
+
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\n{len(regressions)} of {len(rows)} metrics regressed by more than {args.threshold:.0%}")
+    if regressions:
+        sys.exit(1)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark inference, the HTTP APIs and training")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks and save the results as JSON")
+    run_parser.add_argument("--output", default="benchmark.json")
+    run_parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES))
+    run_parser.add_argument("--implementations", nargs="+", choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS))
+    run_parser.add_argument("--iterations", type=int, default=1000, help="Timed calls per latency benchmark")
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    run_parser.add_argument("--min-seconds", type=float, default=1.0,
+                            help="Minimum time spent per batch-size measurement")
+    run_parser.add_argument("--training-repeats", type=int, default=1)
+    run_parser.add_argument("--quick", action="store_true", help="Fewer iterations, batch sizes up to 1000")
+
+    compare_parser = sub.add_parser("compare", help="Compare two result files and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change counted as a regression (default 0.10 = 10%%)")
+    compare_parser.add_argument("--metrics", nargs="+", help="Only compare metrics matching these glob patterns")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Incremental parsing and formatting for the bulk scoring endpoint.
+
+Uploads are consumed as a stream of byte chunks and turned into rows one
+line at a time, so only the current chunk of rows is ever held in memory:
+
+- CSV: NASA Exoplanet Archive tables such as ``kepler.csv``. ``#`` comment
+  lines are skipped, the first remaining line is the header, empty cells
+  are missing values.
+- NDJSON: one JSON object per line.
+
+Rows are grouped into fixed-size chunks that are scored with one vectorized
+call each; results are written back as NDJSON or CSV lines.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+INPUT_FORMATS = ("csv", "ndjson")
+OUTPUT_FORMATS = ("ndjson", "csv")
+
+# Identifier columns copied from the input rows to the results when present
+BULK_ID_COLUMNS = ("kepid", "kepoi_name")
+
+# Longest accepted input line; protects the line buffer against unframed input
+MAX_LINE_BYTES = 1 << 20
+
+# One parsed input row: (row number, fields, parse error)
+Record = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def guess_input_format(content_type: str = "", filename: str = "") -> str:
+    """Pick ``ndjson`` for JSON-lines content types/extensions, ``csv`` otherwise."""
+    hint = f"{content_type} {filename}".lower()
+    if "ndjson" in hint or "jsonl" in hint or hint.rstrip().endswith(".json"):
+        return "ndjson"
+    return "csv"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a stream of byte chunks into text lines.
+
+    Raises:
+        ValueError: If a line is longer than ``MAX_LINE_BYTES``
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Input line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """Parse archive-style CSV lines into ``{column: value}`` records."""
+    header = None
+    row = 0
+    async for line in lines:
+        if not line.strip() or line.startswith("#"):
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} fields, got {len(values)}"
+        else:
+            yield row, dict(zip(header, values)), None
+        row += 1
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """Parse one JSON object per non-blank line."""
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, None, f"Invalid JSON: {e.msg}"
+        else:
+            if isinstance(fields, dict):
+                yield row, fields, None
+            else:
+                yield row, None, "Each line must be a JSON object"
+        row += 1
+
+
+def iter_records(chunks: AsyncIterator[bytes], input_format: str) -> AsyncIterator[Record]:
+    lines = iter_lines(chunks)
+    if input_format == "ndjson":
+        return iter_ndjson_records(lines)
+    return iter_csv_records(lines)
+
+
+async def iter_record_chunks(records: AsyncIterator[Record], size: int) -> AsyncIterator[List[Record]]:
+    """Group records into lists of at most ``size``."""
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def to_example(fields: Dict, num_cols: Sequence[str], cat_cols: Sequence[str]) -> Dict:
+    """
+    Extract the model inputs from one record.
+
+    Empty strings and nulls are treated as missing; every other numeric
+    value must parse as a float.
+
+    Raises:
+        ValueError: If a numeric field is invalid or no model input is set
+    """
+    example = {}
+    for name in num_cols:
+        value = fields.get(name)
+        if value is None or value == "":
+            continue
+        if isinstance(value, bool):
+            raise ValueError(f"{name}: expected a number")
+        try:
+            example[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}: expected a number, got {value!r}")
+    for name in cat_cols:
+        value = fields.get(name)
+        if value is not None and value != "":
+            example[name] = str(value)
+    if not example:
+        raise ValueError("At least one parameter must be provided")
+    return example
+
+
+def record_ids(fields: Optional[Dict]) -> Dict:
+    if not fields:
+        return {}
+    return {name: fields[name] for name in BULK_ID_COLUMNS if name in fields}
+
+
+class NdjsonWriter:
+    """Formats bulk results as one JSON object per line."""
+
+    media_type = "application/x-ndjson"
+
+    def header(self) -> str:
+        return ""
+
+    def row(self, item: Dict) -> str:
+        return json.dumps(item) + "\n"
+
+    def error(self, message: str) -> str:
+        return self.row({"ok": False, "error": message})
+
+
+class CsvWriter:
+    """Formats bulk results as CSV with the top-3 types flattened into columns."""
+
+    media_type = "text/csv"
+    columns = (
+        ["row"] + list(BULK_ID_COLUMNS)
+        + ["ok", "error", "is_exoplanet", "is_exoplanet_proba", "type",
+           "type_1", "type_1_proba", "type_2", "type_2_proba", "type_3", "type_3_proba", "model_version"]
+    )
+
+    def _line(self, values: Iterable) -> str:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerow(values)
+        return out.getvalue()
+
+    def header(self) -> str:
+        return self._line(self.columns)
+
+    def row(self, item: Dict) -> str:
+        flat = dict(item)
+        for rank, (name, proba) in enumerate(flat.pop("type_top3", []), start=1):
+            flat[f"type_{rank}"] = name
+            flat[f"type_{rank}_proba"] = proba
+        return self._line(flat.get(c, "") for c in self.columns)
+
+    def error(self, message: str) -> str:
+        return self.row({"ok": False, "error": message})
+
+
+def make_writer(output_format: str):
+    return CsvWriter() if output_format == "csv" else NdjsonWriter()
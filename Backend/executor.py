@@ -0,0 +1,191 @@
+"""
+Pluggable executor for CPU-bound inference.
+
+The request handlers are ``async``; running sklearn directly inside them
+stalls the event loop (and every other request) while a prediction is being
+computed, and caps a uvicorn process at one core. ``InferenceExecutor`` moves
+the work off the loop:
+
+- ``thread`` mode: a thread pool inside the server process, sharing the
+  already loaded models. The compiled NumPy path and sklearn's tree
+  evaluation release the GIL for most of their work.
+- ``process`` mode: a pool of worker processes. Each worker loads the models
+  once in its initializer (and compiles them) and then serves batches.
+
+Handlers await results with a per-request timeout.
+
+Each batch is scored by exactly one model version. Thread workers get the
+caller's bundle itself; process workers get its version and reload their
+own copy when the server has moved on. After a reload the process pool is
+replaced by one whose workers start on the new models, while batches
+already submitted finish on the old pool.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from inference import engine_for, get_engine, reload_engine
+from model_registry import ModelBundle, get_registry
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity masks / container limits)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(model_dir: str):
+    """Process-pool initializer: load and compile the models once per worker."""
+    get_engine(model_dir)
+
+
+class ModelVersionError(RuntimeError):
+    """A worker could not load the model version a request was started with."""
+
+
+def _score_batch(model_dir: str, examples: List[Dict],
+                 version: Optional[str] = None) -> Tuple[List[Dict], Dict[str, float]]:
+    """Score in a pool worker; returns the results and the per-stage timings."""
+    engine = get_engine(model_dir)
+    if version is not None and engine.version != version:
+        # The server swapped in new models since this worker loaded its copy
+        engine = reload_engine(model_dir)
+        if engine.version != version:
+            raise ModelVersionError(
+                f"Model version {version} is no longer available (worker has {engine.version})"
+            )
+    timings = {}
+    return engine.predict_batch(examples, timings), timings
+
+
+def _score_bundle(model_dir: str, bundle: Optional[ModelBundle],
+                  examples: List[Dict]) -> Tuple[List[Dict], Dict[str, float]]:
+    engine = engine_for(bundle) if bundle is not None else get_engine(model_dir)
+    timings = {}
+    return engine.predict_batch(examples, timings), timings
+
+
+class InferenceExecutor:
+    """
+    Runs ``predict_batch`` on a thread or process pool.
+
+    Args:
+        mode: ``"thread"`` (in-process) or ``"process"`` (multi-process)
+        workers: Pool size; defaults to the number of available CPUs
+        timeout: Seconds to wait for a result before giving up (``None`` waits forever)
+        model_dir: Directory containing the model files
+        start_method: multiprocessing start method for process mode. ``spawn``
+            is the default because forking a process that already started
+            OpenMP threads (used by sklearn's tree ensembles) can deadlock.
+        on_timings: Called on the event loop with each batch's per-stage
+            timings and row count
+    """
+
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None,
+                 timeout: Optional[float] = None, model_dir: str = "modelos",
+                 start_method: str = "spawn",
+                 on_timings: Optional[Callable[[Dict[str, float], int], None]] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.workers = workers or available_cpus()
+        self.timeout = timeout
+        self.model_dir = model_dir
+        self.start_method = start_method
+        self.on_timings = on_timings
+        self.timeouts = 0
+        self.refreshes = 0
+        self._pool = self._make_pool()
+
+    def _make_pool(self):
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.model_dir,),
+        )
+
+    def _warm(self, pool):
+        futures = [pool.submit(_score_batch, self.model_dir, []) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def warm_up(self):
+        """Start every process-pool worker now instead of on the first requests."""
+        if self.mode == "process":
+            self._warm(self._pool)
+
+    def refresh(self):
+        """
+        Move process workers to the models now in the registry (call after a reload).
+
+        A new pool is started and warmed before it replaces the old one; the
+        old pool finishes the batches already submitted to it and exits.
+        """
+        if self.mode != "process":
+            return
+        pool = self._make_pool()
+        self._warm(pool)
+        old, self._pool = self._pool, pool
+        old.shutdown(wait=False)
+        self.refreshes += 1
+
+    async def run_batch(self, examples: List[Dict], bundle: Optional[ModelBundle] = None) -> List[Dict]:
+        """
+        Score a batch off the event loop; results keep input order.
+
+        Args:
+            examples: Rows to score
+            bundle: Models to score with (default: the registry's current bundle)
+        """
+        if bundle is None:
+            registry = get_registry(self.model_dir)
+            # Not loaded yet: the worker loads it, off the event loop
+            bundle = registry.get() if registry.loaded else None
+        pool = self._pool
+        loop = asyncio.get_running_loop()
+        if self.mode == "thread":
+            future = loop.run_in_executor(pool, _score_bundle, self.model_dir, bundle, examples)
+        else:
+            # A bundle from another model directory (e.g. the lite variant) is scored from that directory
+            model_dir = bundle.model_dir if bundle is not None else self.model_dir
+            version = bundle.version if bundle is not None else None
+            future = loop.run_in_executor(pool, _score_batch, model_dir, examples, version)
+        try:
+            results, timings = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            # The worker keeps running; only the caller stops waiting
+            self.timeouts += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool for later requests
+            pool.shutdown(wait=False)
+            if self._pool is pool:
+                self._pool = self._make_pool()
+            raise
+        if self.on_timings is not None:
+            self.on_timings(timings, len(examples))
+        return results
+
+    async def run_one(self, example: Dict, bundle: Optional[ModelBundle] = None) -> Dict:
+        return (await self.run_batch([example], bundle))[0]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "timeout_s": self.timeout,
+            "timeouts": self.timeouts,
+            "pool_refreshes": self.refreshes,
+        }
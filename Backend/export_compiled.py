@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Compile the joblib pipelines of a model directory into NumPy-only artifacts.
+
+For each pipeline in use (``clf_exoplanet_type.joblib`` and, if present,
+``clf_is_exoplanet.joblib``) this writes ``<name>.npz`` (format described in
+``compiled_model.py``) after checking that the compiled predictor reproduces
+the pipeline's probabilities on the probe examples. ``regenerate_models.py``
+does the same for every version it trains. The serverless handlers in
+``api/`` load these files with NumPy alone, so run this whenever
+``api/modelos`` gets new joblib files.
+
+Exporting into ``api/`` also copies ``compiled_model.py`` to
+``api/_compiled_model.py``, so the handlers read the artifacts with the code
+that wrote them (``--sync-api`` does only the copy).
+
+``--compare`` reports file size and load time of both formats.
+
+Usage:
+    python export_compiled.py                     # modelos/
+    python export_compiled.py ../api/modelos      # also refreshes api/_compiled_model.py
+    python export_compiled.py --sync-api
+    python export_compiled.py --compare           # joblib vs .npz size and load time
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from compiled_model import CompiledPipeline, max_proba_error
+from inference import PROBE_EXAMPLES, PROBE_TOLERANCE
+from model_registry import BINARY_MODEL_FILE, TYPE_MODEL_FILE, load_bundle, resolve_artifact_dir
+from model_store import compiled_name
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(_HERE), "api")
+RUNTIME_SOURCE = os.path.join(_HERE, "compiled_model.py")
+API_RUNTIME_COPY = os.path.join(API_DIR, "_compiled_model.py")
+
+
+def compile_pipelines(pipelines: Mapping[str, object], cols: Sequence[str]) -> Dict[str, CompiledPipeline]:
+    """
+    Compile and verify fitted pipelines.
+
+    Args:
+        pipelines: ``{artifact file: fitted pipeline}``; ``None`` entries are skipped
+        cols: Input columns from the metadata, in training order
+
+    Returns:
+        ``{.npz file name: CompiledPipeline}``
+
+    Raises:
+        ValueError: If a pipeline cannot be compiled or its probabilities differ
+    """
+    compiled = {}
+    for name, pipeline in pipelines.items():
+        if pipeline is None:
+            continue
+        candidate = CompiledPipeline.from_sklearn(pipeline)
+        if list(candidate.columns) != list(cols):
+            raise ValueError(f"{name}: compiled columns {candidate.columns} differ from metadata {tuple(cols)}")
+        error = max_proba_error(candidate, pipeline, PROBE_EXAMPLES, cols)
+        if error > PROBE_TOLERANCE:
+            raise ValueError(f"{name}: compiled probabilities differ by {error:.3g}")
+        compiled[compiled_name(name)] = candidate
+    return compiled
+
+
+def export_model_dir(model_dir: str, out_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Compile, verify and save the pipelines currently in use in ``model_dir``.
+
+    Args:
+        model_dir: Model directory (or one with a ``CURRENT`` pointer)
+        out_dir: Where to write the ``.npz`` files (default: ``model_dir``)
+
+    Returns:
+        ``{.npz file name: written path}``
+
+    Raises:
+        ValueError: If a pipeline cannot be compiled or its probabilities differ
+    """
+    import sklearn
+
+    bundle = load_bundle(model_dir)
+    out_dir = out_dir or model_dir
+    compiled = compile_pipelines({TYPE_MODEL_FILE: bundle.clf_type, BINARY_MODEL_FILE: bundle.clf_bin}, bundle.cols)
+    written = {}
+    for name, pipeline in compiled.items():
+        path = os.path.join(out_dir, name)
+        pipeline.save(path, source={"artifact_version": bundle.version, "scikit_learn": sklearn.__version__})
+        written[name] = path
+    return written
+
+
+def sync_api_runtime() -> bool:
+    """Copy ``compiled_model.py`` to ``api/_compiled_model.py``; returns whether the copy changed."""
+    with open(RUNTIME_SOURCE, "rb") as fh:
+        source = fh.read()
+    try:
+        with open(API_RUNTIME_COPY, "rb") as fh:
+            if fh.read() == source:
+                return False
+    except FileNotFoundError:
+        pass
+    shutil.copyfile(RUNTIME_SOURCE, API_RUNTIME_COPY)
+    return True
+
+
+def _median_ms(load, path: str, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load(path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def compare_formats(model_dir: str, repeats: int = 5) -> List[Dict]:
+    """
+    Size and load time of each joblib pipeline and its ``.npz`` export.
+
+    Load times are medians of ``repeats`` loads after a warm-up load, so
+    library imports are not included (``measure_cold_start.py`` covers those).
+    """
+    import joblib
+
+    artifact_dir = resolve_artifact_dir(model_dir)
+    rows = []
+    for name in (TYPE_MODEL_FILE, BINARY_MODEL_FILE):
+        joblib_path = os.path.join(artifact_dir, name)
+        npz_path = next((p for p in (os.path.join(d, compiled_name(name)) for d in (artifact_dir, model_dir))
+                         if os.path.exists(p)), None)
+        if not os.path.exists(joblib_path) or npz_path is None:
+            continue
+        joblib.load(joblib_path)
+        CompiledPipeline.load(npz_path)
+        rows.append({
+            "artifact": name,
+            "joblib_kib": os.path.getsize(joblib_path) / 1024,
+            "npz_kib": os.path.getsize(npz_path) / 1024,
+            "joblib_load_ms": _median_ms(joblib.load, joblib_path, repeats),
+            "npz_load_ms": _median_ms(CompiledPipeline.load, npz_path, repeats),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile joblib pipelines into NumPy-only .npz artifacts")
+    parser.add_argument("model_dir", nargs="?", default="modelos")
+    parser.add_argument("--out-dir", help="Output directory (default: the model directory)")
+    parser.add_argument("--compare", action="store_true", help="Compare size and load time with joblib instead")
+    parser.add_argument("--repeats", type=int, default=5, help="Loads per file for --compare")
+    parser.add_argument("--sync-api", action="store_true", help="Only copy compiled_model.py into api/")
+    args = parser.parse_args()
+
+    if args.sync_api:
+        changed = sync_api_runtime()
+        print(f"✅ {API_RUNTIME_COPY} {'updated' if changed else 'already up to date'}")
+        return
+
+    if args.compare:
+        rows = compare_formats(args.model_dir, args.repeats)
+        if not rows:
+            print(f"❌ No joblib/.npz pairs in {args.model_dir}; export first")
+            sys.exit(1)
+        print(f"{'artifact':<28} {'joblib':>10} {'npz':>10} {'joblib load':>12} {'npz load':>10}")
+        for r in rows:
+            print(f"{r['artifact']:<28} {r['joblib_kib']:>7.0f}KiB {r['npz_kib']:>7.0f}KiB "
+                  f"{r['joblib_load_ms']:>10.1f}ms {r['npz_load_ms']:>8.1f}ms")
+        return
+
+    try:
+        written = export_model_dir(args.model_dir, args.out_dir)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for name, path in written.items():
+        print(f"✅ {name} -> {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    out_dir = os.path.realpath(args.out_dir or args.model_dir)
+    if os.path.commonpath([out_dir, os.path.realpath(API_DIR)]) == os.path.realpath(API_DIR) and sync_api_runtime():
+        print(f"✅ compiled_model.py -> {API_RUNTIME_COPY}")
+
+
+if __name__ == "__main__":
+    main()
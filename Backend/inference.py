@@ -0,0 +1,249 @@
+"""
+Single-pass inference over the loaded pipelines.
+
+``Pipeline.predict_proba`` followed by ``Pipeline.predict`` runs the
+preprocessing and every boosted tree twice, and the binary pipeline repeats
+the same preprocessing again. The engine below splits each pipeline into its
+preprocessing and its classifier, transforms the input once (once in total
+when both pipelines were fitted with identical preprocessing) and derives the
+predicted label from the argmax of the probabilities.
+
+Small requests (the single-planet endpoints) skip pandas and sklearn
+entirely and go through the compiled NumPy predictor from
+``compiled_model.py``, which is checked against the pipelines when the
+engine is built.
+"""
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compiled_model import CompiledPipeline, max_proba_error
+from model_registry import ModelBundle, get_registry
+
+# Up to this many rows the compiled predictor beats sklearn's per-call overhead
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", "64"))
+
+# Inputs used to check the compiled predictor against the pipelines
+PROBE_EXAMPLES = [
+    {},
+    {"koi_prad": 11.2, "koi_teq": 1400, "koi_period": 3.5, "koi_model_snr": 12.0,
+     "koi_steff": 5600.0, "koi_srad": 1.0},
+    {"koi_prad": 1.0, "koi_teq": 300, "koi_period": 365.0, "koi_steff": 5800.0, "koi_srad": 1.0},
+    {"koi_prad": 0.5, "koi_teq": 50, "koi_period": 0.5, "koi_insol": 1e6, "koi_score": 0.0},
+]
+PROBE_TOLERANCE = 1e-9
+
+
+def _add_time(timings: Optional[Dict[str, float]], stage: str, start: float) -> float:
+    """Add the time since ``start`` to ``timings[stage]``; returns the current time."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + now - start
+    return now
+
+
+def _split_pipeline(pipeline) -> Tuple[object, object]:
+    """Return ``(preprocessing, classifier)`` for a fitted sklearn Pipeline."""
+    return pipeline[:-1], pipeline[-1]
+
+
+def _same_preprocessing(a, b) -> bool:
+    """True when two fitted preprocessing pipelines are interchangeable."""
+    return a is b or joblib.hash(a) == joblib.hash(b)
+
+
+class InferenceEngine:
+    """Runs the type and binary classifiers of one model bundle."""
+
+    def __init__(self, bundle: ModelBundle):
+        self.bundle = bundle
+        self.cols = list(bundle.cols)
+
+        self.type_prep, self.type_clf = _split_pipeline(bundle.clf_type)
+        self.classes = np.asarray(self.type_clf.classes_)
+
+        self.bin_prep, self.bin_clf = (None, None)
+        if bundle.clf_bin is not None:
+            self.bin_prep, self.bin_clf = _split_pipeline(bundle.clf_bin)
+
+        # Fitted once per bundle; afterwards one transform feeds both models
+        self.shared_preprocessing = (
+            self.bin_prep is not None and _same_preprocessing(self.type_prep, self.bin_prep)
+        )
+
+        self.compiled_type, self.compiled_bin = self._compile()
+        self.compiled_shared_preprocessing = (
+            self.compiled_bin is not None
+            and self.compiled_type.preprocessor.same_as(self.compiled_bin.preprocessor)
+        )
+
+    def _compile(self) -> Tuple[Optional[CompiledPipeline], Optional[CompiledPipeline]]:
+        """Build and verify the compiled predictors; ``(None, None)`` disables them."""
+        try:
+            compiled_type = CompiledPipeline.from_sklearn(self.bundle.clf_type)
+            error = max_proba_error(compiled_type, self.bundle.clf_type, PROBE_EXAMPLES, self.cols)
+            compiled_bin = None
+            if self.bundle.clf_bin is not None:
+                compiled_bin = CompiledPipeline.from_sklearn(self.bundle.clf_bin)
+                error = max(error, max_proba_error(compiled_bin, self.bundle.clf_bin, PROBE_EXAMPLES, self.cols))
+        except Exception as e:
+            print(f"Compiled predictor disabled: {str(e)}")
+            return None, None
+        if error > PROBE_TOLERANCE:
+            print(f"Compiled predictor disabled: probabilities differ by {error:.3g}")
+            return None, None
+        return compiled_type, compiled_bin
+
+    @property
+    def version(self) -> str:
+        return self.bundle.version
+
+    def build_frame(self, examples: List[Dict]) -> pd.DataFrame:
+        """One row per example, in training column order; missing values are NaN."""
+        return pd.DataFrame(
+            [{c: ex.get(c, np.nan) for c in self.cols} for ex in examples],
+            columns=self.cols,
+        )
+
+    def predict_proba(self, X: pd.DataFrame,
+                      timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Return ``(type probabilities, binary positive-class probabilities)``.
+
+        The binary probabilities are ``None`` when there is no binary model.
+        ``timings`` receives the seconds spent per stage.
+        """
+        t = time.perf_counter()
+        Xt = self.type_prep.transform(X)
+        t = _add_time(timings, "preprocessing", t)
+        proba_type = self.type_clf.predict_proba(Xt)
+        t = _add_time(timings, "type_inference", t)
+
+        proba_bin = None
+        if self.bin_clf is not None:
+            if self.shared_preprocessing:
+                Xb = Xt
+            else:
+                Xb = self.bin_prep.transform(X)
+                t = _add_time(timings, "preprocessing", t)
+            proba_bin = self.bin_clf.predict_proba(Xb)[:, 1]
+            _add_time(timings, "binary_inference", t)
+        return proba_type, proba_bin
+
+    def predict_proba_compiled(self, examples: List[Dict],
+                               timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Same as ``predict_proba`` but on raw example dicts, without pandas/sklearn."""
+        t = time.perf_counter()
+        Xt = self.compiled_type.preprocessor.transform(examples)
+        t = _add_time(timings, "preprocessing", t)
+        proba_type = self.compiled_type.ensemble.predict_proba(Xt)
+        t = _add_time(timings, "type_inference", t)
+
+        proba_bin = None
+        if self.compiled_bin is not None:
+            if self.compiled_shared_preprocessing:
+                Xb = Xt
+            else:
+                Xb = self.compiled_bin.preprocessor.transform(examples)
+                t = _add_time(timings, "preprocessing", t)
+            proba_bin = self.compiled_bin.ensemble.predict_proba(Xb)[:, 1]
+            _add_time(timings, "binary_inference", t)
+        return proba_type, proba_bin
+
+    def format_results(self, proba_type: np.ndarray, proba_bin: Optional[np.ndarray]) -> List[Dict]:
+        """Turn probability matrices into the API's per-row result dicts."""
+        outs = [{"model_version": self.version} for _ in range(len(proba_type))]
+
+        if proba_bin is not None:
+            for out, proba in zip(outs, proba_bin):
+                out["is_exoplanet"] = int(proba >= 0.5)
+                out["is_exoplanet_proba"] = float(proba)
+
+        # The label is the most probable class, so no separate predict() pass
+        topk = np.argsort(proba_type, axis=1)[:, ::-1][:, :3]
+        top_proba = np.take_along_axis(proba_type, topk, axis=1)
+        for out, idx, probs in zip(outs, topk, top_proba):
+            out["type"] = str(self.classes[idx[0]])
+            out["type_top3"] = [(str(self.classes[i]), float(p)) for i, p in zip(idx, probs)]
+        return outs
+
+    def predict_batch(self, examples: List[Dict], timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """
+        Predict many examples with one pass per model; results keep input order.
+
+        Args:
+            examples: Rows to score
+            timings: Receives the seconds spent in ``frame_build``,
+                ``preprocessing``, ``type_inference``, ``binary_inference`` and
+                ``postprocessing``
+        """
+        if not examples:
+            return []
+        if self.compiled_type is not None and len(examples) <= COMPILED_MAX_ROWS:
+            proba_type, proba_bin = self.predict_proba_compiled(examples, timings)
+        else:
+            t = time.perf_counter()
+            X = self.build_frame(examples)
+            _add_time(timings, "frame_build", t)
+            proba_type, proba_bin = self.predict_proba(X, timings)
+        t = time.perf_counter()
+        results = self.format_results(proba_type, proba_bin)
+        _add_time(timings, "postprocessing", t)
+        return results
+
+    def predict_one(self, example: Dict) -> Dict:
+        """Predict a single example."""
+        return self.predict_batch([example])[0]
+
+
+_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def engine_for(bundle: ModelBundle) -> InferenceEngine:
+    """Return the (cached) engine for a loaded bundle."""
+    engine = _engines.get(bundle)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(bundle)
+            if engine is None:
+                engine = InferenceEngine(bundle)
+                _engines[bundle] = engine
+    return engine
+
+
+def get_engine(model_dir: str = "modelos") -> InferenceEngine:
+    """Return the engine for the models currently loaded from ``model_dir``."""
+    return engine_for(get_registry(model_dir).get())
+
+
+def validate_bundle(bundle: ModelBundle):
+    """
+    Check that a freshly loaded bundle can serve predictions before it is swapped in.
+
+    Builds (and caches) its engine and scores ``PROBE_EXAMPLES`` through the
+    pipelines and, when enabled, the compiled predictor.
+
+    Raises:
+        ValueError: If the models produce unusable probabilities
+    """
+    engine = engine_for(bundle)
+    proba_type, proba_bin = engine.predict_proba(engine.build_frame(PROBE_EXAMPLES))
+    if proba_type.shape != (len(PROBE_EXAMPLES), len(engine.classes)):
+        raise ValueError(f"Type model returned probabilities of shape {proba_type.shape}")
+    if not np.all(np.isfinite(proba_type)) or not np.allclose(proba_type.sum(axis=1), 1.0):
+        raise ValueError("Type model probabilities are not a valid distribution")
+    if proba_bin is not None and not np.all((proba_bin >= 0) & (proba_bin <= 1)):
+        raise ValueError("Binary model probabilities are outside [0, 1]")
+    engine.predict_batch(PROBE_EXAMPLES)
+
+
+def reload_engine(model_dir: str = "modelos") -> InferenceEngine:
+    """Reload ``model_dir``'s artifacts if they changed, validating them first; return the engine in use."""
+    return engine_for(get_registry(model_dir).reload(validate=validate_bundle))
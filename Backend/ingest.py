@@ -0,0 +1,163 @@
+"""
+Fast loading of NASA Exoplanet Archive tables for training.
+
+The archive CSVs carry a long ``#`` comment header and dozens of columns, of
+which training uses only a handful. ``load_catalogue`` reads just the
+requested columns with pandas' C parser, stores floats as ``float32`` and
+the listed categorical columns as ``category``, and saves the result as a
+snapshot keyed by the CSV's content hash. Later runs on an unchanged file
+load the snapshot instead of parsing the CSV again.
+
+Snapshots are Feather files when ``pyarrow`` is installed and pickles
+otherwise; they live in ``.ingest_cache/`` next to the CSV.
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+SNAPSHOT_DIR = ".ingest_cache"
+
+# Bump when the snapshot contents change for the same CSV and options
+SNAPSHOT_FORMAT = 1
+
+
+def _snapshot_ext() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        return ".feather"
+    except ImportError:
+        return ".pkl"
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_header(path: str, encoding: str = "utf-8-sig") -> List[str]:
+    """Column names of an archive CSV (the first line after the ``#`` comments)."""
+    with open(path, encoding=encoding, newline="") as fh:
+        for line in fh:
+            if line.strip() and not line.startswith("#"):
+                return [name.strip() for name in next(csv.reader([line]))]
+    return []
+
+
+def _options_key(columns: Optional[Sequence[str]], categorical: Sequence[str], float_dtype: str) -> str:
+    options = {
+        "format": SNAPSHOT_FORMAT,
+        "columns": None if columns is None else list(columns),
+        "categorical": sorted(categorical),
+        "float_dtype": float_dtype,
+    }
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()
+
+
+def snapshot_path(path: str, content_hash: str, options_key: str, cache_dir: Optional[str] = None) -> str:
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{content_hash[:16]}-{options_key[:8]}{_snapshot_ext()}")
+
+
+def _read_snapshot(path: str) -> pd.DataFrame:
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+
+def _write_snapshot(df: pd.DataFrame, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary name first so concurrent runs never read a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if path.endswith(".feather"):
+        df.reset_index(drop=True).to_feather(tmp)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def load_catalogue(path: str, columns: Optional[Sequence[str]] = None, categorical: Sequence[str] = (),
+                   float_dtype: str = "float32", cache_dir: Optional[str] = None, use_snapshot: bool = True,
+                   timings: Optional[Dict[str, float]] = None, verbose: bool = False) -> pd.DataFrame:
+    """
+    Load an archive CSV, reading only the needed columns.
+
+    Args:
+        path: CSV file, optionally starting with ``#`` comment lines
+        columns: Columns to load; names missing from the file are ignored.
+            ``None`` loads every column.
+        categorical: Columns to store as ``category``
+        float_dtype: dtype for floating-point columns (``"float64"`` keeps full precision)
+        cache_dir: Where snapshots are kept (default: ``.ingest_cache`` next to the CSV)
+        use_snapshot: Load/save the content-addressed snapshot
+        timings: Optional dict that receives the seconds spent per stage
+        verbose: Print the timing breakdown
+
+    Returns:
+        DataFrame with the requested columns, in file order
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    snapshot = None
+    if use_snapshot:
+        content_hash = file_hash(path)
+        timings["hash"] = time.perf_counter() - start
+        snapshot = snapshot_path(path, content_hash, _options_key(columns, categorical, float_dtype), cache_dir)
+        if os.path.exists(snapshot):
+            t = time.perf_counter()
+            df = _read_snapshot(snapshot)
+            timings["snapshot_load"] = time.perf_counter() - t
+            timings["total"] = time.perf_counter() - start
+            if verbose:
+                _print_timings(path, df, timings, snapshot, hit=True)
+            return df
+
+    t = time.perf_counter()
+    header = read_header(path)
+    usecols = header if columns is None else [c for c in header if c in set(columns)]
+    timings["header"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    df = pd.read_csv(
+        path,
+        comment="#",
+        encoding="utf-8-sig",
+        engine="c",
+        usecols=usecols,
+        dtype={c: "category" for c in categorical if c in usecols},
+        low_memory=False,
+    )
+    timings["parse"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    floats = df.select_dtypes(include=["floating"]).columns
+    if len(floats) and float_dtype:
+        df[floats] = df[floats].astype(float_dtype)
+    timings["dtypes"] = time.perf_counter() - t
+
+    if snapshot is not None:
+        t = time.perf_counter()
+        _write_snapshot(df, snapshot)
+        timings["snapshot_write"] = time.perf_counter() - t
+
+    timings["total"] = time.perf_counter() - start
+    if verbose:
+        _print_timings(path, df, timings, snapshot, hit=False)
+    return df
+
+
+def _print_timings(path: str, df: pd.DataFrame, timings: Dict[str, float], snapshot: Optional[str], hit: bool):
+    source = f"snapshot {os.path.basename(snapshot)}" if hit else path
+    print(f"📥 Loaded {df.shape[0]} rows x {df.shape[1]} columns from {source}")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<15} {seconds * 1000:9.1f} ms")
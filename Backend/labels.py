@@ -0,0 +1,101 @@
+"""
+Array-based construction of the size, thermal and type training labels.
+
+These produce the same labels as the row-wise ``_size_class`` and
+``_thermal_class`` in ``regenerate_models.py`` (kept there as the readable
+reference) without building a ``Series`` per row. Columns are passed by
+name so the same code serves KOI (``koi_*``) and Planetary Systems
+(``pl_*``) tables; a column that is ``None`` or absent counts as missing.
+Missing labels are ``None``.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MJUP_TO_MEARTH = 317.828
+
+
+def _column(df: pd.DataFrame, col: Optional[str]) -> np.ndarray:
+    """Values of ``col`` as a float array, all-NaN if the column is missing.
+
+    Float columns keep their dtype so comparisons round exactly like the
+    row-wise functions do on the same frame.
+    """
+    if col is None or col not in df.columns:
+        return np.full(len(df), np.nan)
+    values = df[col]
+    if pd.api.types.is_float_dtype(values.dtype) and isinstance(values.dtype, np.dtype):
+        return values.to_numpy()
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _select(conditions: Sequence[np.ndarray], labels: Sequence[str], n: int) -> np.ndarray:
+    """Like ``np.select`` over string labels; rows matching no condition get ``None``."""
+    codes = np.select(conditions, np.arange(1, len(labels) + 1), default=0) if conditions else np.zeros(n, int)
+    return np.array([None] + list(labels), dtype=object)[codes]
+
+
+def size_labels(df: pd.DataFrame, col_rade: Optional[str], col_bmasse: Optional[str],
+                col_bmassj: Optional[str]) -> pd.Series:
+    """Size class from the radius, falling back to the mass (Earth or Jupiter masses)."""
+    r = _column(df, col_rade)
+    me = _column(df, col_bmasse)
+    mj = _column(df, col_bmassj)
+
+    # Jupiter masses fill in missing Earth masses
+    me = np.where(~np.isnan(mj) & np.isnan(me), mj * MJUP_TO_MEARTH, me)
+
+    has_r = ~np.isnan(r)
+    has_me = ~np.isnan(me)
+    by_mass = ~has_r & has_me
+    super_jupiter = has_me & (me >= 2 * MJUP_TO_MEARTH)
+
+    labels = _select(
+        [
+            # Prefer radius
+            has_r & (r < 0.8),
+            has_r & (r < 1.5),
+            has_r & (r < 2.5),
+            has_r & (r < 4.0),
+            has_r & (r < 6.0),
+            has_r & super_jupiter,
+            has_r,
+            # Fallback to mass
+            by_mass & (me < 0.5),
+            by_mass & (me < 2),
+            by_mass & (me < 10),
+            by_mass & (me < 20),
+            by_mass & (me < 50),
+            by_mass & super_jupiter,
+            by_mass,
+        ],
+        [
+            "subterrestre", "terraneo", "super_tierra", "mini_neptuno", "neptuniano", "super_jupiter", "joviano",
+            "subterrestre", "terraneo", "super_tierra", "mini_neptuno", "neptuniano", "super_jupiter", "joviano",
+        ],
+        len(df),
+    )
+    return pd.Series(labels, index=df.index, dtype=object)
+
+
+def thermal_labels(df: pd.DataFrame, col_eqt: Optional[str]) -> pd.Series:
+    """Thermal class from the equilibrium temperature (K)."""
+    teq = _column(df, col_eqt)
+    has_teq = ~np.isnan(teq)
+    labels = _select(
+        [has_teq & (teq < 400), has_teq & (teq < 700), has_teq & (teq < 1000), has_teq],
+        ["frio", "templado", "caliente", "muy_caliente"],
+        len(df),
+    )
+    return pd.Series(labels, index=df.index, dtype=object)
+
+
+def type_labels(size: pd.Series, thermal: Optional[pd.Series]) -> pd.Series:
+    """Size label, suffixed with ``_caliente`` for very hot planets."""
+    if thermal is None:
+        return size.copy()
+    hot = (thermal == "muy_caliente") & size.notna()
+    out = size.copy()
+    out[hot] = size[hot] + "_caliente"
+    return out
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Asynchronous load generator for the prediction API.
+
+``test_api.py`` and ``integration_example.py`` send one blocking request at
+a time. This script keeps many requests in flight from an asyncio client
+(``httpx``) to show how the service behaves under concurrency:
+
+- closed loop (``--concurrency N``): N clients, each sending its next
+  request as soon as the previous one is answered
+- open loop (``--rate R``): requests start R times per second whether or not
+  earlier ones have finished (``--arrivals poisson`` for random gaps). Latency
+  is measured from the scheduled start, so a server that falls behind shows
+  up in the percentiles instead of silently lowering the request rate.
+
+Requests are drawn from a weighted mix of endpoints (``--mix``). Their bodies
+are rows sampled from ``kepler.csv``; batch and bulk requests get
+``--batch-rows`` rows each. The report gives throughput, p50/p95/p99/max
+latency and errors (by status code or exception) per endpoint and overall.
+
+The target is either a running server (``--url``) or, by default, ``main.py``
+in this process through ``httpx.ASGITransport`` (no network, lifespan
+included). In-process, client and server share one event loop and CPU, so
+use ``--url`` to measure the server on its own.
+
+Usage:
+    python load_test.py --concurrency 16 --duration 20
+    python load_test.py --rate 200 --duration 30 --mix predict=6,classify-exoplanet=3,predict/batch=1
+    python load_test.py --url http://localhost:8000 --concurrency 64 --json load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmark import SEED, sample_examples
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ("predict", "classify-exoplanet", "predict/batch", "predict/bulk")
+DEFAULT_MIX = "predict=6,classify-exoplanet=3,predict/batch=1"
+BATCH_ROWS = 50
+SAMPLE_ROWS = 5000
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse ``"predict=6,classify-exoplanet=3"`` into ``{endpoint: weight}``.
+
+    Raises:
+        ValueError: For unknown endpoints or non-positive weights
+    """
+    mix = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        endpoint, _, weight = part.partition("=")
+        endpoint = endpoint.strip().strip("/")
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint!r}; expected one of {ENDPOINTS}")
+        mix[endpoint] = float(weight) if weight.strip() else 1.0
+        if mix[endpoint] <= 0:
+            raise ValueError(f"Weight of {endpoint!r} must be positive")
+    if not mix:
+        raise ValueError("The request mix is empty")
+    return mix
+
+
+class RequestFactory:
+    """Builds request arguments for each endpoint from rows sampled from ``kepler.csv``."""
+
+    def __init__(self, mix: Dict[str, float], batch_rows: int = BATCH_ROWS, variant: Optional[str] = None,
+                 seed: int = SEED):
+        self.endpoints = list(mix)
+        self.weights = list(mix.values())
+        self.batch_rows = batch_rows
+        self.params = {"variant": variant} if variant else {}
+        self.rows = sample_examples(SAMPLE_ROWS, seed)
+        self.rng = random.Random(seed)
+
+    def _rows(self, n: int) -> List[Dict]:
+        start = self.rng.randrange(len(self.rows))
+        return [self.rows[(start + i) % len(self.rows)] for i in range(n)]
+
+    def next(self) -> Tuple[str, Dict]:
+        """The next request: ``(endpoint, keyword arguments for client.post)``."""
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        kwargs = {"params": self.params}
+        if endpoint == "predict/batch":
+            kwargs["json"] = {"planets": self._rows(self.batch_rows)}
+        elif endpoint == "predict/bulk":
+            kwargs["content"] = "".join(json.dumps(row) + "\n" for row in self._rows(self.batch_rows))
+            kwargs["headers"] = {"Content-Type": "application/x-ndjson"}
+        else:
+            kwargs["json"] = self._rows(1)[0]
+        return endpoint, kwargs
+
+    def rows_in(self, endpoint: str) -> int:
+        return self.batch_rows if endpoint in ("predict/batch", "predict/bulk") else 1
+
+
+class LoadRecorder:
+    """Latency and outcome of every request sent during the measured window."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.rows: Dict[str, int] = {}
+        self.started = self.finished = 0.0
+
+    def record(self, endpoint: str, seconds: float, error: Optional[str], rows: int):
+        if error is None:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.rows[endpoint] = self.rows.get(endpoint, 0) + rows
+        else:
+            counts = self.errors.setdefault(endpoint, {})
+            counts[error] = counts.get(error, 0) + 1
+
+    def summary(self) -> Dict:
+        """Per-endpoint and overall throughput, latency percentiles and errors."""
+        elapsed = max(self.finished - self.started, 1e-9)
+
+        def stats(latencies: List[float], errors: Dict[str, int], rows: int) -> Dict:
+            failed = sum(errors.values())
+            total = len(latencies) + failed
+            entry = {
+                "requests": total,
+                "ok": len(latencies),
+                "errors": failed,
+                "error_rate": failed / total if total else 0.0,
+                "error_kinds": dict(errors),
+                "requests_per_s": total / elapsed,
+                "rows_per_s": rows / elapsed,
+            }
+            if latencies:
+                ms = np.asarray(latencies) * 1000.0
+                entry.update({
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "p99_ms": float(np.percentile(ms, 99)),
+                    "max_ms": float(ms.max()),
+                    "mean_ms": float(ms.mean()),
+                })
+            return entry
+
+        endpoints = sorted(set(self.latencies) | set(self.errors))
+        per_endpoint = {
+            e: stats(self.latencies.get(e, []), self.errors.get(e, {}), self.rows.get(e, 0)) for e in endpoints
+        }
+        all_errors: Dict[str, int] = {}
+        for counts in self.errors.values():
+            for kind, n in counts.items():
+                all_errors[kind] = all_errors.get(kind, 0) + n
+        overall = stats([s for e in endpoints for s in self.latencies.get(e, [])], all_errors,
+                        sum(self.rows.values()))
+        return {"duration_s": elapsed, "overall": overall, "endpoints": per_endpoint}
+
+
+async def _send(client, factory: RequestFactory, recorder: Optional[LoadRecorder], scheduled: Optional[float] = None):
+    endpoint, kwargs = factory.next()
+    start = time.perf_counter() if scheduled is None else scheduled
+    error = None
+    try:
+        response = await client.post(f"/{endpoint}", **kwargs)
+        if response.status_code >= 400:
+            error = str(response.status_code)
+    except Exception as e:  # connection errors and timeouts count as failed requests
+        error = type(e).__name__
+    if recorder is not None:
+        recorder.record(endpoint, time.perf_counter() - start, error, factory.rows_in(endpoint))
+
+
+async def closed_loop(client, factory: RequestFactory, recorder: LoadRecorder, concurrency: int,
+                      duration: float, max_requests: Optional[int]):
+    """``concurrency`` clients, each sending back to back until time or the request budget runs out."""
+    deadline = time.perf_counter() + duration
+    budget = [max_requests if max_requests is not None else float("inf")]
+
+    async def client_loop():
+        while time.perf_counter() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            await _send(client, factory, recorder)
+
+    recorder.started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    recorder.finished = time.perf_counter()
+
+
+async def open_loop(client, factory: RequestFactory, recorder: LoadRecorder, rate: float, duration: float,
+                    max_requests: Optional[int], arrivals: str = "uniform", max_in_flight: int = 1000,
+                    seed: int = SEED):
+    """
+    Start requests ``rate`` times per second, independently of the responses.
+
+    At most ``max_in_flight`` requests are outstanding; beyond that, starts are
+    delayed, and the delay counts towards their latency.
+    """
+    rng = random.Random(seed)
+    total = int(rate * duration) if max_requests is None else max_requests
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = []
+
+    async def fire(scheduled: float):
+        try:
+            await _send(client, factory, recorder, scheduled)
+        finally:
+            slots.release()
+
+    recorder.started = time.perf_counter()
+    scheduled = recorder.started
+    for _ in range(total):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        tasks.append(asyncio.create_task(fire(scheduled)))
+        scheduled += rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+    await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+
+
+async def run_load(args) -> Dict:
+    import httpx
+
+    factory = RequestFactory(parse_mix(args.mix), args.batch_rows, args.variant, args.seed)
+    recorder = LoadRecorder()
+    in_flight = args.concurrency if args.rate is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=in_flight, max_keepalive_connections=in_flight)
+
+    async def drive(client):
+        # Warm-up requests (model loads, connection setup, caches) are not recorded
+        await asyncio.gather(*(_send(client, factory, None) for _ in range(args.warmup)))
+        if args.rate is None:
+            await closed_loop(client, factory, recorder, args.concurrency, args.duration, args.requests)
+        else:
+            await open_loop(client, factory, recorder, args.rate, args.duration, args.requests,
+                            args.arrivals, args.max_in_flight, args.seed)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            await drive(client)
+    else:
+        os.chdir(_HERE)  # main.py resolves "modelos" relative to the cwd
+        sys.path.insert(0, _HERE)
+        import main
+
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout,
+                                         limits=limits) as client:
+                await drive(client)
+
+    report = recorder.summary()
+    report["settings"] = {
+        "target": args.url or "in-process",
+        "mode": "closed" if args.rate is None else "open",
+        "concurrency": args.concurrency if args.rate is None else None,
+        "rate": args.rate,
+        "arrivals": args.arrivals if args.rate is not None else None,
+        "mix": parse_mix(args.mix),
+        "batch_rows": args.batch_rows,
+        "variant": args.variant,
+    }
+    return report
+
+
+def _fmt(entry: Dict, key: str) -> str:
+    return f"{entry[key]:.1f}" if key in entry else "-"
+
+
+def print_report(report: Dict):
+    settings = report["settings"]
+    load = f"{settings['concurrency']} clients" if settings["mode"] == "closed" else f"{settings['rate']:g} req/s"
+    print(f"🚀 {settings['target']}, {load}, {report['duration_s']:.1f}s")
+    print(f"{'endpoint':<20} {'requests':>9} {'req/s':>8} {'rows/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'errors':>8}")
+    rows = list(report["endpoints"].items()) + [("all", report["overall"])]
+    for name, entry in rows:
+        print(f"{name:<20} {entry['requests']:>9} {entry['requests_per_s']:>8.1f} {entry['rows_per_s']:>9.0f} "
+              f"{_fmt(entry, 'p50_ms'):>8} {_fmt(entry, 'p95_ms'):>8} {_fmt(entry, 'p99_ms'):>8} "
+              f"{_fmt(entry, 'max_ms'):>8} {entry['error_rate']:>7.1%}")
+    if report["overall"]["errors"]:
+        print(f"❌ Errors: {report['overall']['error_kinds']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test the prediction API with concurrent requests")
+    parser.add_argument("--url", help="Base URL of a running server (default: main.py in-process, no network)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="Closed loop: clients sending back to back")
+    load.add_argument("--rate", type=float, help="Open loop: requests started per second")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="uniform",
+                        help="Gaps between open-loop starts")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to send requests for")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Weighted endpoints, from {', '.join(ENDPOINTS)} (default: {DEFAULT_MIX})")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Rows per batch/bulk request")
+    parser.add_argument("--variant", help="Send ?variant= with every request")
+    parser.add_argument("--warmup", type=int, default=20, help="Unrecorded requests sent first")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request (seconds)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        args.json = os.path.abspath(args.json)  # the in-process target changes the working directory
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"📄 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
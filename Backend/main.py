@@ -1,23 +1,182 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Tuple, Optional
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Tuple, Optional
 import os
 import numpy as np
-import pandas as pd
-import joblib
-from pathlib import Path
-import os
-from typing import Optional, Tuple
-import joblib
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from model_registry import (
+    MODEL_VARIANTS, TYPE_MODEL_FILE, artifact_fingerprint, get_registry, resolve_artifact_dir, variant_dir
+)
+from inference import engine_for, get_engine, reload_engine
+from batching import MicroBatcher
+from executor import InferenceExecutor, ModelVersionError
+from prediction_cache import PredictionCache, parse_quantization
+from probability_grid import LOOKUP_MODES, ProbabilityGrid, load_grid
+import metrics
+import profiling
+from bulk import (
+    INPUT_FORMATS, OUTPUT_FORMATS, guess_input_format, iter_record_chunks, iter_records,
+    make_writer, record_ids, to_example
+)
+
+logger = logging.getLogger(__name__)
+
+# Where inference runs: "thread" (in-process pool) or "process" (worker processes)
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0")) or None
+INFERENCE_TIMEOUT_S = float(os.environ.get("INFERENCE_TIMEOUT_S", "30")) or None
+
+# Optional micro-batching of concurrent single-planet requests
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.environ.get("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", "64"))
+
+# LRU/TTL cache in front of single-planet predictions (size 0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "0")) or None
+PREDICTION_CACHE_QUANTIZE = parse_quantization(os.environ.get("PREDICTION_CACHE_QUANTIZE", ""))
+
+# One cache per model variant (a cache empties itself when it sees another model version)
+caches: Dict[str, PredictionCache] = {}
+if PREDICTION_CACHE_SIZE > 0:
+    caches = {
+        variant: PredictionCache(
+            max_entries=PREDICTION_CACHE_SIZE,
+            ttl=PREDICTION_CACHE_TTL_S,
+            quantize=PREDICTION_CACHE_QUANTIZE
+        )
+        for variant in MODEL_VARIANTS
+    }
+cache: Optional[PredictionCache] = caches.get("full")
+
+def parse_endpoint_variants(spec: str) -> Dict[str, str]:
+    """Parse ``"classify-exoplanet=lite,predict=full"`` into ``{endpoint: variant}``."""
+    variants = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        endpoint, _, variant = part.partition("=")
+        variant = variant.strip()
+        if variant not in MODEL_VARIANTS:
+            raise ValueError(f"Unknown model variant {variant!r} for {endpoint!r}; expected one of {MODEL_VARIANTS}")
+        variants[endpoint.strip().strip("/")] = variant
+    return variants
+
+# Model variant used unless the request (?variant=) or the endpoint's default picks another one
+MODEL_VARIANT = os.environ.get("MODEL_VARIANT", "full")
+if MODEL_VARIANT not in MODEL_VARIANTS:
+    raise ValueError(f"Unknown MODEL_VARIANT {MODEL_VARIANT!r}; expected one of {MODEL_VARIANTS}")
+ENDPOINT_MODEL_VARIANTS = parse_endpoint_variants(os.environ.get("ENDPOINT_MODEL_VARIANTS", ""))
+
+# Answer in-range game requests from the precomputed grid: "off", "nearest" or "linear"
+PROBABILITY_GRID_MODE = os.environ.get("PROBABILITY_GRID_MODE", "off")
+
+# Poll modelos/ for new artifacts every N seconds and hot-swap them (0 disables the watcher)
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", "5"))
+
+# Required in the X-Admin-Token header of /admin/* requests when set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Prometheus metrics on /metrics (request counts/latencies, prediction stages, cache, models)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Set by the lifespan hook
+grid: Optional[ProbabilityGrid] = None
+grid_stats = {"hits": 0, "fallbacks": 0}
+executor: Optional[InferenceExecutor] = None
+batcher: Optional[MicroBatcher] = None
+watcher: Optional[asyncio.Task] = None
+reload_lock: Optional[asyncio.Lock] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload the models once per process before serving requests."""
+    global executor, batcher, grid, watcher, reload_lock
+    try:
+        bundle = get_registry("modelos").preload()
+        get_engine("modelos")
+        print(f"Models loaded (version {bundle.version}) in {bundle.load_seconds:.3f}s")
+    except Exception as e:
+        # Keep serving /health and /test; prediction endpoints will report the error
+        print(f"Error preloading models: {str(e)}")
+    
+    # Variants some endpoint serves by default; others load on their first ?variant= request
+    for variant in {MODEL_VARIANT, *ENDPOINT_MODEL_VARIANTS.values()} - {"full"}:
+        if not variant_available(variant):
+            print(f"Model variant {variant!r} not found; those endpoints use the full models")
+            continue
+        variant_bundle = get_registry(variant_dir("modelos", variant)).preload()
+        engine_for(variant_bundle)
+        print(f"{variant} models loaded (version {variant_bundle.version}) in {variant_bundle.load_seconds:.3f}s")
+    
+    if PROBABILITY_GRID_MODE in LOOKUP_MODES:
+        grid = load_grid("modelos")
+        if grid is None:
+            print("Probability grid enabled but modelos/probability_grid.npz not found")
+        else:
+            print(f"Probability grid loaded ({PROBABILITY_GRID_MODE} lookup, model version {grid.model_version})")
+    
+    executor = InferenceExecutor(
+        mode=INFERENCE_EXECUTOR,
+        workers=INFERENCE_WORKERS,
+        timeout=INFERENCE_TIMEOUT_S,
+        on_timings=metrics.observe_stages if METRICS_ENABLED else None
+    )
+    executor.warm_up()
+    print(f"Inference executor: {executor.mode} x{executor.workers}")
+    
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(
+            executor.run_batch,
+            window_ms=MICROBATCH_WINDOW_MS,
+            max_batch_size=MICROBATCH_MAX_SIZE,
+            max_in_flight=executor.workers
+        )
+        await batcher.start()
+    
+    reload_lock = asyncio.Lock()
+    if MODEL_WATCH_INTERVAL_S > 0:
+        watcher = asyncio.create_task(watch_models(MODEL_WATCH_INTERVAL_S))
+        print(f"Watching modelos/ for new models every {MODEL_WATCH_INTERVAL_S:g}s")
+    
+    yield
+    
+    if watcher is not None:
+        watcher.cancel()
+        try:
+            await watcher
+        except asyncio.CancelledError:
+            pass
+        watcher = None
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    executor.shutdown()
+    executor = None
 
 
 app = FastAPI(
     title="Exoplanet Prediction API",
     description="API for predicting exoplanet types and characteristics using machine learning models",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Maximum number of planets accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
+
+# /predict/bulk scores uploads this many rows at a time, reading this many bytes per read
+BULK_CHUNK_ROWS = int(os.environ.get("BULK_CHUNK_ROWS", "1000"))
+BULK_READ_BYTES = int(os.environ.get("BULK_READ_BYTES", str(64 * 1024)))
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +186,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Opt-in profiling (X-Profile header, ?profile= or PROFILING_SAMPLE_RATE) and the slow-request log
+profiling_settings = profiling.ProfilingSettings()
+slow_requests = profiling.SlowRequestLog(profiling_settings)
+app.add_middleware(
+    profiling.ProfilingMiddleware,
+    settings=profiling_settings,
+    log=slow_requests,
+    admin_token=ADMIN_TOKEN
+)
+
 # Request model for exoplanet data
 class ExoplanetData(BaseModel):
     koi_prad: Optional[float] = None      # Planet radius (Earth radii)
@@ -38,49 +210,63 @@ class ExoplanetData(BaseModel):
 
 # Response model for predictions
 class PredictionResponse(BaseModel):
+    # Allow the model_version field (pydantic reserves the "model_" prefix)
+    model_config = {"protected_namespaces": ()}
+    
     is_exoplanet: Optional[int] = None
     is_exoplanet_proba: Optional[float] = None
     type: str
     type_top3: List[Tuple[str, float]]
+    model_version: Optional[str] = None
+    model_variant: Optional[str] = None
 
-# Global variables to store loaded models
-clf_bin = None
-clf_type = None
-meta = None
+# Request model for batch predictions: either a list of planets or columnar arrays
+class BatchPredictionRequest(BaseModel):
+    planets: Optional[List[Any]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+
+# Runtime changes to the profiling settings; omitted fields stay unchanged
+class ProfilingUpdate(BaseModel):
+    sample_rate: Optional[float] = None
+    sample_mode: Optional[str] = None
+    slow_requests_kept: Optional[int] = None
+    slow_min_ms: Optional[float] = None
+    profiles_kept: Optional[int] = None
+    stack_interval_ms: Optional[float] = None
+
+# Per-row result of a batch prediction
+class BatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    result: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+# Response model for batch predictions
+class BatchPredictionResponse(BaseModel):
+    count: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 def load_models(model_dir: str = "modelos") -> Tuple[Optional[object], object, dict]:
     """
     Load the trained models and metadata.
     
+    The models are shared through the process-wide registry, so only the
+    first call per process actually reads the files.
+    
     Args:
         model_dir: Directory containing the model files
         
     Returns:
         Tuple of (binary classifier, type classifier, metadata)
     """
-    global clf_bin, clf_type, meta
-    
-    if clf_bin is not None and clf_type is not None and meta is not None:
-        return clf_bin, clf_type, meta
-    
     try:
-        # Load binary classifier if it exists
-        p_bin = os.path.join(model_dir, "clf_is_exoplanet.joblib")
-        if os.path.exists(p_bin):
-            clf_bin = joblib.load(p_bin)
-        else:
-            clf_bin = None
-            
-        # Load type classifier (required)
-        clf_type = joblib.load(os.path.join(model_dir, "clf_exoplanet_type.joblib"))
-        
-        # Load metadata (required)
-        meta = joblib.load(os.path.join(model_dir, "metadata.joblib"))
-        
-        return clf_bin, clf_type, meta
+        return get_registry(model_dir).get().as_tuple()
         
     except Exception as e:
-        print(f"Error loading models: {str(e)}")  # Debug print
+        logger.exception("Error loading models")
+        metrics.PREDICTION_ERRORS.inc("load")
         raise HTTPException(
             status_code=500,
             detail=f"Error loading models: {str(e)}"
@@ -98,41 +284,356 @@ def predict_exoplanet(example: Dict, model_dir: str = "modelos") -> Dict:
         Dictionary with prediction results
     """
     try:
-        clf_bin, clf_type, meta = load_models(model_dir)
-        
-        # Get required columns from metadata
-        cols = meta["num_cols"] + meta["cat_cols"]
-        
-        # Create DataFrame with the input data
-        X = pd.DataFrame([{c: example.get(c, np.nan) for c in cols}])
-        
-        out = {}
-        
-        # Binary classification (if model exists)
-        if clf_bin is not None:
-            proba = clf_bin.predict_proba(X)[0, 1]
-            out["is_exoplanet"] = int(proba >= 0.5)
-            out["is_exoplanet_proba"] = float(proba)
-        
-        # Type classification
-        proba_type = clf_type.predict_proba(X)[0]
-        pred_type = clf_type.predict(X)[0]
-        classes = clf_type.named_steps["clf"].classes_
+        # Preprocess once and score both models; the label comes from the probabilities
+        return get_engine(model_dir).predict_one(example)
         
-        # Get top 3 predictions
-        topk = np.argsort(proba_type)[::-1][:3]
-        out["type"] = str(pred_type)
-        out["type_top3"] = [(str(classes[i]), float(proba_type[i])) for i in topk]
+    except Exception as e:
+        logger.exception("Error making prediction")
+        metrics.PREDICTION_ERRORS.inc("single")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error making prediction: {str(e)}"
+        )
+
+def predict_exoplanet_batch(examples: List[Dict], model_dir: str = "modelos") -> List[Dict]:
+    """
+    Predict exoplanet characteristics for many planets at once.
+    
+    All rows go through a single preprocessing pass and a single
+    ``predict_proba`` call per model.
+    
+    Args:
+        examples: List of dictionaries containing exoplanet parameters
+        model_dir: Directory containing the model files
         
-        return out
+    Returns:
+        List of prediction results, in input order
+    """
+    if not examples:
+        return []
+    
+    try:
+        return get_engine(model_dir).predict_batch(examples)
         
     except Exception as e:
-        print(f"Error making prediction: {str(e)}")  # Debug print
+        logger.exception("Error making batch prediction")
+        metrics.PREDICTION_ERRORS.inc("batch")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error making batch prediction: {str(e)}"
+        )
+
+async def run_inference(call) -> Any:
+    """Await an executor/batcher call, mapping failures to HTTP errors."""
+    try:
+        return await call
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Prediction timed out after {INFERENCE_TIMEOUT_S}s"
+        )
+    except ModelVersionError as e:
+        # The models were swapped while the request was running; retrying is safe
+        raise HTTPException(
+            status_code=503,
+            detail=f"Models changed during the request, please retry: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error making prediction")
+        metrics.PREDICTION_ERRORS.inc("executor")
         raise HTTPException(
             status_code=500,
             detail=f"Error making prediction: {str(e)}"
         )
 
+async def predict_single(example: Dict, variant: str = "full") -> Dict:
+    """Predict one planet from the cache, the probability grid (full models only) or the models."""
+    cache = caches.get(variant)
+    use_grid = grid is not None and variant == "full"
+    if cache is None and not use_grid:
+        return await score_single(example, variant=variant)
+    
+    try:
+        bundle = current_bundle(variant)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error loading models: {str(e)}"
+        )
+    
+    if cache is not None:
+        example = cache.prepare(example)
+        key = cache.key(example, bundle.cols)
+        result = cache.get(key, bundle.version)
+        if result is not None:
+            return result
+    
+    result = lookup_grid(example, bundle) if use_grid else None
+    if result is None:
+        result = await score_single(example, bundle, variant)
+    
+    # A micro-batch may have been scored by models swapped in meanwhile
+    if cache is not None and result.get("model_version") == bundle.version:
+        cache.put(key, bundle.version, result)
+    return result
+
+def lookup_grid(example: Dict, bundle) -> Optional[Dict]:
+    """Answer from the probability grid, or ``None`` if the example is off-grid."""
+    if grid is None:
+        return None
+    found = grid.lookup(example, PROBABILITY_GRID_MODE, bundle.version)
+    if found is None:
+        grid_stats["fallbacks"] += 1
+        return None
+    grid_stats["hits"] += 1
+    proba_type, proba_bin = found
+    return engine_for(bundle).format_results(
+        proba_type[np.newaxis, :],
+        None if proba_bin is None else np.array([proba_bin])
+    )[0]
+
+def current_bundle(variant: str = "full"):
+    """The registry's bundle; a load triggered here is recorded as the ``model_load`` stage."""
+    registry = get_registry(variant_dir("modelos", variant))
+    if registry.loaded:
+        return registry.get()
+    start = time.perf_counter()
+    bundle = registry.get()
+    metrics.add_stage("model_load", time.perf_counter() - start)
+    return bundle
+
+def score_inline(examples: List[Dict], bundle=None) -> List[Dict]:
+    """Score on the calling thread (used while a request is being cProfiled)."""
+    engine = engine_for(bundle) if bundle is not None else get_engine("modelos")
+    timings = {}
+    results = engine.predict_batch(examples, timings)
+    metrics.observe_stages(timings, len(examples))
+    return results
+
+async def score_single(example: Dict, bundle=None, variant: str = "full") -> Dict:
+    """
+    Predict one planet without blocking the event loop.
+    
+    ``bundle`` pins the models to use; micro-batches (full models only) are
+    scored with the models current when the batch runs.
+    """
+    if bundle is None and variant != "full":
+        bundle = current_bundle(variant)
+    if profiling.inline_inference():
+        return score_inline([example], bundle)[0]
+    if batcher is not None and variant == "full":
+        return await run_inference(batcher.submit(example))
+    if executor is not None:
+        return await run_inference(executor.run_one(example, bundle))
+    return predict_exoplanet(example, bundle.model_dir if bundle is not None else "modelos")
+
+async def predict_many(examples: List[Dict], bundle=None, variant: str = "full") -> List[Dict]:
+    """
+    Predict a list of planets without blocking the event loop.
+    
+    Requests that call this more than once pass the ``bundle`` they started
+    with, so a model reload in between cannot mix versions in one response.
+    """
+    if not examples:
+        return []
+    if bundle is None and variant != "full":
+        bundle = current_bundle(variant)
+    if profiling.inline_inference():
+        return score_inline(examples, bundle)
+    if executor is not None:
+        return await run_inference(executor.run_batch(examples, bundle))
+    return predict_exoplanet_batch(examples, bundle.model_dir if bundle is not None else "modelos")
+
+def variant_available(variant: str) -> bool:
+    """True when ``variant``'s models are loaded or on disk (``full`` is always assumed present)."""
+    if variant == "full":
+        return True
+    model_dir = variant_dir("modelos", variant)
+    return (get_registry(model_dir).loaded
+            or os.path.exists(os.path.join(resolve_artifact_dir(model_dir), TYPE_MODEL_FILE)))
+
+def choose_variant(endpoint: str, requested: Optional[str]) -> str:
+    """
+    Model variant for a request: ``?variant=``, else the endpoint's default, else ``MODEL_VARIANT``.
+    
+    A configured default whose models were never trained falls back to
+    ``full``; an explicitly requested one is an error.
+    """
+    if requested is not None:
+        if requested not in MODEL_VARIANTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown model variant {requested!r}; expected one of {MODEL_VARIANTS}"
+            )
+        if not variant_available(requested):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model variant {requested!r} is not available (train it with TRAIN_LITE=1)"
+            )
+        return requested
+    variant = ENDPOINT_MODEL_VARIANTS.get(endpoint, MODEL_VARIANT)
+    return variant if variant_available(variant) else "full"
+
+def require_admin(request: Request):
+    """Reject /admin/* requests without the configured ``ADMIN_TOKEN``."""
+    if ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid or missing X-Admin-Token header"
+        )
+
+async def reload_models(source: str) -> Dict:
+    """
+    Load, validate and swap in the artifacts now in ``modelos/``.
+    
+    Runs in a worker thread; requests keep being served by the current
+    models until the new ones have passed validation. Other model variants
+    (``modelos/lite``) are reloaded too once they have been loaded.
+    
+    Args:
+        source: What triggered the reload (for the log)
+        
+    Returns:
+        Previous and current model version and whether they differ, plus
+        the same for each loaded variant under ``variants``
+    """
+    async with reload_lock:
+        results = {}
+        for variant in MODEL_VARIANTS:
+            model_dir = variant_dir("modelos", variant)
+            registry = get_registry(model_dir)
+            if variant != "full" and not registry.loaded:
+                continue
+            previous = registry.get().version if registry.loaded else None
+            try:
+                engine = await asyncio.to_thread(reload_engine, model_dir)
+            except Exception as e:
+                print(f"Model reload ({source}, {variant}) failed, keeping version {previous}: {str(e)}")
+                raise
+            reloaded = engine.version != previous
+            if reloaded:
+                print(f"Model reload ({source}, {variant}): version {previous} -> {engine.version}")
+            results[variant] = {"previous_version": previous, "model_version": engine.version, "reloaded": reloaded}
+        if executor is not None and any(r["reloaded"] for r in results.values()):
+            await asyncio.to_thread(executor.refresh)
+        return {**results["full"], "variants": results}
+
+async def watch_models(interval: float):
+    """Reload the models when their files change and then stay unchanged for one interval."""
+    pending: Dict[str, Optional[str]] = {}
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changed = False
+            for variant in MODEL_VARIANTS:
+                registry = get_registry(variant_dir("modelos", variant))
+                if variant != "full" and not registry.loaded:
+                    continue
+                fingerprint = artifact_fingerprint(registry.model_dir)
+                if fingerprint == registry.fingerprint:
+                    pending.pop(variant, None)
+                    continue
+                # Wait until the files stop changing (e.g. a copy in progress)
+                if fingerprint is None or fingerprint != pending.get(variant):
+                    pending[variant] = fingerprint
+                    continue
+                pending.pop(variant, None)
+                changed = True
+            if changed:
+                await reload_models("file watcher")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Already logged; the current models keep serving
+            pass
+
+def _validate_batch_row(row: Any) -> Dict:
+    """
+    Validate one batch row the same way the single-planet endpoints do.
+    
+    Raises:
+        ValueError: If the row is not a valid set of exoplanet parameters
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Each planet must be a JSON object")
+    try:
+        example = ExoplanetData(**row).dict()
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+    example = {k: v for k, v in example.items() if v is not None}
+    if not example:
+        raise ValueError("At least one parameter must be provided")
+    return example
+
+def _batch_rows(request: BatchPredictionRequest) -> List[Any]:
+    """Turn a batch request (row or columnar layout) into a list of raw rows."""
+    if (request.planets is None) == (request.columns is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide exactly one of 'planets' or 'columns'"
+        )
+    if request.planets is not None:
+        return request.planets
+    
+    lengths = {len(values) for values in request.columns.values()}
+    if len(lengths) > 1:
+        raise HTTPException(
+            status_code=400,
+            detail="All arrays in 'columns' must have the same length"
+        )
+    n_rows = lengths.pop() if lengths else 0
+    return [
+        {name: values[i] for name, values in request.columns.items() if values[i] is not None}
+        for i in range(n_rows)
+    ]
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose generator may still be reading the request body.
+    
+    ``StreamingResponse`` listens for client disconnects on ``receive`` while
+    streaming, which would race with the generator for the body messages.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _bulk_results(chunks, input_format: str, writer, bundle):
+    """Parse, score and format a bulk upload chunk by chunk."""
+    num_cols, cat_cols = bundle.meta["num_cols"], bundle.meta["cat_cols"]
+    yield writer.header()
+    try:
+        async for chunk in iter_record_chunks(iter_records(chunks, input_format), BULK_CHUNK_ROWS):
+            items, valid_idx, valid_examples = [], [], []
+            for row, fields, error in chunk:
+                item = {"row": row, **record_ids(fields)}
+                if error is None:
+                    try:
+                        valid_examples.append(to_example(fields, num_cols, cat_cols))
+                        valid_idx.append(len(items))
+                    except ValueError as e:
+                        error = str(e)
+                item["ok"] = error is None
+                if error is not None:
+                    item["error"] = error
+                items.append(item)
+            
+            # One vectorized call per chunk
+            predictions = await predict_many(valid_examples, bundle)
+            for i, result in zip(valid_idx, predictions):
+                items[i].update(result)
+            yield "".join(writer.row(item) for item in items)
+    except HTTPException as e:
+        # Headers are already sent; report the failure as a final line
+        yield writer.error(str(e.detail))
+    except (ValueError, UnicodeDecodeError) as e:
+        yield writer.error(f"Invalid upload: {str(e)}")
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -141,6 +642,9 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/predict": "POST - Make exoplanet predictions",
+            "/predict/batch": "POST - Make predictions for a list of exoplanets",
+            "/predict/bulk": "POST - Stream predictions for a CSV/NDJSON catalogue upload",
+            "/admin/reload-models": "POST - Hot-swap the models in modelos/",
             "/health": "GET - Check API health",
             "/docs": "GET - API documentation"
         }
@@ -152,10 +656,204 @@ async def health_check():
     try:
         # Try to load models to check if they're available
         load_models()
-        return {"status": "healthy", "models_loaded": True}
+        return {
+            "status": "healthy",
+            "models_loaded": True,
+            "model_version": get_registry("modelos").get().version,
+            "model_variants": [v for v in MODEL_VARIANTS if variant_available(v)]
+        }
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
+@app.get("/stats/batching")
+async def batching_stats():
+    """Micro-batching queue depth and batch size statistics."""
+    if batcher is None:
+        return {"enabled": False}
+    return batcher.stats()
+
+@app.get("/stats/executor")
+async def executor_stats():
+    """Inference executor mode, pool size and timeout count."""
+    if executor is None:
+        return {"mode": None}
+    return executor.stats()
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Prediction cache hit/miss/eviction counters (full models; other variants under ``variants``)."""
+    if cache is None:
+        return {"enabled": False}
+    return {
+        **cache.stats(),
+        "variants": {variant: c.stats() for variant, c in caches.items() if variant != "full"}
+    }
+
+@app.get("/stats/grid")
+async def probability_grid_stats():
+    """Probability grid lookups, fallbacks to the models and the grid's measured error."""
+    if grid is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "mode": PROBABILITY_GRID_MODE,
+        "model_version": grid.model_version,
+        "inputs": sorted(grid.inputs),
+        "error_report": grid.report,
+        **grid_stats
+    }
+
+def _variant_status(variant: str) -> Dict:
+    registry = get_registry(variant_dir("modelos", variant))
+    return {
+        "available": variant_available(variant),
+        "loaded": registry.loaded,
+        "model_version": registry.get().version if registry.loaded else None
+    }
+
+@app.get("/stats/models")
+async def model_stats():
+    """Model version in use, where it was loaded from and the hot-reload counters."""
+    registry = get_registry("modelos")
+    bundle = registry.get() if registry.loaded else None
+    return {
+        "loaded": bundle is not None,
+        "model_version": bundle.version if bundle is not None else None,
+        "artifact_dir": bundle.artifact_dir if bundle is not None else None,
+        "loaded_at": registry.loaded_at,
+        "watch_interval_s": MODEL_WATCH_INTERVAL_S,
+        "changed_on_disk": registry.changed(),
+        "reloads": registry.reloads,
+        "failed_reloads": registry.failed_reloads,
+        "last_reload_error": registry.last_reload_error,
+        "default_variant": MODEL_VARIANT,
+        "endpoint_variants": ENDPOINT_MODEL_VARIANTS,
+        "variants": {variant: _variant_status(variant) for variant in MODEL_VARIANTS}
+    }
+
+@app.post("/admin/reload-models")
+async def admin_reload_models(request: Request):
+    """
+    Load the models now in ``modelos/`` and swap them in if they are a new version.
+    
+    Requests in flight finish on the models they started with. If the new
+    artifacts fail to load or validate, the current models stay in place.
+    
+    Returns:
+        Previous and current model version and whether a swap happened
+    """
+    require_admin(request)
+    try:
+        return await reload_models("admin endpoint")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error reloading models: {str(e)}"
+        )
+
+def _app_metrics():
+    """Scrape-time metrics read from the registry, cache, grid, batcher and executor."""
+    registry = get_registry("modelos")
+    bundles = {variant: get_registry(variant_dir("modelos", variant)) for variant in MODEL_VARIANTS}
+    bundles = {variant: r.get() for variant, r in bundles.items() if r.loaded}
+    if bundles:
+        yield ("model_info", "gauge", "Model version in use per variant", [
+            ({"variant": variant, "version": bundle.version}, 1) for variant, bundle in bundles.items()
+        ])
+        yield ("model_load_seconds", "gauge", "Time taken to load the models in use", [
+            ({"variant": variant}, bundle.load_seconds) for variant, bundle in bundles.items()
+        ])
+    yield ("model_reloads_total", "counter", "Model versions swapped in", [({}, registry.reloads)])
+    yield ("model_reload_failures_total", "counter", "Rejected model reloads", [({}, registry.failed_reloads)])
+    if cache is not None:
+        stats = cache.stats()
+        yield ("prediction_cache_entries", "gauge", "Entries in the prediction cache", [({}, stats["entries"])])
+        yield ("prediction_cache_events_total", "counter", "Prediction cache lookups and removals by event", [
+            ({"event": event}, stats[event])
+            for event in ("hits", "misses", "evictions", "expirations", "invalidations")
+        ])
+    if grid is not None:
+        yield ("probability_grid_lookups_total", "counter", "Probability grid lookups by outcome", [
+            ({"outcome": "hit"}, grid_stats["hits"]), ({"outcome": "fallback"}, grid_stats["fallbacks"])
+        ])
+    if batcher is not None:
+        stats = batcher.stats()
+        yield ("microbatch_queue_depth", "gauge", "Requests waiting for the next micro-batch",
+               [({}, stats["queue_depth"])])
+        yield ("microbatch_batches_total", "counter", "Micro-batches scored", [({}, stats["batches"])])
+        yield ("microbatch_in_flight", "gauge", "Micro-batches being scored", [({}, stats["in_flight"])])
+    if executor is not None:
+        yield ("inference_timeouts_total", "counter", "Predictions that exceeded INFERENCE_TIMEOUT_S",
+               [({}, executor.timeouts)])
+
+metrics.REGISTRY.add_collector(_app_metrics)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics in the text exposition format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(
+            status_code=404,
+            detail="Metrics are disabled (METRICS_ENABLED=0)"
+        )
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/admin/profiling")
+async def admin_profiling_settings(request: Request):
+    """Current profiling settings and counters."""
+    require_admin(request)
+    return {
+        "settings": profiling_settings.as_dict(),
+        "modes": list(profiling.PROFILE_MODES),
+        "requests_seen": slow_requests.requests_seen,
+        "requests_profiled": slow_requests.requests_profiled,
+        "recent_profiles": slow_requests.recent_profile_ids()
+    }
+
+@app.put("/admin/profiling")
+async def admin_update_profiling(update: ProfilingUpdate, request: Request):
+    """Change the sampling rate/mode or the slow-request log size without a restart."""
+    require_admin(request)
+    try:
+        profiling_settings.update(**update.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"settings": profiling_settings.as_dict()}
+
+@app.get("/admin/slow-requests")
+async def admin_slow_requests(request: Request, limit: Optional[int] = None, profiles: bool = False):
+    """
+    The slowest requests seen (slowest first) with their stage breakdown.
+    
+    Args:
+        limit: Return at most this many
+        profiles: Include captured cProfile/stack profiles (can be large)
+    """
+    require_admin(request)
+    records = slow_requests.slowest(limit)
+    if not profiles:
+        records = [{k: v for k, v in r.items() if k != "profile"} for r in records]
+    return {"count": len(records), "requests": records}
+
+@app.delete("/admin/slow-requests")
+async def admin_clear_slow_requests(request: Request):
+    """Empty the slow-request log and the recent profiles."""
+    require_admin(request)
+    slow_requests.clear()
+    return {"cleared": True}
+
+@app.get("/admin/profiles/{profile_id}")
+async def admin_profile(profile_id: str, request: Request):
+    """A recently profiled request, by the ``X-Profile-Id`` returned with its response."""
+    require_admin(request)
+    record = slow_requests.profile(profile_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile {profile_id!r} not found (only the last {profiling_settings.profiles_kept} are kept)"
+        )
+    return record
+
 @app.get("/test")
 async def test_endpoint():
     """Simple test endpoint that doesn't require models."""
@@ -168,17 +866,20 @@ async def test_endpoint():
             "/test",
             "/docs",
             "/predict (requires models)",
+            "/predict/batch (requires models)",
+            "/predict/bulk (requires models)",
             "/classify-exoplanet (requires models)"
         ]
     }
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(exoplanet_data: ExoplanetData):
+async def predict(exoplanet_data: ExoplanetData, variant: Optional[str] = None):
     """
     Predict exoplanet type and characteristics.
     
     Args:
         exoplanet_data: Exoplanet parameters (radius, temperature, etc.)
+        variant: Model variant (``full`` or ``lite``); defaults to the endpoint's configured one
         
     Returns:
         Prediction results including type and probabilities
@@ -195,11 +896,14 @@ async def predict(exoplanet_data: ExoplanetData):
                 status_code=400,
                 detail="At least one parameter must be provided"
             )
+        variant = choose_variant("predict", variant)
+        metrics.mark_validated()
         
         # Make prediction
-        result = predict_exoplanet(example)
+        result = await predict_single(example, variant)
         
-        return PredictionResponse(**result)
+        metrics.mark_handler_done()
+        return PredictionResponse(**result, model_variant=variant)
         
     except HTTPException:
         raise
@@ -209,13 +913,147 @@ async def predict(exoplanet_data: ExoplanetData):
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(batch: BatchPredictionRequest, variant: Optional[str] = None):
+    """
+    Predict exoplanet type and characteristics for many planets in one call.
+    
+    Args:
+        batch: Either ``planets`` (a list of parameter objects) or ``columns``
+            (a mapping of parameter name to an array of values)
+        variant: Model variant (``full`` or ``lite``); defaults to the endpoint's configured one
+        
+    Returns:
+        One result per input row, in input order. Invalid rows are reported
+        individually and do not fail the rest of the batch.
+    """
+    try:
+        rows = _batch_rows(batch)
+        variant = choose_variant("predict/batch", variant)
+        
+        if len(rows) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(rows)} rows (maximum is {MAX_BATCH_SIZE})"
+            )
+        
+        # Validate each row on its own so one bad planet doesn't sink the batch
+        results = [None] * len(rows)
+        valid_idx, valid_examples = [], []
+        for i, row in enumerate(rows):
+            try:
+                valid_examples.append(_validate_batch_row(row))
+                valid_idx.append(i)
+            except ValueError as e:
+                results[i] = BatchItemResult(index=i, ok=False, error=str(e))
+        metrics.mark_validated()
+        
+        # Make predictions for all valid rows at once
+        predictions = await predict_many(valid_examples, variant=variant)
+        for i, result in zip(valid_idx, predictions):
+            results[i] = BatchItemResult(index=i, ok=True, result=PredictionResponse(**result, model_variant=variant))
+        
+        succeeded = len(valid_idx)
+        metrics.mark_handler_done()
+        return BatchPredictionResponse(
+            count=len(rows),
+            succeeded=succeeded,
+            failed=len(rows) - succeeded,
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/predict/bulk")
+async def predict_bulk(request: Request, input: Optional[str] = None, output: str = "ndjson",
+                       variant: Optional[str] = None):
+    """
+    Score a whole catalogue and stream the results back as they are produced.
+    
+    The body is either the raw file (``text/csv`` or ``application/x-ndjson``)
+    or a multipart form with a ``file`` field. CSV uploads may contain the
+    NASA archive's ``#`` comment header. Rows are parsed and scored in chunks
+    of ``BULK_CHUNK_ROWS``, so memory use does not grow with the upload.
+    
+    Args:
+        request: The incoming request; its body is read incrementally
+        input: ``csv`` or ``ndjson`` (guessed from the content type or file name if omitted)
+        output: ``ndjson`` (default) or ``csv``
+        variant: Model variant (``full`` or ``lite``); defaults to the endpoint's configured one
+        
+    Returns:
+        One result per input row, in input order, with ``row``, the row's
+        ``kepid``/``kepoi_name`` when present, ``ok`` and either the
+        prediction or an ``error``
+    """
+    metrics.mark_validated()
+    if input is not None and input not in INPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown input format {input!r}; expected one of {INPUT_FORMATS}"
+        )
+    if output not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown output format {output!r}; expected one of {OUTPUT_FORMATS}"
+        )
+    variant = choose_variant("predict/bulk", variant)
+    
+    try:
+        bundle = current_bundle(variant)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error loading models: {str(e)}"
+        )
+    
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        # Starlette spools large uploads to a temporary file
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            await form.close()
+            raise HTTPException(
+                status_code=400,
+                detail="Multipart uploads must contain a 'file' field"
+            )
+        input_format = input or guess_input_format(upload.content_type or "", upload.filename or "")
+        
+        async def chunks():
+            try:
+                while True:
+                    chunk = await upload.read(BULK_READ_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                await form.close()
+    else:
+        input_format = input or guess_input_format(content_type)
+        chunks = request.stream
+    
+    writer = make_writer(output)
+    return BodyStreamingResponse(
+        _bulk_results(chunks(), input_format, writer, bundle),
+        media_type=writer.media_type,
+        headers={"X-Model-Variant": variant}
+    )
+
 @app.post("/classify-exoplanet")
-async def classify_exoplanet(exoplanet_data: ExoplanetData):
+async def classify_exoplanet(exoplanet_data: ExoplanetData, variant: Optional[str] = None):
     """
     Alternative endpoint for exoplanet classification (compatible with frontend).
     
     Args:
         exoplanet_data: Exoplanet parameters
+        variant: Model variant (``full`` or ``lite``); defaults to the endpoint's configured one
         
     Returns:
         Classification results with similarity score
@@ -232,9 +1070,11 @@ async def classify_exoplanet(exoplanet_data: ExoplanetData):
                 status_code=400,
                 detail="At least one parameter must be provided"
             )
+        variant = choose_variant("classify-exoplanet", variant)
+        metrics.mark_validated()
         
         # Make prediction
-        result = predict_exoplanet(example)
+        result = await predict_single(example, variant)
         
         # Format response for frontend compatibility
         classifications = []
@@ -245,9 +1085,12 @@ async def classify_exoplanet(exoplanet_data: ExoplanetData):
                 "description": f"Exoplanet type: {type_name}"
             })
         
+        metrics.mark_handler_done()
         return {
             "classifications": classifications,
-            "similarity": result.get("is_exoplanet_proba", 0.0)
+            "similarity": result.get("is_exoplanet_proba", 0.0),
+            "model_version": result.get("model_version"),
+            "model_variant": variant
         }
         
     except HTTPException:
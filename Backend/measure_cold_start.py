@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compare cold starts of the serverless handlers in ``api/`` per runtime.
+
+Every run is a fresh interpreter that imports ``api/predict.py`` (which
+loads the models at import) and serves one request over HTTP, like a cold
+serverless instance:
+
+- import: importing the handler module, including the model load
+- first request: the first POST /predict round trip on that instance
+- warm request: the second one
+- heavy modules: which of pandas, joblib, scikit-learn and SciPy got imported
+- package size: installed size of the libraries the runtime needs plus its
+  model artifacts
+- deployed size: what the serverless build actually ships, i.e. the
+  libraries ``api/requirements.txt`` installs (with their dependencies) plus
+  every file under ``api/``
+
+``joblib`` is the old path (sklearn pipelines through pandas); ``compiled``
+loads the ``.npz`` artifacts written by ``export_compiled.py`` with NumPy
+only.
+
+Usage:
+    python measure_cold_start.py                 # 5 cold starts per runtime
+    python measure_cold_start.py --runs 10 --json cold_start.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+DEPLOY_REQUIREMENTS = os.path.join(API_DIR, "requirements.txt")
+
+EXAMPLE = {"koi_prad": 1.0, "koi_teq": 300, "koi_period": 365.0, "koi_steff": 5800.0, "koi_srad": 1.0}
+
+# Distributions each runtime has to ship (with their dependencies), and its model artifacts
+RUNTIME_PACKAGES = {
+    "joblib": ("numpy", "pandas", "scikit-learn", "scipy", "joblib", "threadpoolctl", "python-dateutil", "pytz",
+               "tzdata", "six"),
+    "compiled": ("numpy",),
+}
+RUNTIME_ARTIFACTS = {"joblib": "*.joblib", "compiled": "*.npz"}
+HEAVY_MODULES = ("pandas", "joblib", "sklearn", "scipy")
+
+
+def worker():
+    """Child process: import the handler, serve two requests, print the timings as JSON."""
+    import http.client
+    import importlib.util
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location("api_predict", os.path.join(API_DIR, "predict.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), module.handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    body = json.dumps(EXAMPLE)
+    latencies = []
+    try:
+        for _ in range(2):
+            t0 = time.perf_counter()
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            conn.request("POST", "/api/predict", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+            conn.close()
+            latencies.append(time.perf_counter() - t0)
+            if response.status != 200:
+                raise RuntimeError(f"predict returned {response.status}: {payload}")
+    finally:
+        server.shutdown()
+
+    print(json.dumps({
+        "runtime": module.get_predictor(module.MODEL_DIR).runtime,
+        "import_ms": (imported - start) * 1000,
+        "first_request_ms": latencies[0] * 1000,
+        "warm_request_ms": latencies[1] * 1000,
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+        "type": payload["type"],
+    }))
+
+
+def package_size_mib(runtime: str) -> dict:
+    """Installed size of the runtime's libraries and its artifacts in ``api/modelos``."""
+    libraries = sum(_distribution_size(name) for name in RUNTIME_PACKAGES[runtime])
+    artifacts = sum(os.path.getsize(p) for p in glob.glob(os.path.join(API_DIR, "modelos", RUNTIME_ARTIFACTS[runtime])))
+    return {"libraries_mib": libraries / 2**20, "artifacts_mib": artifacts / 2**20}
+
+
+def _distribution_size(name: str) -> int:
+    from importlib.metadata import PackageNotFoundError, distribution
+
+    try:
+        return sum(f.size or 0 for f in distribution(name).files or [])
+    except PackageNotFoundError:
+        return 0
+
+
+def deployed_packages(path: str = DEPLOY_REQUIREMENTS) -> list:
+    """Distributions the serverless build installs: the requirements in ``path`` and their dependencies."""
+    from importlib.metadata import PackageNotFoundError, distribution
+
+    with open(path) as fh:
+        pending = [re.split(r"[\s<>=!~;\[]", line.strip(), maxsplit=1)[0] for line in fh
+                   if line.strip() and not line.lstrip().startswith("#")]
+    seen = []
+    while pending:
+        name = pending.pop().lower().replace("_", "-")
+        if name in seen:
+            continue
+        seen.append(name)
+        try:
+            requires = distribution(name).requires or []
+        except PackageNotFoundError:
+            continue
+        pending += [re.split(r"[\s<>=!~;\[(]", r, maxsplit=1)[0] for r in requires if "extra ==" not in r]
+    return sorted(seen)
+
+
+def deployed_size_mib() -> dict:
+    """Size of what the serverless build ships: installed requirements plus the ``api/`` files."""
+    packages = deployed_packages()
+    files = 0
+    for root, dirs, names in os.walk(API_DIR):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        files += sum(os.path.getsize(os.path.join(root, n)) for n in names)
+    return {"packages": packages, "libraries_mib": sum(_distribution_size(p) for p in packages) / 2**20,
+            "files_mib": files / 2**20}
+
+
+def measure(runtime: str, runs: int) -> dict:
+    env = dict(os.environ, API_RUNTIME=runtime, PYTHONWARNINGS="ignore", PYTHONDONTWRITEBYTECODE="1")
+    reports = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker"],
+                             capture_output=True, text=True, env=env, check=True)
+        reports.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    if any(r["runtime"] != runtime for r in reports):
+        raise RuntimeError(f"Handlers did not use the {runtime} runtime (are the .npz artifacts exported?)")
+    result = {
+        "runtime": runtime,
+        "runs": runs,
+        "heavy_modules": reports[0]["heavy_modules"],
+        "type": reports[0]["type"],
+        **package_size_mib(runtime),
+    }
+    for key in ("import_ms", "first_request_ms", "warm_request_ms"):
+        result[key] = statistics.median(r[key] for r in reports)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold starts of the api/ handlers per runtime")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per runtime (medians are reported)")
+    parser.add_argument("--runtimes", nargs="+", default=["joblib", "compiled"], choices=sorted(RUNTIME_PACKAGES))
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker()
+        return
+
+    print("🧊 Cold start of api/predict.py (median of fresh interpreters)")
+    print("=" * 96)
+    print(f"{'runtime':>9} {'import':>9} {'1st req':>9} {'warm req':>9} {'libraries':>10} {'artifacts':>10}  "
+          f"heavy modules")
+    results = []
+    for runtime in args.runtimes:
+        r = measure(runtime, args.runs)
+        results.append(r)
+        print(f"{runtime:>9} {r['import_ms']:>7.1f}ms {r['first_request_ms']:>7.2f}ms {r['warm_request_ms']:>7.2f}ms "
+              f"{r['libraries_mib']:>8.1f}Mi {r['artifacts_mib']:>8.2f}Mi  {', '.join(r['heavy_modules']) or '-'}")
+    if len({r["type"] for r in results}) > 1:
+        print("⚠️  The runtimes predicted different types for the example")
+
+    deployed = deployed_size_mib()
+    print(f"\n📦 Deployed bundle: {deployed['libraries_mib']:.1f} MiB of libraries "
+          f"({', '.join(deployed['packages'])}, from api/requirements.txt) + {deployed['files_mib']:.2f} MiB in api/")
+    for r in results:
+        missing = [p for p in RUNTIME_PACKAGES[r["runtime"]] if p not in deployed["packages"]]
+        if missing:
+            print(f"⚠️  The {r['runtime']} runtime needs libraries api/requirements.txt does not install "
+                  f"({', '.join(missing[:3])}{', ...' if len(missing) > 3 else ''})")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"runtimes": results, "deployed": deployed}, fh, indent=2)
+        print(f"📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Compare worker memory when every worker loads the models itself and when the
+workers are forked from a parent that loaded them once (``SERVER_MODE=prefork``).
+
+Starts N co-located workers in each mode. Every worker imports the inference
+stack, has the models loaded and serves one prediction. The script then reads
+each worker's memory while all of them are alive:
+
+- ``spawn``: fresh interpreters, each loading its own copy of the models (like
+  ``uvicorn --workers`` or ``INFERENCE_EXECUTOR=process``)
+- ``fork``: the parent loads the models, runs ``gc.freeze()`` and forks the
+  workers, which share its pages copy-on-write (like ``prefork.py``)
+
+Reported per mode:
+
+- RSS: resident pages, shared pages counted in full by every worker
+- PSS: shared pages split between the processes sharing them; the sum over
+  all workers (and the fork parent) is the physical memory actually used
+- USS: pages private to a worker
+
+Usage:
+    python measure_memory.py                 # 1, 4 and 8 workers
+    python measure_memory.py --workers 1 2 16
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+EXAMPLE = {"koi_prad": 1.0, "koi_teq": 300, "koi_period": 365.0, "koi_steff": 5800.0, "koi_srad": 1.0}
+MODES = ("spawn", "fork")
+
+
+def memory_kib(pid="self") -> dict:
+    """RSS/PSS/USS of a process (default: this one) in KiB (Linux ``smaps_rollup``)."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(":"):
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _load_and_predict(model_dir: str):
+    from inference import get_engine
+
+    engine = get_engine(model_dir)
+    engine.predict_one(EXAMPLE)
+    engine.predict_batch([EXAMPLE] * 256)
+
+
+def worker(model_dir: str):
+    """Child process of ``spawn``: load the models, predict once, report memory on request."""
+    _load_and_predict(model_dir)
+    print("ready", flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memory_kib()), flush=True)
+    sys.stdin.readline()
+
+
+def _summary(mode: str, reports, parent=None) -> dict:
+    n_workers = len(reports)
+    return {
+        "workers": n_workers,
+        "mode": mode,
+        "rss_per_worker_mib": sum(r["rss"] for r in reports) / n_workers / 1024,
+        "uss_per_worker_mib": sum(r["uss"] for r in reports) / n_workers / 1024,
+        "total_pss_mib": (sum(r["pss"] for r in reports) + (parent["pss"] if parent else 0)) / 1024,
+    }
+
+
+def run_spawn(n_workers: int, model_dir: str) -> dict:
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    procs = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--model-dir", model_dir],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env,
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        for p in procs:
+            if p.stdout.readline().strip() != "ready":
+                raise RuntimeError("worker failed to start")
+        reports = []
+        for p in procs:
+            p.stdin.write("measure\n")
+            p.stdin.flush()
+            reports.append(json.loads(p.stdout.readline()))
+    finally:
+        for p in procs:
+            try:
+                p.stdin.close()
+            except OSError:
+                pass
+            p.wait()
+    return _summary("spawn", reports)
+
+
+def run_fork(n_workers: int, model_dir: str) -> dict:
+    """Load the models in a fresh parent, fork the workers from it and measure them all."""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--fork-parent", str(n_workers),
+                          "--model-dir", model_dir],
+                         capture_output=True, text=True, check=True, env=dict(os.environ, PYTHONWARNINGS="ignore"))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def fork_parent(n_workers: int, model_dir: str):
+    """Parent of ``fork``: load once, fork the workers, print the summary as JSON."""
+    _load_and_predict(model_dir)
+    gc.collect()
+    gc.freeze()
+    pids, ready = [], []
+    for _ in range(n_workers):
+        r, w = os.pipe()
+        go_r, go_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            os.close(go_w)
+            _load_and_predict(model_dir)  # already loaded: serves from the shared models
+            os.write(w, b"x")
+            os.read(go_r, 1)  # stay alive until the parent has measured every worker
+            os._exit(0)
+        os.close(w)
+        os.close(go_r)
+        pids.append(pid)
+        ready.append((r, go_w))
+    try:
+        for r, _ in ready:
+            os.read(r, 1)
+        reports = [memory_kib(pid) for pid in pids]
+        summary = _summary("fork", reports, memory_kib())
+    finally:
+        for r, go_w in ready:
+            os.write(go_w, b"x")
+            os.close(r)
+            os.close(go_w)
+        for pid in pids:
+            os.waitpid(pid, 0)
+    print(json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker memory: separate model loads vs forked workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--model-dir", default="modelos")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--fork-parent", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.model_dir)
+        return
+    if args.fork_parent:
+        fork_parent(args.fork_parent, args.model_dir)
+        return
+
+    print("🧠 Worker memory: models loaded per worker vs forked from a preloaded parent")
+    print("=" * 66)
+    print(f"{'workers':>7} {'mode':>6} {'RSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for n in args.workers:
+        for mode in MODES:
+            r = run_spawn(n, args.model_dir) if mode == "spawn" else run_fork(n, args.model_dir)
+            print(f"{n:>7} {mode:>6} {r['rss_per_worker_mib']:>9.1f}Mi {r['uss_per_worker_mib']:>9.1f}Mi "
+                  f"{r['total_pss_mib']:>8.1f}Mi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Minimal Prometheus metrics for the API (text exposition format 0.0.4).
+
+Counters, gauges and histograms keep their samples in plain dicts keyed by
+label values, behind one lock per metric, so recording costs a dict lookup
+and a few additions. Values that already live elsewhere (cache counters,
+model version, queue depth) are read by collectors when ``/metrics`` is
+scraped instead of being mirrored on every request.
+
+``MetricsMiddleware`` is a pure ASGI middleware: it counts requests and
+in-flight requests per endpoint and times them. It also tracks a few marks
+in each request:
+
+- from the request's arrival to ``mark_validated`` (body read, JSON
+  parsing and validation)
+- from ``mark_handler_done`` to the response starting (response model and
+  JSON encoding)
+
+These two are recorded as the ``validation`` and ``serialization`` stages.
+The marks also collect the request's own stage breakdown (``marks["stages"]``),
+which ``profiling.py`` reads.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond single predictions up to slow bulk requests
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(v) for v in labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_sample(labels, value))
+        return lines
+
+    def _render_sample(self, labels, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts plus the overflow bucket, sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _render_sample(self, labels, value) -> List[str]:
+        with self._lock:
+            counts, total = list(value[0]), value[1]
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_str = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+        lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+# A collector returns (name, kind, help, [(label dict, value), ...]) tuples at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class Registry:
+    """Holds the metrics and scrape-time collectors of one process."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                # A broken collector must not take /metrics down with it
+                lines.append(f"# collector error: {_escape(str(e))}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_str = _format_labels(list(labels), list(labels.values()))
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by endpoint, method and status code", ("endpoint", "method", "status"))
+REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte of the response",
+    ("endpoint", "method"))
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled", ("endpoint",))
+STAGE_DURATION = REGISTRY.histogram(
+    "prediction_stage_duration_seconds",
+    "Time per prediction stage: validation, frame_build, preprocessing, type_inference, binary_inference, "
+    "postprocessing, serialization",
+    ("stage",))
+INFERENCE_ROWS = REGISTRY.counter("inference_rows_total", "Rows scored by the models", ())
+PREDICTION_ERRORS = REGISTRY.counter(
+    "prediction_errors_total", "Predictions that failed with an unexpected error (HTTP 500)", ("source",))
+
+# Marks of the request being handled: {"start": t, "handler_done": t, ..., "stages": {stage: seconds}}
+_request_marks: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("request_marks", default=None)
+
+
+def begin_request() -> Tuple[Dict, Optional[contextvars.Token]]:
+    """
+    Marks of the current request, created here unless an outer middleware already did.
+
+    Returns:
+        ``(marks, token)``; pass the token to ``end_request`` (``None`` if nothing was created)
+    """
+    marks = _request_marks.get()
+    if marks is not None:
+        return marks, None
+    marks = {"start": time.perf_counter(), "stages": {}}
+    return marks, _request_marks.set(marks)
+
+
+def end_request(token: Optional[contextvars.Token]):
+    if token is not None:
+        _request_marks.reset(token)
+
+
+def current_marks() -> Optional[Dict]:
+    return _request_marks.get()
+
+
+def _record_stage(marks: Optional[Dict], stage: str, seconds: float):
+    STAGE_DURATION.observe(seconds, stage)
+    if marks is not None:
+        stages = marks["stages"]
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def add_stage(stage: str, seconds: float):
+    """Record time spent in ``stage`` by the current request (e.g. ``model_load``)."""
+    _record_stage(_request_marks.get(), stage, seconds)
+
+
+def observe_stages(timings: Dict[str, float], rows: int = 0):
+    """Record the stage timings returned by ``InferenceEngine.predict_batch``."""
+    marks = _request_marks.get()
+    for stage, seconds in timings.items():
+        _record_stage(marks, stage, seconds)
+    if rows:
+        INFERENCE_ROWS.inc(amount=rows)
+
+
+def mark_validated():
+    """Record the ``validation`` stage: request arrival until the input has been validated."""
+    marks = _request_marks.get()
+    if marks is not None and "validated" not in marks:
+        now = time.perf_counter()
+        marks["validated"] = now
+        _record_stage(marks, "validation", now - marks["start"])
+
+
+def mark_response_started(marks: Dict):
+    """Record the ``serialization`` stage once the response starts (idempotent)."""
+    if "response_start" in marks:
+        return
+    now = time.perf_counter()
+    marks["response_start"] = now
+    done = marks.get("handler_done")
+    if done is not None:
+        _record_stage(marks, "serialization", now - done)
+
+
+def mark_handler_done():
+    """The handler returned its result; the rest until the response starts is ``serialization``."""
+    marks = _request_marks.get()
+    if marks is not None:
+        marks["handler_done"] = time.perf_counter()
+
+
+class MetricsMiddleware:
+    """Counts and times HTTP requests per route template (not per raw path)."""
+
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        marks, token = begin_request()
+        status = ["500"]
+        in_flight_label = scope["path"] if scope["path"] in _known_paths(scope) else "other"
+        IN_FLIGHT.inc(in_flight_label)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+                mark_response_started(marks)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token)
+            IN_FLIGHT.dec(in_flight_label)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "other"
+            method = scope.get("method", "")
+            REQUESTS.inc(endpoint, method, status[0])
+            REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, method)
+
+
+def _known_paths(scope) -> frozenset:
+    """Static route paths of the app (used before routing has picked the route)."""
+    app = scope.get("app")
+    paths = getattr(app, "_metrics_paths", None)
+    if paths is None and app is not None:
+        paths = frozenset(getattr(r, "path", "") for r in getattr(app, "routes", []))
+        app._metrics_paths = paths
+    return paths or frozenset()
@@ -0,0 +1,269 @@
+"""
+Process-wide registry for the trained models.
+
+Every backend entry point (the FastAPI app and the helper scripts) goes
+through this module so the joblib artifacts are deserialized once per
+process instead of once per request. The serverless handlers in ``api/``
+have their own loader (``api/_predictor.py``).
+
+If the directory holds a ``CURRENT`` pointer (written by ``model_store.py``),
+the artifacts are read from the version it names under ``versions/``;
+otherwise from the directory itself.
+
+A running process picks up new artifacts with ``ModelRegistry.reload``: the
+new bundle is loaded and validated next to the current one and then swapped
+in with a single reference assignment. Callers that already hold the old
+bundle keep using it until they are done, so nobody sees a mix of the two.
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+import joblib
+
+TYPE_MODEL_FILE = "clf_exoplanet_type.joblib"
+BINARY_MODEL_FILE = "clf_is_exoplanet.joblib"
+METADATA_FILE = "metadata.joblib"
+
+# Versioned layout: <model_dir>/versions/<version>/ plus a CURRENT pointer file
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+
+# Model variants: "full" lives in <model_dir>/, the others in <model_dir>/<variant>/ (same layout)
+MODEL_VARIANTS = ("full", "lite")
+
+
+def _freeze(value):
+    """Recursively convert lists/dicts into tuples/read-only mappings."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True, eq=False)
+class ModelBundle:
+    """Immutable handle on one loaded set of models."""
+    clf_bin: Optional[object]
+    clf_type: object
+    meta: Mapping
+    model_dir: str
+    version: str
+    load_seconds: float
+    artifact_dir: str = ""
+
+    @property
+    def cols(self) -> Tuple[str, ...]:
+        """Input columns expected by the pipelines, in training order."""
+        return tuple(self.meta["num_cols"]) + tuple(self.meta["cat_cols"])
+
+    def as_tuple(self) -> Tuple[Optional[object], object, Mapping]:
+        """Legacy ``(clf_bin, clf_type, meta)`` view used by older callers."""
+        return self.clf_bin, self.clf_type, self.meta
+
+
+def _artifact_version(paths) -> str:
+    """Short content hash identifying a set of artifact files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def variant_dir(model_dir: str, variant: str) -> str:
+    """Model directory of ``variant`` (``full`` is ``model_dir`` itself)."""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant!r}; expected one of {MODEL_VARIANTS}")
+    return model_dir if variant == "full" else os.path.join(model_dir, variant)
+
+
+def current_version(model_dir: str) -> Optional[str]:
+    """Version named by ``model_dir/CURRENT``, or ``None`` without a pointer."""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_artifact_dir(model_dir: str) -> str:
+    """Directory holding the artifacts currently in use for ``model_dir``."""
+    version = current_version(model_dir)
+    if version is None:
+        return model_dir
+    path = os.path.join(model_dir, VERSIONS_DIR, version)
+    if not os.path.isdir(path):
+        return model_dir
+    # Artifacts written straight into model_dir after the last switch win
+    switched_at = os.path.getmtime(os.path.join(model_dir, CURRENT_FILE))
+    if any(os.path.getmtime(p) > switched_at for p in artifact_paths(model_dir)):
+        return model_dir
+    return path
+
+
+def artifact_paths(artifact_dir: str):
+    """Existing artifact files in ``artifact_dir``, in the order hashed for the version."""
+    names = (BINARY_MODEL_FILE, TYPE_MODEL_FILE, METADATA_FILE)
+    return [p for p in (os.path.join(artifact_dir, n) for n in names) if os.path.exists(p)]
+
+
+def artifact_fingerprint(model_dir: str) -> Optional[Tuple]:
+    """
+    Cheap signature of the artifacts ``load_bundle`` would read (paths, mtimes, sizes).
+
+    Returns ``None`` while the files are being replaced.
+    """
+    try:
+        artifact_dir = resolve_artifact_dir(model_dir)
+        stats = []
+        for path in artifact_paths(artifact_dir):
+            st = os.stat(path)
+            stats.append((path, st.st_mtime_ns, st.st_size))
+    except OSError:
+        return None
+    return artifact_dir, tuple(stats)
+
+
+def load_bundle(model_dir: str) -> ModelBundle:
+    """
+    Read the artifacts in ``model_dir`` from disk into a new bundle.
+
+    Args:
+        model_dir: Directory containing the model files (or a ``CURRENT`` pointer)
+    """
+    start = time.perf_counter()
+    artifact_dir = resolve_artifact_dir(model_dir)
+
+    # Binary classifier is optional
+    p_bin = os.path.join(artifact_dir, BINARY_MODEL_FILE)
+    p_type = os.path.join(artifact_dir, TYPE_MODEL_FILE)
+    p_meta = os.path.join(artifact_dir, METADATA_FILE)
+
+    clf_bin = joblib.load(p_bin) if os.path.exists(p_bin) else None
+    clf_type = joblib.load(p_type)
+    meta = joblib.load(p_meta)
+
+    return ModelBundle(
+        clf_bin=clf_bin,
+        clf_type=clf_type,
+        meta=_freeze(meta),
+        model_dir=model_dir,
+        version=_artifact_version(artifact_paths(artifact_dir)),
+        load_seconds=time.perf_counter() - start,
+        artifact_dir=artifact_dir,
+    )
+
+
+class ModelRegistry:
+    """
+    Loads the models in one directory exactly once per process.
+
+    Concurrent callers that arrive before the first load has finished block
+    on a lock and then share the single bundle instead of each reading the
+    files themselves. ``reload`` replaces the bundle without blocking them.
+    """
+
+    def __init__(self, model_dir: str):
+        self.model_dir = model_dir
+        self._bundle: Optional[ModelBundle] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+        # Reload bookkeeping
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_error: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._bundle is not None
+
+    @property
+    def fingerprint(self) -> Optional[Tuple]:
+        """``artifact_fingerprint`` of the files last loaded (successfully or not)."""
+        return self._fingerprint
+
+    def _load(self) -> ModelBundle:
+        # Taken first: files replaced during the load show up as a change next time
+        self._fingerprint = artifact_fingerprint(self.model_dir)
+        return load_bundle(self.model_dir)
+
+    def get(self) -> ModelBundle:
+        """Return the loaded bundle, loading it on first use."""
+        bundle = self._bundle
+        if bundle is not None:
+            return bundle
+        with self._lock:
+            if self._bundle is None:
+                self._bundle = self._load()
+                self.loaded_at = time.time()
+            return self._bundle
+
+    def preload(self) -> ModelBundle:
+        """Eagerly load the models (e.g. at import or application startup)."""
+        return self.get()
+
+    def changed(self) -> bool:
+        """True when the artifacts on disk differ from the ones last loaded."""
+        return artifact_fingerprint(self.model_dir) != self._fingerprint
+
+    def reload(self, validate: Optional[Callable[[ModelBundle], None]] = None) -> ModelBundle:
+        """
+        Load the artifacts again and swap them in if they are a new version.
+
+        The current bundle keeps serving while the new one is loaded and
+        validated; if either step fails it stays in place.
+
+        Args:
+            validate: Called with the new bundle before the swap; raises to reject it
+
+        Returns:
+            The bundle in use afterwards (the current one if nothing changed)
+        """
+        with self._reload_lock:
+            try:
+                bundle = self._load()
+                current = self._bundle
+                if current is not None and bundle.version == current.version:
+                    return current
+                if validate is not None:
+                    validate(bundle)
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_reload_error = str(e)
+                raise
+            # A single assignment: readers see either the old or the new bundle
+            self._bundle = bundle
+            self.loaded_at = time.time()
+            self.reloads += 1
+            self.last_reload_error = None
+            return bundle
+
+
+_registries: Dict[str, ModelRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(model_dir: str = "modelos") -> ModelRegistry:
+    """Return the shared registry for ``model_dir``."""
+    key = os.path.abspath(model_dir)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, ModelRegistry(key))
+    return registry
+
+
+def get_models(model_dir: str = "modelos") -> ModelBundle:
+    """Shortcut for ``get_registry(model_dir).get()``."""
+    return get_registry(model_dir).get()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for trained model versions.
+
+Every training run is identified by a key hashed from its inputs: the
+dataset's contents, the training code, the training configuration and the
+library versions. Its artifacts and a ``manifest.json`` (inputs, artifact
+hashes, metrics, timings) are kept in ``modelos/versions/<key>/`` and never
+modified afterwards. ``modelos/CURRENT`` names the version in use:
+
+- retraining with inputs that already have a version is a no-op
+- rollback only rewrites the ``CURRENT`` pointer
+
+The model registry follows ``CURRENT``. The top-level ``modelos/*.joblib``
+files (and the ``.npz`` exports and ``manifest.json``) are copies of the
+current version for tools that read them directly. Copies rather than hard
+links, so that a script dumping new models over them cannot modify a stored
+version; artifacts written there after the last switch take precedence over
+``CURRENT``.
+
+Usage:
+    python model_store.py list
+    python model_store.py current
+    python model_store.py use <version>      # roll back / forward
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from compiled_model import COMPILED_SUFFIX, FORMAT_VERSION
+from model_registry import (
+    BINARY_MODEL_FILE, CURRENT_FILE, METADATA_FILE, TYPE_MODEL_FILE, VERSIONS_DIR, _artifact_version,
+    artifact_paths, current_version,
+)
+
+MANIFEST_FILE = "manifest.json"
+ARTIFACT_FILES = (TYPE_MODEL_FILE, BINARY_MODEL_FILE, METADATA_FILE)
+
+
+def compiled_name(artifact_file: str) -> str:
+    """``clf_exoplanet_type.joblib`` -> ``clf_exoplanet_type.npz``."""
+    return os.path.splitext(artifact_file)[0] + COMPILED_SUFFIX
+
+
+# NumPy-only exports of the pipelines (see compiled_model.py)
+COMPILED_FILES = (compiled_name(TYPE_MODEL_FILE), compiled_name(BINARY_MODEL_FILE))
+
+# Libraries whose versions change what a training run produces
+TRACKED_LIBRARIES = ("numpy", "pandas", "scikit-learn", "joblib")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def library_versions() -> Dict[str, str]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = {"python": platform.python_version()}
+    for name in TRACKED_LIBRARIES:
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = "missing"
+    return versions
+
+
+def code_hash(paths: Iterable[str]) -> str:
+    """Hash of the training source files (by name and contents)."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode())
+        digest.update(_sha256_file(path).encode())
+    return digest.hexdigest()
+
+
+def training_inputs(dataset_path: str, code_paths: Iterable[str], config: Mapping) -> Dict:
+    """Everything that determines a training run's output."""
+    return {
+        "dataset": {"path": os.path.basename(dataset_path), "sha256": _sha256_file(dataset_path)},
+        "code_sha256": code_hash(code_paths),
+        "config": dict(config),
+        "libraries": library_versions(),
+    }
+
+
+def version_key(inputs: Mapping) -> str:
+    """Content address of a training run: a short hash of its inputs."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def version_dir(model_dir: str, version: str) -> str:
+    return os.path.join(model_dir, VERSIONS_DIR, version)
+
+
+def read_manifest(path: str) -> Optional[Dict]:
+    """Manifest of a version directory (or of the top-level mirror), if any."""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as fh:
+        return json.load(fh)
+
+
+def find_version(model_dir: str, version: str) -> Optional[Dict]:
+    return read_manifest(version_dir(model_dir, version))
+
+
+def list_versions(model_dir: str) -> List[Dict]:
+    """Manifests of all stored versions, oldest first."""
+    root = os.path.join(model_dir, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    manifests = [m for m in (read_manifest(os.path.join(root, name)) for name in os.listdir(root)) if m]
+    return sorted(manifests, key=lambda m: m.get("created_at", ""))
+
+
+def save_version(model_dir: str, version: str, artifacts: Mapping[str, object], manifest: Mapping,
+                 compiled: Optional[Mapping[str, object]] = None) -> Dict:
+    """
+    Write a new version directory atomically and return its manifest.
+
+    Args:
+        model_dir: Model directory (e.g. ``modelos``)
+        version: Version key from ``version_key``
+        artifacts: ``{file name: object}`` saved with ``joblib.dump``
+        manifest: Inputs, metrics, timings; file hashes and the registry
+            version are added here
+        compiled: ``{file name: CompiledPipeline}`` saved as ``.npz`` exports
+            of the pipelines
+    """
+    import joblib
+
+    root = os.path.join(model_dir, VERSIONS_DIR)
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    try:
+        os.chmod(tmp, 0o755)  # mkdtemp creates it private
+        paths = []
+        for name, obj in artifacts.items():
+            path = os.path.join(tmp, name)
+            joblib.dump(obj, path)
+            paths.append(path)
+        # Same identifier the model registry reports for these files
+        artifact_version = _artifact_version(artifact_paths(tmp))
+        for name, pipeline in (compiled or {}).items():
+            path = os.path.join(tmp, name)
+            pipeline.save(path, source={"version": version, "artifact_version": artifact_version})
+            paths.append(path)
+        manifest = {
+            "version": version,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            **manifest,
+            "artifacts": {os.path.basename(p): _sha256_file(p) for p in paths},
+            "artifact_version": artifact_version,
+        }
+        if compiled:
+            manifest["compiled_format_version"] = FORMAT_VERSION
+        with open(os.path.join(tmp, MANIFEST_FILE), "w") as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        final = version_dir(model_dir, version)
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _replace_file(src: str, dst: str):
+    """Atomically replace ``dst`` with a copy of ``src``."""
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def set_current(model_dir: str, version: str):
+    """
+    Point ``CURRENT`` at an existing version and refresh the top-level mirror.
+
+    Raises:
+        FileNotFoundError: If the version does not exist
+    """
+    src_dir = version_dir(model_dir, version)
+    if read_manifest(src_dir) is None:
+        raise FileNotFoundError(f"Model version {version!r} not found in {os.path.join(model_dir, VERSIONS_DIR)}")
+
+    for name in ARTIFACT_FILES + COMPILED_FILES + (MANIFEST_FILE,):
+        src, dst = os.path.join(src_dir, name), os.path.join(model_dir, name)
+        if os.path.exists(src):
+            _replace_file(src, dst)
+        elif os.path.exists(dst):
+            # e.g. a version trained without the optional binary classifier or compiled exports
+            os.remove(dst)
+
+    # The pointer is written last, so it is newer than the mirror it describes
+    pointer_tmp = os.path.join(model_dir, f".{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w") as fh:
+        fh.write(version + "\n")
+    os.replace(pointer_tmp, os.path.join(model_dir, CURRENT_FILE))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Inspect and switch stored model versions")
+    parser.add_argument("--model-dir", default="modelos")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List stored versions")
+    sub.add_parser("current", help="Show the version in use")
+    use = sub.add_parser("use", help="Switch to a stored version (rollback)")
+    use.add_argument("version")
+    args = parser.parse_args(argv)
+
+    current = current_version(args.model_dir)
+    if args.command == "list":
+        for manifest in list_versions(args.model_dir):
+            marker = "*" if manifest["version"] == current else " "
+            metrics = manifest.get("metrics", {})
+            accuracy = metrics.get("type", {}).get("accuracy")
+            print(f"{marker} {manifest['version']}  {manifest.get('created_at', '')}  "
+                  f"dataset {manifest['inputs']['dataset']['sha256'][:12]}  "
+                  f"type accuracy {accuracy if accuracy is not None else '-'}")
+    elif args.command == "current":
+        print(current or "(no CURRENT pointer; using the top-level artifacts)")
+    else:
+        try:
+            set_current(args.model_dir, args.version)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ CURRENT -> {args.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Bounded LRU/TTL cache for single-planet predictions.
+
+The game sends slider values plus a handful of constants, so the same input
+vectors come back over and over. Entries are keyed by the model's input
+columns (``meta["num_cols"] + meta["cat_cols"]``), optionally after rounding
+selected features to a step size, and tagged with the model version: the
+first lookup made with a different version empties the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+
+def parse_quantization(spec: str) -> Dict[str, float]:
+    """Parse ``"koi_prad=0.01,koi_teq=1"`` into ``{"koi_prad": 0.01, "koi_teq": 1.0}``."""
+    steps = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, step = part.partition("=")
+        step = float(step)
+        if step <= 0:
+            raise ValueError(f"Quantization step for {name!r} must be positive")
+        steps[name.strip()] = step
+    return steps
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with optional expiry and per-feature quantization.
+
+    Args:
+        max_entries: Maximum number of cached predictions
+        ttl: Seconds an entry stays valid (``None`` keeps entries until evicted)
+        quantize: Step size per feature; values are rounded to the nearest
+            multiple before building the key and before predicting, so every
+            input in a cell gets the prediction for the cell's representative
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: Optional[float] = None,
+                 quantize: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.quantize = dict(quantize or {})
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def prepare(self, example: Dict) -> Dict:
+        """Return the example with quantized features (unchanged if no quantization)."""
+        if not self.quantize:
+            return example
+        out = dict(example)
+        for name, step in self.quantize.items():
+            value = out.get(name)
+            if value is not None:
+                out[name] = round(float(value) / step) * step
+        return out
+
+    @staticmethod
+    def key(example: Dict, columns: Iterable[str]) -> Tuple:
+        """Cache key: the model's input vector, missing features as ``None``."""
+        return tuple(example.get(c) for c in columns)
+
+    def _check_version(self, version: str):
+        # Caller holds the lock
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Tuple, version: str) -> Optional[Dict]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, version: str, value: Dict):
+        with self._lock:
+            self._check_version(version)
+            expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "quantize": self.quantize,
+                "model_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
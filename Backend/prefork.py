@@ -0,0 +1,284 @@
+"""
+Pre-fork worker manager for production serving.
+
+The parent process imports the app and loads the models once, then forks
+the uvicorn workers. The workers share the parent's pages copy-on-write:
+model arrays, compiled predictors and imported libraries are in memory
+once, not once per worker. ``gc.freeze()`` before each fork keeps the
+garbage collector from touching (and so copying) those pages.
+
+All workers accept connections from one listening socket opened by the
+parent. The parent only supervises:
+
+- a worker that exits (a crash, or recycling after ``max_requests``) is
+  replaced by a fresh fork; ``before_fork`` runs first, so a replacement
+  starts on the models now on disk
+- ``SIGHUP`` recycles every worker one at a time: the replacement is
+  started and ready before the old worker is asked to stop
+- ``SIGTERM``/``SIGINT`` stop the workers gracefully: each finishes its
+  in-flight requests (up to ``graceful_timeout`` seconds) and exits
+
+Workers that die before they are ready ``MAX_BOOT_FAILURES`` times in a row
+stop the server, instead of forking in a loop.
+"""
+import gc
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Callable, List, Optional, Set
+
+import uvicorn
+
+MAX_BOOT_FAILURES = 3
+READY_TIMEOUT_S = 120.0
+
+
+class _WorkerServer(uvicorn.Server):
+    """uvicorn server that reports to the parent once its startup (lifespan included) is done."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, f"{os.getpid()}\n".encode())
+
+
+class PreforkServer:
+    """
+    Forks and supervises uvicorn workers that share the parent's loaded app.
+
+    Args:
+        app: ASGI app, imported (and its models loaded) in the parent
+        workers: Number of worker processes
+        host: Address to listen on
+        port: Port to listen on
+        max_requests: Recycle a worker after this many requests (``0`` never)
+        max_requests_jitter: Up to this many extra requests per worker, so
+            workers are not all recycled at the same moment
+        graceful_timeout: Seconds a stopping worker gets to finish its requests
+        before_fork: Called in the parent before workers are forked (e.g. to
+            load models that changed on disk)
+        log_level: uvicorn log level of the workers
+    """
+
+    def __init__(self, app, workers: int, host: str = "0.0.0.0", port: int = 8000, max_requests: int = 0,
+                 max_requests_jitter: int = 0, graceful_timeout: float = 30.0,
+                 before_fork: Optional[Callable[[], None]] = None, log_level: str = "info"):
+        self.app = app
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.before_fork = before_fork
+        self.log_level = log_level
+
+        self.pids: Set[int] = set()
+        self.ready: Set[int] = set()
+        self.retiring: Set[int] = set()
+        self.recycled = 0
+        self.boot_failures = 0
+        self.exit_status = 0
+        self._stopping = False
+        self._recycle_requested = False
+        self._sock: Optional[socket.socket] = None
+        self._ready_r = self._ready_w = -1
+        self._ready_buffer = b""
+
+    # -- parent -------------------------------------------------------------
+
+    def bind(self) -> socket.socket:
+        """Open the listening socket shared by all workers."""
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self._sock = sock
+        return sock
+
+    def start(self) -> List[int]:
+        """Bind, fork every worker and wait until they are serving; returns their pids."""
+        if self._sock is None:
+            self.bind()
+        self._ready_r, self._ready_w = os.pipe()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle)
+
+        self._prepare_fork()
+        pids = [self._spawn() for _ in range(self.workers)]
+        self._wait_ready(set(pids))
+        return sorted(self.pids & self.ready)
+
+    def supervise(self) -> int:
+        """Replace exited workers until asked to stop; returns the exit status for the parent."""
+        while not self._stopping:
+            self._reap()
+            if self._recycle_requested:
+                self._recycle_requested = False
+                self._recycle_all()
+            time.sleep(0.2)
+        self.stop()
+        return self.exit_status
+
+    def stop(self):
+        """Ask every worker to finish its requests and exit; kill the ones that take too long."""
+        self._stopping = True
+        for pid in list(self.pids):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.pids and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.pids):
+            print(f"⚠️  Worker {pid} did not stop in time; killing it")
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.pids.discard(pid)
+        if self._sock is not None:
+            self._sock.close()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_recycle(self, signum, frame):
+        self._recycle_requested = True
+
+    def _prepare_fork(self):
+        if self.before_fork is not None:
+            try:
+                self.before_fork()
+            except Exception as e:
+                # Workers keep forking from the models the parent already has
+                print(f"⚠️  Refreshing the models before forking failed: {str(e)}")
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self) -> int:
+        limit = self.max_requests
+        if limit and self.max_requests_jitter:
+            limit += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(limit)
+        self.pids.add(pid)
+        return pid
+
+    def _read_ready(self, timeout: float):
+        readable, _, _ = select.select([self._ready_r], [], [], timeout)
+        if not readable:
+            return
+        self._ready_buffer += os.read(self._ready_r, 4096)
+        *lines, self._ready_buffer = self._ready_buffer.split(b"\n")
+        for line in lines:
+            pid = int(line)
+            if pid in self.pids:
+                self.ready.add(pid)
+                self.boot_failures = 0
+
+    def _wait_ready(self, pids: Set[int], timeout: float = READY_TIMEOUT_S) -> bool:
+        """Wait until the workers in ``pids`` that are still alive are serving; False if none is."""
+        deadline = time.monotonic() + timeout
+        while not self._stopping and not (pids & self.pids) <= self.ready:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._read_ready(min(remaining, 0.2))
+            self._reap()
+        return bool(pids & self.ready)
+
+    def _reap(self):
+        """Collect exited workers and replace them; stops the server once workers keep failing to start."""
+        self._read_ready(0)
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid not in self.pids:
+                continue
+            self.pids.discard(pid)
+            was_ready = pid in self.ready
+            self.ready.discard(pid)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not was_ready:
+                self.boot_failures += 1
+                print(f"❌ Worker {pid} exited during startup (status {code})")
+                if self.boot_failures >= MAX_BOOT_FAILURES:
+                    print(f"❌ {self.boot_failures} workers in a row failed to start; stopping")
+                    self._stopping = True
+                    self.exit_status = 1
+                    return
+            elif code == 0:
+                self.recycled += 1
+                print(f"♻️  Worker {pid} recycled after its request limit")
+            else:
+                print(f"⚠️  Worker {pid} exited with status {code}; replacing it")
+            self._prepare_fork()
+            self._spawn()
+
+    def _recycle_all(self):
+        """Replace the workers one at a time, each replacement ready before its predecessor stops."""
+        print(f"♻️  Recycling {len(self.pids)} workers")
+        self._prepare_fork()
+        for old in sorted(self.pids):
+            if self._stopping:
+                return
+            new = self._spawn()
+            if not self._wait_ready({new}):
+                print(f"❌ Replacement worker {new} did not start; keeping worker {old}")
+                continue
+            self.retiring.add(old)
+            self._signal(old, signal.SIGTERM)
+            self.recycled += 1
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # -- worker -------------------------------------------------------------
+
+    def _run_worker(self, max_requests: int):
+        """Child process: serve on the shared socket until told to stop or recycled."""
+        status = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            os.close(self._ready_r)
+            config = uvicorn.Config(
+                self.app,
+                log_level=self.log_level,
+                lifespan="on",
+                limit_max_requests=max_requests or None,
+                timeout_graceful_shutdown=self.graceful_timeout,
+            )
+            server = _WorkerServer(config, self._ready_w)
+            server.run(sockets=[self._sock])
+            if not server.started:
+                status = 3
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} failed: {e}", file=sys.stderr)
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Precomputed probability grid for the game's low-dimensional input space.
+
+The game derives every input it sends from a handful of sliders, so the
+probability surface it explores is small enough to tabulate. The build step
+evaluates both classifiers over a grid of those inputs and stores the result
+as ``modelos/probability_grid.npz``; the API can then answer requests that
+fall inside the grid by table lookup (nearest cell or multilinear
+interpolation) and fall back to the model everywhere else.
+
+The default axes cover the payload of ``convertGameParametersToBackend`` in
+``Frontend/src/lib/api.ts`` at every slider position: radius, temperature and
+orbital period come straight from sliders, while SNR, stellar temperature and
+stellar radius are derived from the mass and brightness sliders. Inputs held
+fixed can be given as pins instead of axes.
+
+Usage:
+    python probability_grid.py
+    python probability_grid.py --axis koi_prad=0.3:25:64:log --axis koi_teq=50:2500:64 \\
+        --axis koi_period=0.5:1000:32:log --pin koi_steff=5800 --pin koi_srad=1.0
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+GRID_FILE = "probability_grid.npz"
+LOOKUP_MODES = ("nearest", "linear")
+
+# The game's payload (Frontend/src/lib/api.ts) over the full slider ranges
+DEFAULT_AXES = [
+    "koi_prad=0.1:2:16:log",  # radius slider, 0.1-2 Earth radii
+    "koi_teq=200:800:13",  # temperature slider, 200-800 K
+    "koi_period=0.3:4100:12:log",  # orbital distance 0.01-5 AU through Kepler's third law
+    "koi_model_snr=1:50:6:log",  # mass * radius * brightness * 5, clamped to 1-50
+    "koi_steff=3000:9000:6",  # 3000 K plus 2000 K per unit of brightness (0.1-3)
+    "koi_srad=0.5:10:6:log",  # mass * 0.5 + 0.5, clamped to 0.1-10
+]
+DEFAULT_PINS: List[str] = []
+
+# Pinned values must match this closely for a request to use the grid
+PIN_TOLERANCE = 1e-9
+
+
+class GridAxis:
+    """One grid dimension; log axes are spaced (and interpolated) in log space."""
+
+    def __init__(self, name: str, values: Sequence[float], log: bool = False):
+        self.name = name
+        self.values = np.asarray(values, dtype=np.float64)
+        self.log = bool(log)
+        self._coords = np.log(self.values) if self.log else self.values
+
+    @classmethod
+    def parse(cls, spec: str) -> "GridAxis":
+        """Parse ``name=start:stop:num[:log]``."""
+        name, _, rng = spec.partition("=")
+        parts = rng.split(":")
+        if len(parts) not in (3, 4) or (len(parts) == 4 and parts[3] != "log"):
+            raise ValueError(f"Invalid axis spec {spec!r}; expected name=start:stop:num[:log]")
+        start, stop, num = float(parts[0]), float(parts[1]), int(parts[2])
+        log = len(parts) == 4
+        values = np.geomspace(start, stop, num) if log else np.linspace(start, stop, num)
+        return cls(name.strip(), values, log)
+
+    def coord(self, x: float) -> float:
+        return float(np.log(x)) if self.log else float(x)
+
+    def contains(self, x: float) -> bool:
+        return self.values[0] <= x <= self.values[-1]
+
+    def nearest(self, x: float) -> int:
+        return int(np.abs(self._coords - self.coord(x)).argmin())
+
+    def bracket(self, x: float) -> Tuple[int, float]:
+        """Lower cell index and interpolation weight of the upper neighbour."""
+        c = self.coord(x)
+        i = int(np.clip(np.searchsorted(self._coords, c, side="right") - 1, 0, len(self.values) - 2))
+        lo, hi = self._coords[i], self._coords[i + 1]
+        return i, float((c - lo) / (hi - lo))
+
+
+class ProbabilityGrid:
+    """Tabulated type/binary probabilities over a few input features."""
+
+    def __init__(self, axes: List[GridAxis], pins: Dict[str, float], proba_type: np.ndarray,
+                 proba_bin: Optional[np.ndarray], classes: Sequence[str], model_version: str,
+                 report: Optional[Dict[str, float]] = None):
+        self.axes = axes
+        self.pins = dict(pins)
+        self.proba_type = proba_type
+        self.proba_bin = proba_bin
+        self.classes = np.asarray(classes)
+        self.model_version = model_version
+        self.report = dict(report or {})
+        self.inputs = {a.name for a in axes} | set(self.pins)
+
+    def covers(self, example: Dict) -> bool:
+        """True when the example sets exactly the grid's inputs, with matching pins and in range."""
+        provided = {k for k, v in example.items() if v is not None}
+        if provided != self.inputs:
+            return False
+        for name, value in self.pins.items():
+            if abs(float(example[name]) - value) > PIN_TOLERANCE * max(1.0, abs(value)):
+                return False
+        for axis in self.axes:
+            x = float(example[axis.name])
+            if not axis.contains(x) or (axis.log and x <= 0):
+                return False
+        return True
+
+    def lookup(self, example: Dict, mode: str = "linear",
+               model_version: Optional[str] = None) -> Optional[Tuple[np.ndarray, Optional[float]]]:
+        """
+        Return ``(type probabilities, binary probability)`` or ``None`` if off-grid.
+
+        ``None`` is also returned when ``model_version`` is given and the grid
+        was built for a different model.
+        """
+        if model_version is not None and model_version != self.model_version:
+            return None
+        if not self.covers(example):
+            return None
+
+        if mode == "nearest":
+            idx = tuple(axis.nearest(float(example[axis.name])) for axis in self.axes)
+            proba_type = self.proba_type[idx].astype(np.float64)
+            proba_bin = None if self.proba_bin is None else float(self.proba_bin[idx])
+            return proba_type, proba_bin
+
+        # Multilinear interpolation over the 2^d surrounding cells
+        brackets = [axis.bracket(float(example[axis.name])) for axis in self.axes]
+        proba_type = np.zeros(self.proba_type.shape[-1])
+        proba_bin = 0.0
+        for corner in range(1 << len(self.axes)):
+            idx, weight = [], 1.0
+            for d, (i, t) in enumerate(brackets):
+                upper = (corner >> d) & 1
+                idx.append(i + upper)
+                weight *= t if upper else 1.0 - t
+            if weight == 0.0:
+                continue
+            idx = tuple(idx)
+            proba_type += weight * self.proba_type[idx]
+            if self.proba_bin is not None:
+                proba_bin += weight * float(self.proba_bin[idx])
+        return proba_type, (None if self.proba_bin is None else proba_bin)
+
+    def save(self, path: str):
+        arrays = {
+            "axis_names": np.array([a.name for a in self.axes]),
+            "axis_log": np.array([a.log for a in self.axes]),
+            "pin_names": np.array(list(self.pins), dtype=str),
+            "pin_values": np.array(list(self.pins.values()), dtype=np.float64),
+            "proba_type": self.proba_type,
+            "classes": self.classes.astype(str),
+            "model_version": np.array(self.model_version),
+            "report_keys": np.array(list(self.report), dtype=str),
+            "report_values": np.array(list(self.report.values()), dtype=np.float64),
+        }
+        for i, axis in enumerate(self.axes):
+            arrays[f"axis_values_{i}"] = axis.values
+        if self.proba_bin is not None:
+            arrays["proba_bin"] = self.proba_bin
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ProbabilityGrid":
+        with np.load(path, allow_pickle=False) as data:
+            axes = [
+                GridAxis(str(name), data[f"axis_values_{i}"], bool(log))
+                for i, (name, log) in enumerate(zip(data["axis_names"], data["axis_log"]))
+            ]
+            pins = {str(k): float(v) for k, v in zip(data["pin_names"], data["pin_values"])}
+            report = {str(k): float(v) for k, v in zip(data["report_keys"], data["report_values"])}
+            return cls(
+                axes,
+                pins,
+                data["proba_type"],
+                data["proba_bin"] if "proba_bin" in data else None,
+                data["classes"],
+                str(data["model_version"]),
+                report,
+            )
+
+
+def _grid_examples(axes: List[GridAxis], pins: Dict[str, float]) -> List[Dict]:
+    mesh = np.meshgrid(*[a.values for a in axes], indexing="ij")
+    flat = [m.ravel() for m in mesh]
+    return [
+        {**pins, **{a.name: float(col[i]) for a, col in zip(axes, flat)}}
+        for i in range(flat[0].size)
+    ]
+
+
+def build_grid(engine, axes: List[GridAxis], pins: Dict[str, float]) -> ProbabilityGrid:
+    """Evaluate both classifiers at every grid point."""
+    examples = _grid_examples(axes, pins)
+    proba_type, proba_bin = engine.predict_proba(engine.build_frame(examples))
+    shape = tuple(len(a.values) for a in axes)
+    return ProbabilityGrid(
+        axes,
+        pins,
+        proba_type.reshape(shape + (proba_type.shape[1],)).astype(np.float32),
+        None if proba_bin is None else proba_bin.reshape(shape).astype(np.float32),
+        engine.classes,
+        engine.version,
+    )
+
+
+def measure_error(grid: ProbabilityGrid, engine, n_samples: int = 2000, seed: int = 42) -> Dict[str, float]:
+    """
+    Compare grid lookups with the real model at random off-grid points.
+
+    Points are drawn uniformly in each axis' (log-)space inside the grid.
+    """
+    rng = np.random.default_rng(seed)
+    examples = []
+    for _ in range(n_samples):
+        example = dict(grid.pins)
+        for axis in grid.axes:
+            lo, hi = axis._coords[0], axis._coords[-1]
+            c = rng.uniform(lo, hi)
+            example[axis.name] = float(np.exp(c)) if axis.log else float(c)
+        examples.append(example)
+
+    true_type, true_bin = engine.predict_proba(engine.build_frame(examples))
+    report = {}
+    for mode in LOOKUP_MODES:
+        looked_up = [grid.lookup(ex, mode) for ex in examples]
+        grid_type = np.array([pt for pt, _ in looked_up])
+        err = np.abs(grid_type - true_type)
+        report[f"{mode}_type_max_error"] = float(err.max())
+        report[f"{mode}_type_mean_error"] = float(err.mean())
+        report[f"{mode}_top1_agreement"] = float((grid_type.argmax(1) == true_type.argmax(1)).mean())
+        if true_bin is not None:
+            grid_bin = np.array([pb for _, pb in looked_up])
+            report[f"{mode}_bin_max_error"] = float(np.abs(grid_bin - true_bin).max())
+    return report
+
+
+def load_grid(model_dir: str = "modelos") -> Optional[ProbabilityGrid]:
+    """Load ``probability_grid.npz`` from ``model_dir`` if it exists."""
+    path = os.path.join(model_dir, GRID_FILE)
+    if not os.path.exists(path):
+        return None
+    return ProbabilityGrid.load(path)
+
+
+def _parse_pin(spec: str) -> Tuple[str, float]:
+    name, _, value = spec.partition("=")
+    return name.strip(), float(value)
+
+
+def main():
+    """Build the grid for the models in ``modelos/`` and report its error."""
+    from inference import get_engine
+
+    parser = argparse.ArgumentParser(description="Precompute a probability grid for the game's inputs")
+    parser.add_argument("--model-dir", default="modelos")
+    parser.add_argument("--axis", action="append", help="name=start:stop:num[:log] (repeatable)")
+    parser.add_argument("--pin", action="append", help="name=value held fixed (repeatable)")
+    parser.add_argument("--samples", type=int, default=2000, help="random points used to measure the error")
+    args = parser.parse_args()
+
+    axes = [GridAxis.parse(spec) for spec in (args.axis or DEFAULT_AXES)]
+    pins = dict(_parse_pin(spec) for spec in (args.pin or DEFAULT_PINS))
+    overlap = {a.name for a in axes} & set(pins)
+    if overlap:
+        parser.error(f"inputs cannot be both an axis and a pin: {', '.join(sorted(overlap))}")
+
+    print("🧮 Building probability grid")
+    print("=" * 50)
+    engine = get_engine(args.model_dir)
+    for axis in axes:
+        print(f"  {axis.name}: {len(axis.values)} points in [{axis.values[0]:g}, {axis.values[-1]:g}]"
+              f"{' (log)' if axis.log else ''}")
+    print(f"  pinned: {pins}")
+
+    start = time.perf_counter()
+    grid = build_grid(engine, axes, pins)
+    print(f"✅ Evaluated {grid.proba_type[..., 0].size} grid points in {time.perf_counter() - start:.2f}s")
+
+    grid.report = measure_error(grid, engine, args.samples)
+    print(f"\n📏 Error against the model on {args.samples} random in-range points:")
+    for key, value in grid.report.items():
+        print(f"  {key}: {value:.6f}")
+
+    path = os.path.join(args.model_dir, GRID_FILE)
+    grid.save(path)
+    print(f"\n💾 Saved {path} ({os.path.getsize(path) / 1024:.1f} KiB, model version {grid.model_version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Opt-in per-request profiling and slow-request capture.
+
+Profiling is off by default. A request is profiled when it carries
+``X-Profile: <mode>`` or ``?profile=<mode>`` (which also need ``X-Admin-Token``
+when ``ADMIN_TOKEN`` is set), or when it is picked by the sampling rate. The
+modes are:
+
+- ``stages``: the request's stage breakdown only (validation, model load,
+  frame build, preprocessing, inference, serialization)
+- ``cprofile``: a ``cProfile`` of the event-loop thread. Inference for the
+  request runs inline instead of on the executor so it shows up in the
+  profile. Only one request is cProfiled at a time; others fall back to
+  ``stages``.
+- ``stack``: every thread's stack sampled every few milliseconds, reported
+  as collapsed stacks (flame graph input). This also covers the executor
+  threads.
+
+Both profilers see everything else running in the process at the same time,
+so profile under light load. Every response to a profiled request carries
+``X-Profile-Id``; the profile itself is kept in a ring buffer of recent
+profiles. Independently of profiling, the N slowest requests (with their
+stage breakdown) are kept for ``/admin/slow-requests``. All settings can be
+changed at runtime through ``/admin/profiling``.
+"""
+import cProfile
+import collections
+import heapq
+import io
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+import metrics
+
+PROFILE_MODES = ("stages", "cprofile", "stack")
+_TRUE_VALUES = ("1", "true", "yes")
+
+# Leaf frames in these files are idle threads (waiting on a lock, queue or socket, or for executor work)
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+class ProfilingSettings:
+    """Runtime-adjustable profiling settings (initialized from the environment)."""
+
+    def __init__(self):
+        self.sample_rate = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+        self.sample_mode = os.environ.get("PROFILING_SAMPLE_MODE", "stages")
+        self.slow_requests_kept = int(os.environ.get("SLOW_REQUESTS_KEPT", "20"))
+        self.slow_min_ms = float(os.environ.get("SLOW_REQUEST_MIN_MS", "0"))
+        self.profiles_kept = int(os.environ.get("PROFILES_KEPT", "20"))
+        self.stack_interval_ms = float(os.environ.get("PROFILING_STACK_INTERVAL_MS", "5"))
+
+    def update(self, **changes):
+        """
+        Change settings; ``None`` values are ignored.
+
+        Raises:
+            ValueError: If a value is out of range
+        """
+        changes = {k: v for k, v in changes.items() if v is not None}
+        if not 0.0 <= changes.get("sample_rate", self.sample_rate) <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if changes.get("sample_mode", self.sample_mode) not in PROFILE_MODES:
+            raise ValueError(f"sample_mode must be one of {PROFILE_MODES}")
+        for name in ("slow_requests_kept", "profiles_kept"):
+            if changes.get(name, 1) < 0:
+                raise ValueError(f"{name} must not be negative")
+        if changes.get("stack_interval_ms", self.stack_interval_ms) <= 0:
+            raise ValueError("stack_interval_ms must be positive")
+        for name, value in changes.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown setting {name!r}")
+            setattr(self, name, value)
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class SlowRequestLog:
+    """The ``capacity`` slowest requests seen, plus a ring buffer of recent profiles."""
+
+    def __init__(self, settings: ProfilingSettings):
+        self.settings = settings
+        self._heap: List[tuple] = []  # (duration, seq, record); the fastest kept request on top
+        self._profiles: "collections.OrderedDict[str, Dict]" = collections.OrderedDict()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.requests_seen = 0
+        self.requests_profiled = 0
+
+    def offer(self, record: Dict):
+        """Keep ``record`` if it is among the slowest (and profiled ones among the recent profiles)."""
+        capacity = self.settings.slow_requests_kept
+        duration = record["duration_ms"]
+        with self._lock:
+            self.requests_seen += 1
+            if record.get("profile_mode"):
+                self.requests_profiled += 1
+                self._profiles[record["id"]] = record
+                while len(self._profiles) > self.settings.profiles_kept:
+                    self._profiles.popitem(last=False)
+            if duration < self.settings.slow_min_ms or capacity <= 0:
+                return
+            entry = (duration, next(self._seq), record)
+            if len(self._heap) < capacity:
+                heapq.heappush(self._heap, entry)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+            while len(self._heap) > capacity:
+                heapq.heappop(self._heap)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            records = [record for _, _, record in sorted(self._heap, reverse=True)]
+        # The heap only shrinks on the next offer after the capacity was lowered
+        records = records[:self.settings.slow_requests_kept]
+        return records[:limit] if limit else records
+
+    def profile(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def recent_profile_ids(self) -> List[str]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._profiles.clear()
+
+
+class StackSampler:
+    """Samples the stacks of all other threads at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, interval_s: float, max_depth: int = 64):
+        self.interval = interval_s
+        self.max_depth = max_depth
+        self.counts: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return self.report()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+
+    def report(self, top: int = 50) -> str:
+        lines = [f"# {self.samples} samples every {self.interval * 1000:g} ms; count stack (root;...;leaf)"]
+        lines += [f"{count} {stack}" for stack, count in self.counts.most_common(top)]
+        return "\n".join(lines)
+
+
+def _cprofile_report(profiler: cProfile.Profile, top: int = 40) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
+
+
+def inline_inference() -> bool:
+    """True when the current request is being cProfiled and must run inference on this thread."""
+    marks = metrics.current_marks()
+    return bool(marks and marks.get("inline"))
+
+
+class ProfilingMiddleware:
+    """
+    Captures per-request stage breakdowns and opt-in profiles.
+
+    Args:
+        app: ASGI app to wrap
+        settings: Shared, runtime-adjustable settings
+        log: Where slow requests and profiles are kept
+        admin_token: When set, explicit profiling requests must carry it in ``X-Admin-Token``
+        exclude_prefixes: Paths that are never profiled or logged
+    """
+
+    def __init__(self, app, settings: ProfilingSettings, log: SlowRequestLog, admin_token: str = "",
+                 exclude_prefixes=("/admin", "/metrics", "/stats", "/docs", "/openapi.json")):
+        self.app = app
+        self.settings = settings
+        self.log = log
+        self.admin_token = admin_token
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self._ids = itertools.count(1)
+        self._cprofile_lock = threading.Lock()
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        mode = headers.get(b"x-profile", b"").decode("latin-1").strip().lower()
+        if not mode and scope.get("query_string"):
+            mode = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [""])[0].strip().lower()
+        if not mode:
+            return None
+        if self.admin_token and headers.get(b"x-admin-token", b"").decode("latin-1") != self.admin_token:
+            return None
+        if mode in _TRUE_VALUES:
+            return "stages"
+        return mode if mode in PROFILE_MODES else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        marks, token = metrics.begin_request()
+        mode = self._requested_mode(scope)
+        if mode is None and self.settings.sample_rate > 0 and random.random() < self.settings.sample_rate:
+            mode = self.settings.sample_mode
+        profile_id = f"{os.getpid()}-{next(self._ids)}"
+        status = [500]
+
+        profiler = sampler = None
+        note = None
+        if mode == "cprofile":
+            if self._cprofile_lock.acquire(blocking=False):
+                marks["inline"] = True
+                profiler = cProfile.Profile()
+            else:
+                mode, note = "stages", "another request was being cProfiled"
+        elif mode == "stack":
+            sampler = StackSampler(self.settings.stack_interval_ms / 1000.0)
+            sampler.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                metrics.mark_response_started(marks)
+                if mode is not None:
+                    message = {**message, "headers": list(message.get("headers", []))
+                               + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        started_at = time.time()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile = None
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_lock.release()
+                profile = _cprofile_report(profiler)
+            elif sampler is not None:
+                profile = sampler.stop()
+            metrics.end_request(token)
+
+            route = scope.get("route")
+            record = {
+                "id": profile_id,
+                "method": scope.get("method", ""),
+                "path": scope["path"],
+                "endpoint": getattr(route, "path", None),
+                "status": status[0],
+                "started_at": started_at,
+                "duration_ms": (time.perf_counter() - marks["start"]) * 1000.0,
+                "stages_ms": {stage: seconds * 1000.0 for stage, seconds in marks["stages"].items()},
+                "profile_mode": mode,
+            }
+            if profile is not None:
+                record["profile"] = profile
+            if note is not None:
+                record["note"] = note
+            self.log.offer(record)
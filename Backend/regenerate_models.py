@@ -16,7 +16,60 @@ from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.ensemble import HistGradientBoostingClassifier
 import joblib
 
-MJUP_TO_MEARTH = 317.828
+from model_registry import BINARY_MODEL_FILE, METADATA_FILE, TYPE_MODEL_FILE, get_registry, variant_dir
+from ingest import load_catalogue
+from labels import MJUP_TO_MEARTH, size_labels, thermal_labels, type_labels
+from training import StageTimer, TrainingJob, train_all
+from model_store import (
+    COMPILED_FILES, current_version, find_version, save_version, set_current, training_inputs, version_key
+)
+from compiled_model import CompiledPipeline
+from export_compiled import compile_pipelines
+
+# How the classifiers are trained: "thread", "process" or "sequential"
+TRAINING_MODE = os.environ.get("TRAINING_MODE", "thread")
+# Total OpenMP cores for training (0 = all available) and optional per-classifier budgets
+TRAINING_CORES = int(os.environ.get("TRAINING_CORES", "0")) or None
+TRAINING_CORES_TYPE = int(os.environ.get("TRAINING_CORES_TYPE", "0"))
+TRAINING_CORES_BIN = int(os.environ.get("TRAINING_CORES_BIN", "0"))
+
+# Candidate source columns per role; the first one present in the table is used
+COLUMN_CANDIDATES = {
+    "rade": ["pl_rade", "koi_prad"],
+    "bmasse": ["pl_bmasse"],
+    "bmassj": ["pl_bmassj"],
+    "eqt": ["pl_eqt", "koi_teq"],
+    "period": ["pl_orbper", "koi_period"],
+    "st_teff": ["st_teff", "koi_steff"],
+    "st_rad": ["st_rad", "koi_srad"],
+    "insol": ["koi_insol"],
+}
+TRAINING_COLUMNS = [c for candidates in COLUMN_CANDIDATES.values() for c in candidates]
+
+# Split and classifier settings (recorded in the model manifest)
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+CLASSIFIER_PARAMS = {"random_state": 42, "max_iter": 100, "learning_rate": 0.1}
+
+# Optional "lite" variant for latency-sensitive callers: fewer, shallower trees with early stopping
+TRAIN_LITE = os.environ.get("TRAIN_LITE", "0") == "1"
+LITE_CLASSIFIER_PARAMS = {
+    "random_state": 42, "max_iter": 60, "learning_rate": 0.1, "max_depth": 3, "max_leaf_nodes": 8,
+    "early_stopping": True, "validation_fraction": 0.1, "n_iter_no_change": 10,
+}
+
+# Source files whose contents determine the trained models and the artifacts written for them
+_HERE = os.path.dirname(os.path.abspath(__file__))
+TRAINING_CODE = [os.path.join(_HERE, name) for name in (
+    "regenerate_models.py", "labels.py", "ingest.py", "training.py",
+    "compiled_model.py", "export_compiled.py", "model_store.py",
+)]
+
+MODEL_DIR = "modelos"
+LITE_MODEL_DIR = variant_dir(MODEL_DIR, "lite")
+
+# Retrain even if a version with identical inputs already exists
+FORCE_RETRAIN = os.environ.get("FORCE_RETRAIN", "0") == "1"
 
 def first_present(df, candidates):
     """Find first present column from candidates."""
@@ -26,7 +79,7 @@ def first_present(df, candidates):
     return None
 
 def _size_class(row: pd.Series, col_pl_rade, col_pl_bmasse, col_pl_bmassj) -> Optional[str]:
-    """Classify by size (radius/mass)."""
+    """Classify by size (radius/mass); row-wise reference for ``labels.size_labels``."""
     r  = row.get(col_pl_rade,  np.nan)  # Earth radii
     me = row.get(col_pl_bmasse, np.nan) # Earth masses
     mj = row.get(col_pl_bmassj, np.nan) # Jupiter masses
@@ -63,7 +116,7 @@ def _size_class(row: pd.Series, col_pl_rade, col_pl_bmasse, col_pl_bmassj) -> Op
     return None
 
 def _thermal_class(row: pd.Series, col_pl_eqt) -> Optional[str]:
-    """Classify by thermal properties."""
+    """Classify by thermal properties; row-wise reference for ``labels.thermal_labels``."""
     teq = row.get(col_pl_eqt, np.nan)
     if pd.notna(teq):
         if teq < 400:
@@ -76,6 +129,18 @@ def _thermal_class(row: pd.Series, col_pl_eqt) -> Optional[str]:
             return "muy_caliente"
     return None
 
+def _summary_metrics(y_true, y_pred) -> dict:
+    """Accuracy, F1 scores and per-class recall recorded in the model manifest."""
+    report = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+    classes = sorted(str(c) for c in set(y_true))
+    return {
+        "accuracy": round(report["accuracy"], 6),
+        "macro_f1": round(report["macro avg"]["f1-score"], 6),
+        "weighted_f1": round(report["weighted avg"]["f1-score"], 6),
+        "per_class_recall": {c: round(report[c]["recall"], 6) for c in classes},
+        "test_rows": int(len(y_true)),
+    }
+
 def main():
     """Main function to regenerate models."""
     print("🚀 Regenerating Exoplanet Models")
@@ -87,9 +152,37 @@ def main():
         print(f"❌ Dataset file not found: {csv_path}")
         return
     
+    # Skip training entirely when these exact inputs were trained before
+    config = {
+        "columns": COLUMN_CANDIDATES,
+        "test_size": TEST_SIZE,
+        "split_seed": SPLIT_SEED,
+        "classifier": CLASSIFIER_PARAMS,
+    }
+    inputs = training_inputs(csv_path, TRAINING_CODE, config)
+    version = version_key(inputs)
+    # The lite variant is keyed by its own classifier settings; the full key does not depend on TRAIN_LITE
+    lite_inputs = training_inputs(csv_path, TRAINING_CODE, {**config, "classifier": LITE_CLASSIFIER_PARAMS})
+    lite_version = version_key(lite_inputs)
+    pending = [(MODEL_DIR, version)] + ([(LITE_MODEL_DIR, lite_version)] if TRAIN_LITE else [])
+    if not FORCE_RETRAIN and all(find_version(d, v) is not None for d, v in pending):
+        print(f"♻️  Inputs unchanged: model version {version} is already trained")
+        for model_dir, model_version in pending:
+            if current_version(model_dir) != model_version:
+                set_current(model_dir, model_version)
+                print(f"✅ Switched {model_dir}/CURRENT to {model_version}")
+        print("Set FORCE_RETRAIN=1 to retrain anyway.")
+        return
+    # Only the lite variant is missing: the full models are trained again but not saved
+    save_full = FORCE_RETRAIN or find_version(MODEL_DIR, version) is None
+    
+    timer = StageTimer()
+    
     print(f"📊 Loading dataset from {csv_path}...")
     try:
-        df = pd.read_csv(csv_path, comment="#", encoding="utf-8-sig", engine="python")
+        # Only the training columns, via the content-hashed snapshot when available
+        with timer.stage("load"):
+            df = load_catalogue(csv_path, TRAINING_COLUMNS, verbose=True)
     except Exception as e:
         print(f"❌ Error loading CSV: {e}")
         return
@@ -103,29 +196,27 @@ def main():
     print(f"Detected: KOI={IS_KOI}, PS={IS_PS}")
     
     # Column mapping
-    COL_PL_RADE   = first_present(df, ["pl_rade", "koi_prad"])
-    COL_PL_BMASSE = first_present(df, ["pl_bmasse"])
-    COL_PL_BMASSJ = first_present(df, ["pl_bmassj"])
-    COL_PL_EQT    = first_present(df, ["pl_eqt", "koi_teq"])
-    COL_PERIOD    = first_present(df, ["pl_orbper", "koi_period"])
-    COL_ST_TEFF   = first_present(df, ["st_teff", "koi_steff"])
-    COL_ST_RAD    = first_present(df, ["st_rad", "koi_srad"])
-    COL_INSOL     = first_present(df, ["koi_insol"])
+    COL_PL_RADE   = first_present(df, COLUMN_CANDIDATES["rade"])
+    COL_PL_BMASSE = first_present(df, COLUMN_CANDIDATES["bmasse"])
+    COL_PL_BMASSJ = first_present(df, COLUMN_CANDIDATES["bmassj"])
+    COL_PL_EQT    = first_present(df, COLUMN_CANDIDATES["eqt"])
+    COL_PERIOD    = first_present(df, COLUMN_CANDIDATES["period"])
+    COL_ST_TEFF   = first_present(df, COLUMN_CANDIDATES["st_teff"])
+    COL_ST_RAD    = first_present(df, COLUMN_CANDIDATES["st_rad"])
+    COL_INSOL     = first_present(df, COLUMN_CANDIDATES["insol"])
     
     print(f"Column mapping: RADE={COL_PL_RADE}, EQT={COL_PL_EQT}, PERIOD={COL_PERIOD}")
     
     # Build labels
     print("🏷️  Building labels...")
     
-    # Size-based labels
-    df["size_label"] = df.apply(lambda row: _size_class(row, COL_PL_RADE, COL_PL_BMASSE, COL_PL_BMASSJ), axis=1)
-    df["thermal_label"] = df.apply(lambda row: _thermal_class(row, COL_PL_EQT), axis=1)
-    
-    # Combined type label (size + thermal)
-    df["type_label"] = df["size_label"]
-    if COL_PL_EQT is not None:
-        thermal_mask = df["thermal_label"] == "muy_caliente"
-        df.loc[thermal_mask, "type_label"] = df.loc[thermal_mask, "size_label"] + "_caliente"
+    # Size-based labels (vectorized; same labels as _size_class/_thermal_class)
+    with timer.stage("labels"):
+        df["size_label"] = size_labels(df, COL_PL_RADE, COL_PL_BMASSE, COL_PL_BMASSJ)
+        df["thermal_label"] = thermal_labels(df, COL_PL_EQT)
+        
+        # Combined type label (size + thermal)
+        df["type_label"] = type_labels(df["size_label"], df["thermal_label"] if COL_PL_EQT is not None else None)
     
     # Filter valid samples
     valid_mask = df["type_label"].notna()
@@ -154,10 +245,18 @@ def main():
     print(f"Feature matrix shape: {X.shape}")
     print(f"Target classes: {sorted(y_type.unique())}")
     
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_type, test_size=0.2, random_state=42, stratify=y_type
-    )
+    # Train-test splits (one per target; preprocessing is fitted once per distinct split)
+    with timer.stage("split"):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y_type, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=y_type
+        )
+        
+        # Binary classifier (optional - using type_label as proxy)
+        y_bin = (y_type != "unknown").astype(int)  # Simple binary classification
+        
+        X_train_bin, X_test_bin, y_train_bin, y_test_bin = train_test_split(
+            X, y_bin, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=y_bin
+        )
     
     print(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
     
@@ -170,54 +269,56 @@ def main():
         remainder="drop"
     )
     
-    # Type classifier
-    print("🤖 Training type classifier...")
-    clf_type = Pipeline([
-        ("preprocessor", preprocessor),
-        ("clf", HistGradientBoostingClassifier(
-            random_state=42,
-            max_iter=100,
-            learning_rate=0.1
-        ))
-    ])
-    
-    clf_type.fit(X_train, y_train)
-    
-    # Evaluate type classifier
-    y_pred_type = clf_type.predict(X_test)
-    print("Type Classifier Performance:")
-    print(classification_report(y_test, y_pred_type))
-    
-    # Binary classifier (optional - using type_label as proxy)
-    print("🤖 Training binary classifier...")
-    y_bin = (y_type != "unknown").astype(int)  # Simple binary classification
-    
-    X_train_bin, X_test_bin, y_train_bin, y_test_bin = train_test_split(
-        X, y_bin, test_size=0.2, random_state=42, stratify=y_bin
-    )
-    
-    clf_bin = Pipeline([
-        ("preprocessor", preprocessor),
-        ("clf", HistGradientBoostingClassifier(
-            random_state=42,
-            max_iter=100,
-            learning_rate=0.1
-        ))
-    ])
-    
-    clf_bin.fit(X_train_bin, y_train_bin)
-    
-    # Evaluate binary classifier
-    y_pred_bin = clf_bin.predict(X_test_bin)
-    print("Binary Classifier Performance:")
-    print(classification_report(y_test_bin, y_pred_bin))
-    
-    # Save models
-    print("💾 Saving models...")
-    os.makedirs("modelos", exist_ok=True)
-    
-    joblib.dump(clf_type, "modelos/clf_exoplanet_type.joblib")
-    joblib.dump(clf_bin, "modelos/clf_is_exoplanet.joblib")
+    def make_classifier(params=CLASSIFIER_PARAMS):
+        return HistGradientBoostingClassifier(**params)
+    
+    jobs = [
+        TrainingJob("type", make_classifier(), X_train, y_train, X_test, y_test, cores=TRAINING_CORES_TYPE),
+        TrainingJob("binary", make_classifier(), X_train_bin, y_train_bin, X_test_bin, y_test_bin,
+                    cores=TRAINING_CORES_BIN),
+    ]
+    if TRAIN_LITE:
+        # Same splits, so the lite classifiers reuse the fitted preprocessing
+        jobs += [
+            TrainingJob("type_lite", make_classifier(LITE_CLASSIFIER_PARAMS), X_train, y_train, X_test, y_test),
+            TrainingJob("binary_lite", make_classifier(LITE_CLASSIFIER_PARAMS), X_train_bin, y_train_bin,
+                        X_test_bin, y_test_bin),
+        ]
+    
+    print(f"🤖 Training {', '.join(job.name for job in jobs)} classifiers ({TRAINING_MODE})...")
+    trained = train_all(preprocessor, jobs, mode=TRAINING_MODE, total_cores=TRAINING_CORES, timer=timer)
+    for model in trained.values():
+        print(f"  {model.name}: {model.fit_seconds:.2f}s on {model.cores} core(s)")
+    clf_type = trained["type"].pipeline
+    clf_bin = trained["binary"].pipeline
+    
+    # Evaluate on the cached test matrices
+    with timer.stage("evaluate"):
+        y_pred_type = clf_type[-1].predict(trained["type"].Xt_test)
+        print("Type Classifier Performance:")
+        print(classification_report(y_test, y_pred_type))
+        
+        y_pred_bin = clf_bin[-1].predict(trained["binary"].Xt_test)
+        print("Binary Classifier Performance:")
+        print(classification_report(y_test_bin, y_pred_bin))
+        
+        metrics = {
+            "type": _summary_metrics(y_test, y_pred_type),
+            "binary": _summary_metrics(y_test_bin, y_pred_bin),
+        }
+        
+        if TRAIN_LITE:
+            clf_type_lite = trained["type_lite"].pipeline
+            clf_bin_lite = trained["binary_lite"].pipeline
+            lite_metrics = {
+                "type": _summary_metrics(y_test, clf_type_lite[-1].predict(trained["type_lite"].Xt_test)),
+                "binary": _summary_metrics(y_test_bin, clf_bin_lite[-1].predict(trained["binary_lite"].Xt_test)),
+            }
+            for name in ("type", "binary"):
+                print(f"Lite {name} classifier: macro F1 {lite_metrics[name]['macro_f1']:.4f} "
+                      f"(full {metrics[name]['macro_f1']:.4f}), "
+                      f"{trained[name + '_lite'].pipeline[-1].n_iter_} of {LITE_CLASSIFIER_PARAMS['max_iter']} "
+                      f"iterations")
     
     # Save metadata
     meta = {
@@ -238,13 +339,60 @@ def main():
         },
     }
     
-    joblib.dump(meta, "modelos/metadata.joblib")
-    
-    print("✅ Models saved successfully!")
+    # NumPy-only exports of the pipelines (format in compiled_model.py), saved with the version
+    print("📦 Exporting compiled pipelines...")
+    with timer.stage("export compiled"):
+        try:
+            compiled = compile_pipelines({TYPE_MODEL_FILE: clf_type, BINARY_MODEL_FILE: clf_bin}, num_cols + cat_cols)
+            compiled_lite = compile_pipelines(
+                {TYPE_MODEL_FILE: clf_type_lite, BINARY_MODEL_FILE: clf_bin_lite}, num_cols + cat_cols
+            ) if TRAIN_LITE else {}
+        except ValueError as e:
+            print(f"⚠️  Compiled export skipped: {e}")
+            compiled, compiled_lite = {}, {}
+    
+    # Save models as a new content-addressed version, then switch CURRENT to it
+    print("💾 Saving models...")
+    with timer.stage("save"):
+        if save_full:
+            manifest = save_version(
+                MODEL_DIR,
+                version,
+                {TYPE_MODEL_FILE: clf_type, BINARY_MODEL_FILE: clf_bin, METADATA_FILE: meta},
+                {"inputs": inputs, "metrics": metrics, "stages": dict(timer.stages)},
+                compiled=compiled,
+            )
+        else:
+            manifest = find_version(MODEL_DIR, version)
+        if TRAIN_LITE:
+            save_version(
+                LITE_MODEL_DIR,
+                lite_version,
+                {TYPE_MODEL_FILE: clf_type_lite, BINARY_MODEL_FILE: clf_bin_lite, METADATA_FILE: meta},
+                {"variant": "lite", "inputs": lite_inputs, "metrics": lite_metrics, "stages": dict(timer.stages)},
+                compiled=compiled_lite,
+            )
+            set_current(LITE_MODEL_DIR, lite_version)
+        if save_full or current_version(MODEL_DIR) != version:
+            set_current(MODEL_DIR, version)
+    
+    if save_full:
+        print(f"✅ Models saved as version {version} (artifacts {manifest['artifact_version']})")
+    else:
+        print(f"♻️  Full models unchanged: version {version} (artifacts {manifest['artifact_version']}) kept")
     print("📁 Files created:")
-    print("  - modelos/clf_exoplanet_type.joblib")
-    print("  - modelos/clf_is_exoplanet.joblib") 
-    print("  - modelos/metadata.joblib")
+    print(f"  - {MODEL_DIR}/versions/{version}/ (artifacts + manifest.json)")
+    print(f"  - {MODEL_DIR}/CURRENT -> {version}")
+    print(f"  - {MODEL_DIR}/*.joblib, *.npz and manifest.json (copies of the current version)")
+    if TRAIN_LITE:
+        print(f"  - {LITE_MODEL_DIR}/ (lite variant, same layout, version {lite_version})")
+    for name in compiled:
+        source = os.path.join(MODEL_DIR, os.path.splitext(name)[0] + ".joblib")
+        print(f"  - {MODEL_DIR}/{name}: {os.path.getsize(os.path.join(MODEL_DIR, name)) / 1024:.0f} KiB "
+              f"(joblib {os.path.getsize(source) / 1024:.0f} KiB)")
+    
+    print("\n⏱️  Training stages:")
+    print(timer.report())
     
     # Test prediction
     print("\n🧪 Testing prediction...")
@@ -259,7 +407,7 @@ def main():
     try:
         # Test the models
         clf_bin_test, clf_type_test, meta_test = load_models()
-        cols = meta_test["num_cols"] + meta_test["cat_cols"]
+        cols = list(meta_test["num_cols"]) + list(meta_test["cat_cols"])
         X_test_example = pd.DataFrame([{c: example.get(c, np.nan) for c in cols}])
         
         result = {}
@@ -278,20 +426,26 @@ def main():
         print("✅ Prediction test successful!")
         print(f"Result: {result}")
         
+        # The compiled export must agree with the pipeline after a round trip through disk
+        compiled_path = os.path.join(MODEL_DIR, COMPILED_FILES[0])
+        if os.path.exists(compiled_path):
+            compiled_type = CompiledPipeline.load(compiled_path)
+            error = float(np.abs(compiled_type.predict_proba([example])[0] - proba_type).max())
+            print(f"✅ Compiled export matches (max probability difference {error:.2g})")
+        
     except Exception as e:
         print(f"❌ Prediction test failed: {e}")
         import traceback
         traceback.print_exc()
+    
+    if TRAIN_LITE:
+        from variant_report import print_report, variant_report
+        print("\n⚖️  Full vs lite:")
+        print_report(variant_report(MODEL_DIR))
 
 def load_models(model_dir: str = "modelos"):
-    """Load the trained models and metadata."""
-    clf_bin = None
-    p_bin = os.path.join(model_dir, "clf_is_exoplanet.joblib")
-    if os.path.exists(p_bin):
-        clf_bin = joblib.load(p_bin)
-    clf_type = joblib.load(os.path.join(model_dir, "clf_exoplanet_type.joblib"))
-    meta = joblib.load(os.path.join(model_dir, "metadata.joblib"))
-    return clf_bin, clf_type, meta
+    """Load the trained models and metadata (once per process)."""
+    return get_registry(model_dir).get().as_tuple()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Score a whole archive table with the fitted models in ``modelos/``.
+
+The rows are split into chunks that a pool of worker processes scores in
+parallel; each worker loads the models once and runs one vectorized pass
+per chunk. Identifier columns are carried through to the output, which is
+written as Parquet/Feather (needs ``pyarrow``) or CSV depending on the
+output file's extension.
+
+Usage:
+    python score_catalogue.py kepler.csv scored.csv
+    python score_catalogue.py kepler.csv scored.parquet --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from executor import available_cpus
+from inference import get_engine
+
+ID_COLUMNS = ("kepid", "kepoi_name")
+TOP_K = 3
+
+# Starting a worker (imports + model load) costs about as much as scoring this
+# many rows, so smaller tables are not split across every core by default
+MIN_ROWS_PER_WORKER = 25000
+
+
+def read_table(path: str, columns: Sequence[str]) -> pd.DataFrame:
+    """Read only ``columns`` (those present) from a CSV, Parquet or Feather file."""
+    wanted = set(columns)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        frame = pd.read_parquet(path)
+    elif ext == ".feather":
+        frame = pd.read_feather(path)
+    else:
+        # NASA archive tables start with '#' comment lines
+        return pd.read_csv(path, comment="#", usecols=lambda c: c in wanted, low_memory=False)
+    return frame[[c for c in frame.columns if c in wanted]]
+
+
+def check_output_format(path: str):
+    """Fail early when a columnar output is requested without ``pyarrow``."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".feather"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit(f"Writing {ext} files requires pyarrow (pip install pyarrow), or use a .csv output")
+
+
+def write_table(frame: pd.DataFrame, path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        frame.to_parquet(path, index=False)
+    elif ext == ".feather":
+        frame.to_feather(path)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def default_workers(n_rows: int) -> int:
+    """All available CPUs, but no more than one worker per ``MIN_ROWS_PER_WORKER`` rows."""
+    return max(1, min(available_cpus(), -(-n_rows // MIN_ROWS_PER_WORKER)))
+
+
+def _init_worker(model_dir: str):
+    """Pool initializer: load the models once per worker."""
+    get_engine(model_dir)
+
+
+def _score_chunk(model_dir: str, X: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    return get_engine(model_dir).predict_proba(X)
+
+
+def score_frame(X: pd.DataFrame, model_dir: str = "modelos", workers: int = 1,
+                chunk_rows: Optional[int] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Return ``(type probabilities, binary probabilities)`` for every row of ``X``.
+
+    Args:
+        X: Model input columns, in training order
+        model_dir: Directory containing the model files
+        workers: Number of worker processes (``1`` scores in this process)
+        chunk_rows: Rows per task; defaults to four tasks per worker
+    """
+    if workers <= 1 or len(X) == 0:
+        return _score_chunk(model_dir, X)
+
+    chunk_rows = chunk_rows or max(1, -(-len(X) // (workers * 4)))
+    chunks = [X.iloc[i:i + chunk_rows] for i in range(0, len(X), chunk_rows)]
+    # spawn: forking after the models started OpenMP threads can deadlock
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_dir,),
+    ) as pool:
+        results = list(pool.map(_score_chunk, [model_dir] * len(chunks), chunks))
+
+    proba_type = np.concatenate([pt for pt, _ in results])
+    proba_bin = None if results[0][1] is None else np.concatenate([pb for _, pb in results])
+    return proba_type, proba_bin
+
+
+def results_frame(ids: pd.DataFrame, classes: Sequence[str], proba_type: np.ndarray,
+                  proba_bin: Optional[np.ndarray]) -> pd.DataFrame:
+    """Build the output table: identifiers, type, top-3 and binary probability."""
+    classes = np.asarray(classes)
+    topk = np.argsort(proba_type, axis=1)[:, ::-1][:, :TOP_K]
+    top_proba = np.take_along_axis(proba_type, topk, axis=1)
+
+    out = ids.reset_index(drop=True).copy()
+    out["type"] = classes[topk[:, 0]]
+    for rank in range(topk.shape[1]):
+        out[f"type_{rank + 1}"] = classes[topk[:, rank]]
+        out[f"type_{rank + 1}_proba"] = top_proba[:, rank]
+    if proba_bin is not None:
+        out["is_exoplanet"] = (proba_bin >= 0.5).astype(int)
+        out["is_exoplanet_proba"] = proba_bin
+    return out
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Score an archive table with the trained models")
+    parser.add_argument("input", help="CSV (NASA archive format), Parquet or Feather table")
+    parser.add_argument("output", help="Output file: .parquet, .feather or .csv")
+    parser.add_argument("--model-dir", default="modelos")
+    parser.add_argument("--workers", type=int, default=0,
+                        help=f"Worker processes (default: available CPUs, at most one per {MIN_ROWS_PER_WORKER} rows)")
+    parser.add_argument("--chunk-rows", type=int, default=0, help="Rows per task (default: four tasks per worker)")
+    parser.add_argument("--id-columns", default=",".join(ID_COLUMNS),
+                        help="Comma-separated identifier columns copied to the output")
+    args = parser.parse_args(argv)
+
+    check_output_format(args.output)
+    id_columns = [c.strip() for c in args.id_columns.split(",") if c.strip()]
+
+    print("🪐 Scoring catalogue")
+    print("=" * 50)
+    start = time.perf_counter()
+
+    engine = get_engine(args.model_dir)
+    load_done = time.perf_counter()
+    print(f"📦 Loaded models (version {engine.version}) in {load_done - start:.2f}s")
+
+    frame = read_table(args.input, list(engine.cols) + id_columns)
+    X = frame.reindex(columns=engine.cols)
+    ids = frame[[c for c in id_columns if c in frame.columns]]
+    read_done = time.perf_counter()
+    print(f"📥 Read {len(frame)} rows from {args.input} in {read_done - load_done:.2f}s")
+
+    workers = args.workers or default_workers(len(frame))
+
+    proba_type, proba_bin = score_frame(X, args.model_dir, workers, args.chunk_rows or None)
+    score_done = time.perf_counter()
+    print(f"🔮 Scored with {workers} worker(s) in {score_done - read_done:.2f}s")
+
+    write_table(results_frame(ids, engine.classes, proba_type, proba_bin), args.output)
+    end = time.perf_counter()
+    print(f"💾 Wrote {args.output} in {end - score_done:.2f}s")
+
+    print(f"\n✅ {len(frame)} rows in {end - start:.2f}s ({len(frame) / (end - start):,.0f} rows/sec overall, "
+          f"{len(frame) / max(score_done - read_done, 1e-9):,.0f} rows/sec scoring)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Run the serverless handlers in ``api/`` locally, routed like ``vercel.json``.
+
+Every ``api/<name>.py`` defines a ``BaseHTTPRequestHandler`` subclass that
+normally only runs under Vercel. This runner serves them all from one
+``ThreadingHTTPServer``. Request paths go through the ``routes`` of
+``vercel.json`` in order, and a destination ``/api/<name>`` is served by
+``api/<name>.py``. Files starting with ``_`` are helpers, not functions, as on
+Vercel. Other destinations (the frontend) return 404.
+
+Modes:
+
+- ``warm`` (default): each function module is imported once, on its first
+  request, and stays loaded, like a warm function instance. The functions
+  share this process, so they also share the loaded models (on Vercel each
+  function has its own instances).
+- ``cold``: every request runs in a fresh interpreter that imports the
+  function module (loading the models) and handles that one request, like a
+  cold invocation.
+
+Responses carry ``X-Invocation`` (``warm``/``cold``), ``X-Init-Ms`` (module
+import and model load, when the request paid for it), ``X-Handler-Ms`` and
+``X-Duration-Ms`` (the whole invocation, including the interpreter start in
+cold mode). ``--compare N`` sends N requests in each mode and prints both
+latency distributions.
+
+Usage:
+    python serve_api.py                        # warm, http://127.0.0.1:3001/api/...
+    python serve_api.py --mode cold --port 3002
+    python serve_api.py --compare 20           # cold vs warm /api/predict latency
+    python load_test.py --url http://127.0.0.1:3001/api --mix predict=1,classify-exoplanet=1
+"""
+import argparse
+import http.client
+import importlib.util
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(_HERE)
+API_DIR = os.path.join(ROOT_DIR, "api")
+VERCEL_CONFIG = os.path.join(ROOT_DIR, "vercel.json")
+
+MODES = ("warm", "cold")
+EXAMPLE = {"koi_prad": 1.0, "koi_teq": 300, "koi_period": 365.0, "koi_steff": 5800.0, "koi_srad": 1.0}
+
+
+def load_routes(config_path: str = VERCEL_CONFIG) -> List[Tuple["re.Pattern", str]]:
+    """``vercel.json`` routes as ``(compiled src, dest template)``, in order."""
+    with open(config_path) as fh:
+        config = json.load(fh)
+    return [(re.compile(f"^{route['src']}$"), route["dest"]) for route in config.get("routes", [])]
+
+
+def resolve_function(routes, path: str, api_dir: str = API_DIR) -> Optional[str]:
+    """
+    Name of the function serving ``path`` (``"predict"`` for ``api/predict.py``), or ``None``.
+
+    The first route whose ``src`` matches the path (without its query string)
+    wins, as on Vercel; ``$1``-style groups in ``dest`` are substituted.
+    """
+    path = path.split("?", 1)[0]
+    for pattern, dest in routes:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        dest = re.sub(r"\$(\d+)", lambda m: match.group(int(m.group(1))) or "", dest)
+        if not dest.startswith("/api/"):
+            return None
+        name = dest[len("/api/"):].split("?", 1)[0].strip("/")
+        if not name or name.startswith("_") or "/" in name or name.startswith("."):
+            return None
+        return name if os.path.exists(os.path.join(api_dir, f"{name}.py")) else None
+    return None
+
+
+def load_function(name: str, api_dir: str = API_DIR):
+    """Import ``api/<name>.py`` (file names may contain dashes)."""
+    spec = importlib.util.spec_from_file_location(f"api_{name.replace('-', '_')}",
+                                                  os.path.join(api_dir, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def invoke(module, raw_request: bytes, client_address=("127.0.0.1", 0)) -> bytes:
+    """
+    Run the module's handler on one raw HTTP request and return the raw response.
+
+    The handler reads the request from and writes the response to memory
+    buffers, exactly as it would on a socket.
+    """
+    handler = module.handler.__new__(module.handler)
+    handler.rfile = io.BytesIO(raw_request)
+    handler.wfile = io.BytesIO()
+    handler.client_address = client_address
+    handler.server = None
+    handler.request = None
+    handler.log_message = lambda *args: None  # the runner logs the request itself
+    handler.handle_one_request()
+    return handler.wfile.getvalue()
+
+
+def invoke_cold_worker():
+    """Child process of a cold invocation: raw request on stdin, timings and raw response on stdout."""
+    name = sys.argv[sys.argv.index("--invoke") + 1]
+    raw_request = sys.stdin.buffer.read()
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr  # anything the function prints must not corrupt the response
+
+    start = time.perf_counter()
+    module = load_function(name)
+    loaded = time.perf_counter()
+    response = invoke(module, raw_request)
+    done = time.perf_counter()
+
+    timings = {"init_ms": (loaded - start) * 1000, "handler_ms": (done - loaded) * 1000}
+    out.write(json.dumps(timings).encode() + b"\n" + response)
+    out.flush()
+
+
+class FunctionPool:
+    """Imports and runs the functions in ``warm`` or ``cold`` mode."""
+
+    def __init__(self, mode: str = "warm", api_dir: str = API_DIR):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+        self.mode = mode
+        self.api_dir = api_dir
+        self._modules: Dict[str, object] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _warm_module(self, name: str) -> Tuple[object, Optional[float]]:
+        module = self._modules.get(name)
+        if module is not None:
+            return module, None
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            module = self._modules.get(name)
+            if module is not None:
+                return module, None
+            start = time.perf_counter()
+            module = self._modules[name] = load_function(name, self.api_dir)
+            return module, (time.perf_counter() - start) * 1000
+
+    def call(self, name: str, raw_request: bytes, client_address) -> Tuple[bytes, Dict[str, float]]:
+        """Raw response and timings (``init_ms`` when this call loaded the function, ``handler_ms``)."""
+        if self.mode == "cold":
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--invoke", name],
+                                 input=raw_request, capture_output=True)
+            if out.returncode != 0:
+                lines = out.stderr.decode(errors="replace").strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"exit status {out.returncode}")
+            header, _, response = out.stdout.partition(b"\n")
+            return response, json.loads(header)
+        module, init_ms = self._warm_module(name)
+        start = time.perf_counter()
+        response = invoke(module, raw_request, client_address)
+        timings = {"handler_ms": (time.perf_counter() - start) * 1000}
+        if init_ms is not None:
+            timings["init_ms"] = init_ms
+        return response, timings
+
+    def preload(self, names: List[str]):
+        for name in names:
+            self._warm_module(name)
+
+
+def _add_headers(response: bytes, headers: Dict[str, str]) -> bytes:
+    head, sep, body = response.partition(b"\r\n\r\n")
+    extra = "".join(f"\r\n{k}: {v}" for k, v in headers.items()).encode("latin-1")
+    return head + extra + sep + body
+
+
+def make_handler(routes, pool: FunctionPool, quiet: bool = False):
+    """Request handler class that routes to the functions in ``pool``."""
+
+    class RouterHandler(BaseHTTPRequestHandler):
+        def _dispatch(self):
+            start = time.perf_counter()
+            name = resolve_function(routes, self.path, pool.api_dir)
+            if name is None:
+                self._send_json(404, {"error": f"No serverless function for {self.path}"})
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            head = "".join(f"{k}: {v}\r\n" for k, v in self.headers.items())
+            raw_request = self.raw_requestline + head.encode("latin-1") + b"\r\n" + body
+            try:
+                response, timings = pool.call(name, raw_request, self.client_address)
+            except Exception as e:
+                self._send_json(502, {"error": f"Function {name} failed: {str(e)}"})
+                return
+
+            extra = {"X-Invocation": pool.mode, "X-Function": name}
+            for key in ("init_ms", "handler_ms"):
+                if key in timings:
+                    extra["X-" + key[:-3].capitalize() + "-Ms"] = f"{timings[key]:.2f}"
+            extra["X-Duration-Ms"] = f"{(time.perf_counter() - start) * 1000:.2f}"
+            self.wfile.write(_add_headers(response, extra))
+            self.close_connection = True
+            if not quiet:
+                status = response.split(b" ", 2)[1].decode("latin-1") if response else "-"
+                init = f", init {timings['init_ms']:.0f} ms" if "init_ms" in timings else ""
+                print(f"{self.command} {self.path} -> {name} [{pool.mode}] {status} "
+                      f"{extra['X-Duration-Ms']} ms{init}")
+
+        def _send_json(self, status: int, payload: Dict):
+            self.send_response(status)
+            self.send_header("Content-type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+
+        do_GET = do_POST = do_OPTIONS = do_PUT = do_DELETE = _dispatch
+
+        def log_message(self, format, *args):
+            pass
+
+    return RouterHandler
+
+
+def start_server(mode: str = "warm", host: str = "127.0.0.1", port: int = 3001, quiet: bool = False,
+                 preload: bool = False) -> ThreadingHTTPServer:
+    """Start the runner on a background thread; ``server.server_address`` has the bound port."""
+    pool = FunctionPool(mode)
+    if preload and mode == "warm":
+        pool.preload(["predict", "classify-exoplanet", "health"])
+    server = ThreadingHTTPServer((host, port), make_handler(load_routes(), pool, quiet))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _post_predict(port: int) -> Tuple[float, Dict[str, str]]:
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("POST", "/api/predict", json.dumps(EXAMPLE), {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"/api/predict returned {response.status}")
+    return time.perf_counter() - start, dict(response.getheaders())
+
+
+def compare_modes(requests: int) -> Dict[str, Dict]:
+    """Client-side latency of ``requests`` sequential ``/api/predict`` calls in each mode."""
+    import numpy as np
+
+    results = {}
+    for mode in MODES:
+        server = start_server(mode, port=0, quiet=True)
+        try:
+            calls = [_post_predict(server.server_address[1]) for _ in range(requests)]
+        finally:
+            server.shutdown()
+            server.server_close()
+        ms = np.asarray([seconds for seconds, _ in calls]) * 1000.0
+        init = [float(h["X-Init-Ms"]) for _, h in calls if "X-Init-Ms" in h]
+        results[mode] = {
+            "requests": requests,
+            "first_ms": float(ms[0]),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+            "init_ms": float(np.median(init)) if init else None,
+            "inits": len(init),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the api/ serverless handlers locally, routed like vercel.json")
+    parser.add_argument("--mode", choices=MODES, default="warm",
+                        help="warm: keep functions loaded; cold: fresh interpreter per request")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--preload", action="store_true", help="Warm mode: load the functions before serving")
+    parser.add_argument("--quiet", action="store_true", help="Do not log requests")
+    parser.add_argument("--compare", type=int, metavar="N", help="Send N /api/predict requests per mode and exit")
+    parser.add_argument("--invoke", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.invoke:
+        invoke_cold_worker()
+        return
+
+    if args.compare:
+        print(f"🧊 /api/predict, {args.compare} sequential requests per mode")
+        print(f"{'mode':>5} {'1st req':>10} {'p50':>10} {'p95':>10} {'max':>10} {'init (median)':>14} {'inits':>6}")
+        for mode, r in compare_modes(args.compare).items():
+            init = f"{r['init_ms']:.1f}ms" if r["init_ms"] is not None else "-"
+            print(f"{mode:>5} {r['first_ms']:>8.1f}ms {r['p50_ms']:>8.1f}ms {r['p95_ms']:>8.1f}ms "
+                  f"{r['max_ms']:>8.1f}ms {init:>14} {r['inits']:>6}")
+        return
+
+    server = start_server(args.mode, args.host, args.port, args.quiet, args.preload)
+    host, port = server.server_address[:2]
+    print(f"🚀 api/ handlers ({args.mode}) on http://{host}:{port}/api/ (routes from {VERCEL_CONFIG})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,37 +3,17 @@
 Simple exoplanet prediction script based on the notebook
 """
 import os
-import numpy as np
-import pandas as pd
-import joblib
+
+from model_registry import get_registry
+from inference import get_engine
 
 def load_models(model_dir: str = "modelos"):
-    """Load the trained models and metadata."""
-    clf_bin = None
-    p_bin = os.path.join(model_dir, "clf_is_exoplanet.joblib")
-    if os.path.exists(p_bin):
-        clf_bin = joblib.load(p_bin)
-    clf_type = joblib.load(os.path.join(model_dir, "clf_exoplanet_type.joblib"))
-    meta = joblib.load(os.path.join(model_dir, "metadata.joblib"))
-    return clf_bin, clf_type, meta
+    """Load the trained models and metadata (once per process)."""
+    return get_registry(model_dir).get().as_tuple()
 
 def predict_exoplanet(example: dict, model_dir: str = "modelos") -> dict:
     """Predict exoplanet characteristics from input data."""
-    clf_bin, clf_type, meta = load_models(model_dir)
-    cols = meta["num_cols"] + meta["cat_cols"]
-    X = pd.DataFrame([{c: example.get(c, np.nan) for c in cols}])
-    out = {}
-    if clf_bin is not None:
-        proba = clf_bin.predict_proba(X)[0, 1]
-        out["is_exoplanet"] = int(proba >= 0.5)
-        out["is_exoplanet_proba"] = float(proba)
-    proba_type = clf_type.predict_proba(X)[0]
-    pred_type = clf_type.predict(X)[0]
-    classes = clf_type.named_steps["clf"].classes_
-    topk = np.argsort(proba_type)[::-1][:3]
-    out["type"] = str(pred_type)
-    out["type_top3"] = [(str(classes[i]), float(proba_type[i])) for i in topk]
-    return out
+    return get_engine(model_dir).predict_one(example)
 
 def main():
     """Main function to test the prediction."""
@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
 """
 Startup script for the Exoplanet Prediction API server
+
+SERVER_MODE=dev (default) runs a single uvicorn process. SERVER_MODE=prefork
+is the production mode: the models are loaded once in this process, which
+then forks WEB_WORKERS uvicorn workers that share them copy-on-write (see
+prefork.py).
 """
 import uvicorn
 import os
 import sys
 from pathlib import Path
 
+# "dev": one uvicorn process (DEV_RELOAD=1 restarts it on code changes); "prefork": production workers
+SERVER_MODE = os.environ.get("SERVER_MODE", "dev")
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "8000"))
+
+# Prefork mode: worker count (default: available CPUs), recycling and graceful stop
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "0")) or None
+WORKER_MAX_REQUESTS = int(os.environ.get("WORKER_MAX_REQUESTS", "0"))
+WORKER_MAX_REQUESTS_JITTER = int(os.environ.get("WORKER_MAX_REQUESTS_JITTER", "0"))
+WORKER_GRACEFUL_TIMEOUT_S = float(os.environ.get("WORKER_GRACEFUL_TIMEOUT_S", "30"))
+
 def check_models():
     """Check if required model files exist."""
     model_dir = Path("modelos")
@@ -43,6 +59,96 @@ def check_models():
     
     return True
 
+def _mib(kib: int) -> str:
+    return f"{kib / 1024:.1f} MiB"
+
+def run_prefork() -> int:
+    """
+    Load the models once, fork the workers and supervise them until stopped.
+    
+    Returns:
+        Exit status (non-zero when workers keep failing to start)
+    """
+    # The workers already use every CPU: one OpenMP and one inference thread each unless configured
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("INFERENCE_WORKERS", "1")
+    
+    from threadpoolctl import threadpool_limits
+    from executor import available_cpus
+    from inference import engine_for, reload_engine
+    from measure_memory import memory_kib
+    from model_registry import get_registry, variant_dir
+    from prefork import PreforkServer
+    import main as app_module
+    
+    variants = {"full", app_module.MODEL_VARIANT, *app_module.ENDPOINT_MODEL_VARIANTS.values()}
+    model_dirs = [variant_dir("modelos", v) for v in sorted(variants) if app_module.variant_available(v)]
+    
+    def refresh_models():
+        """Load the models (again, if they changed on disk) so the next workers fork with them."""
+        # No OpenMP threads in the parent: forking after they have started can deadlock the workers
+        with threadpool_limits(limits=1, user_api="openmp"):
+            for model_dir in model_dirs:
+                registry = get_registry(model_dir)
+                if registry.loaded and registry.changed():
+                    engine = reload_engine(model_dir)
+                    print(f"♻️  {model_dir}: workers now fork with version {engine.version}")
+                else:
+                    engine_for(registry.get())
+    
+    server = PreforkServer(
+        app_module.app,
+        workers=WEB_WORKERS or available_cpus(),
+        host=HOST,
+        port=PORT,
+        max_requests=WORKER_MAX_REQUESTS,
+        max_requests_jitter=WORKER_MAX_REQUESTS_JITTER,
+        graceful_timeout=WORKER_GRACEFUL_TIMEOUT_S,
+        before_fork=refresh_models
+    )
+    try:
+        server.bind()
+    except OSError as e:
+        print(f"❌ Cannot listen on {HOST}:{PORT}: {e}")
+        return 1
+    
+    print("\n📦 Loading models in the parent process...")
+    refresh_models()
+    for model_dir in model_dirs:
+        bundle = get_registry(model_dir).get()
+        print(f"✅ {model_dir}: version {bundle.version} loaded in {bundle.load_seconds:.3f}s")
+    
+    pids = server.start()
+    if not pids:
+        print("❌ No worker started")
+        server.stop()
+        return 1
+    
+    recycling = (f"after {WORKER_MAX_REQUESTS}-{WORKER_MAX_REQUESTS + WORKER_MAX_REQUESTS_JITTER} requests"
+                 if WORKER_MAX_REQUESTS else "on SIGHUP only")
+    print("=" * 50)
+    print(f"👷 {len(pids)} of {server.workers} workers serving on http://{HOST}:{PORT} "
+          f"(OpenMP threads {os.environ['OMP_NUM_THREADS']}, inference threads {os.environ['INFERENCE_WORKERS']})")
+    print(f"♻️  Worker recycling {recycling}; graceful stop timeout {WORKER_GRACEFUL_TIMEOUT_S:g}s")
+    try:
+        parent = memory_kib()
+        print(f"🧠 parent {os.getpid()}: RSS {_mib(parent['rss'])}, PSS {_mib(parent['pss'])}")
+        total_pss = parent["pss"]
+        for pid in pids:
+            mem = memory_kib(pid)
+            total_pss += mem["pss"]
+            print(f"🧠 worker {pid}: RSS {_mib(mem['rss'])}, PSS {_mib(mem['pss'])}, "
+                  f"private {_mib(mem['uss'])}")
+        print(f"🧠 total PSS (physical memory in use): {_mib(total_pss)}")
+    except OSError:
+        print("🧠 Per-worker memory is only reported on Linux")
+    print(f"Send SIGHUP to {os.getpid()} to recycle the workers, SIGTERM or Ctrl+C to stop")
+    print("=" * 50)
+    
+    status = server.supervise()
+    print("\n👋 Server stopped")
+    return status
+
 def main():
     """Main function to start the server."""
     print("🚀 Starting Exoplanet Prediction API Server")
@@ -58,20 +164,33 @@ def main():
         print("\n❌ Cannot start server without required model files.")
         sys.exit(1)
     
+    if SERVER_MODE not in ("dev", "prefork"):
+        print(f"❌ Unknown SERVER_MODE {SERVER_MODE!r}; expected dev or prefork")
+        sys.exit(1)
+    if SERVER_MODE == "prefork" and not hasattr(os, "fork"):
+        print("⚠️  prefork needs os.fork(); starting a single development server instead")
+    
     print("\n🌐 Starting server...")
-    print("📖 API Documentation: http://localhost:8000/docs")
-    print("🔍 Health Check: http://localhost:8000/health")
-    print("🎯 Prediction Endpoint: http://localhost:8000/predict")
-    print("🔄 Classification Endpoint: http://localhost:8000/classify-exoplanet")
+    print(f"📖 API Documentation: http://localhost:{PORT}/docs")
+    print(f"🔍 Health Check: http://localhost:{PORT}/health")
+    print(f"🎯 Prediction Endpoint: http://localhost:{PORT}/predict")
+    print(f"🔄 Classification Endpoint: http://localhost:{PORT}/classify-exoplanet")
+    print("♻️  Model Reload: new files in modelos/ are picked up without a restart "
+          f"(or POST http://localhost:{PORT}/admin/reload-models)")
+    
+    if SERVER_MODE == "prefork" and hasattr(os, "fork"):
+        sys.exit(run_prefork())
+    
     print("\nPress Ctrl+C to stop the server")
     print("=" * 50)
     
     try:
         uvicorn.run(
             "main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
+            host=HOST,
+            port=PORT,
+            # Restarting on code changes drops in-flight requests; models reload on their own
+            reload=os.environ.get("DEV_RELOAD", "0") == "1",
             log_level="info"
         )
     except KeyboardInterrupt:
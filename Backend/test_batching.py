@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Check that MicroBatcher scores up to max_in_flight batches at once and that
+every caller still gets its own row.
+
+Runs under pytest or directly: python test_batching.py
+"""
+import asyncio
+
+from batching import MicroBatcher
+
+
+class SlowRunner:
+    """``run_batch`` stand-in that takes a while and records how many batches overlap."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, examples):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self.running -= 1
+        return [{"id": ex["id"]} for ex in examples]
+
+
+async def _score(max_in_flight, requests=16, max_batch_size=4):
+    runner = SlowRunner()
+    batcher = MicroBatcher(runner, window_ms=1, max_batch_size=max_batch_size, max_in_flight=max_in_flight)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit({"id": i}) for i in range(requests)))
+    finally:
+        await batcher.stop()
+    return runner, batcher, results
+
+
+def test_two_batches_overlap():
+    runner, batcher, results = asyncio.run(_score(max_in_flight=2))
+    assert [r["id"] for r in results] == list(range(16))
+    assert runner.max_running == 2
+    assert batcher.stats()["max_in_flight_seen"] == 2
+
+
+def test_one_batch_at_a_time():
+    runner, batcher, results = asyncio.run(_score(max_in_flight=1))
+    assert [r["id"] for r in results] == list(range(16))
+    assert runner.max_running == 1
+
+
+def test_failed_batch_fails_only_its_callers():
+    async def run():
+        async def run_batch(examples):
+            await asyncio.sleep(0.01)
+            if any(ex["id"] == 0 for ex in examples):
+                raise ValueError("boom")
+            return examples
+
+        batcher = MicroBatcher(run_batch, window_ms=1, max_batch_size=2, max_in_flight=2)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit({"id": i}) for i in range(4)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results[:2]] == [ValueError, ValueError]
+    assert results[2:] == [{"id": 2}, {"id": 3}]
+
+
+def test_stop_fails_in_flight_requests():
+    async def run():
+        batcher = MicroBatcher(SlowRunner(seconds=10), window_ms=1, max_batch_size=2, max_in_flight=2)
+        await batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit({"id": i})) for i in range(4)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return await asyncio.gather(*pending, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
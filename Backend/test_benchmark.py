@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for benchmark.py: report metadata and a quick run of the api/
+implementation.
+
+Runs under pytest or directly: python test_benchmark.py
+"""
+import json
+import os
+import tempfile
+
+import benchmark
+
+
+def test_collect_meta_api():
+    meta = benchmark.collect_meta(["single"], ["api"])
+    assert meta["model_versions"]["api"]
+    assert meta["api_runtime"] in ("compiled", "joblib")
+
+
+def test_run_single_quick_api():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "bench.json")
+        try:
+            benchmark.main(["run", "--only", "single", "--implementations", "api", "--quick", "--output", output])
+        finally:
+            os.chdir(cwd)  # run() switches to the Backend directory
+        with open(output) as fh:
+            report = json.load(fh)
+    assert report["meta"]["model_versions"]["api"]
+    assert "single.api.p50_ms" in report["metrics"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Check that the compiled NumPy predictor reproduces the sklearn pipelines:
+both classifiers in modelos/, every kepler.csv row (missing values left out
+of the request, as the API receives them), probabilities within 1e-9.
+
+Runs under pytest or directly: python test_compiled_model.py
+"""
+import pandas as pd
+
+from benchmark import CSV_PATH, FEATURES
+from compiled_model import CompiledPipeline, max_proba_error
+from model_registry import load_bundle
+
+TOLERANCE = 1e-9
+
+
+def kepler_examples():
+    df = pd.read_csv(CSV_PATH, comment="#", usecols=list(FEATURES))
+    return [{k: float(v) for k, v in row.items() if pd.notna(v)} for row in df.to_dict("records")]
+
+
+def _check(pipeline, cols):
+    compiled = CompiledPipeline.from_sklearn(pipeline)
+    assert list(compiled.columns) == list(cols)
+    error = max_proba_error(compiled, pipeline, kepler_examples(), cols)
+    assert error <= TOLERANCE, f"max |compiled - predict_proba| = {error:.3g}"
+
+
+def test_type_classifier_matches_predict_proba():
+    bundle = load_bundle("modelos")
+    _check(bundle.clf_type, bundle.cols)
+
+
+def test_binary_classifier_matches_predict_proba():
+    bundle = load_bundle("modelos")
+    assert bundle.clf_bin is not None, "modelos/ has no binary classifier"
+    _check(bundle.clf_bin, bundle.cols)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
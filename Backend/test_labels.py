@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Check that the vectorized labels in labels.py match the row-wise
+_size_class/_thermal_class from regenerate_models.py.
+
+Runs under pytest or directly: python test_labels.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from labels import MJUP_TO_MEARTH, size_labels, thermal_labels, type_labels
+from regenerate_models import _size_class, _thermal_class
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kepler.csv")
+
+# Every threshold used by the classifiers, plus values just around them
+RADIUS_EDGES = [0.8, 1.5, 2.5, 4.0, 6.0]
+MASS_EDGES = [0.5, 2, 10, 20, 50, 2 * MJUP_TO_MEARTH]
+TEQ_EDGES = [400, 700, 1000]
+
+
+def _reference_labels(df, col_rade, col_bmasse, col_bmassj, col_eqt):
+    """The original df.apply construction from regenerate_models.main."""
+    size = df.apply(lambda row: _size_class(row, col_rade, col_bmasse, col_bmassj), axis=1)
+    thermal = df.apply(lambda row: _thermal_class(row, col_eqt), axis=1)
+    combined = size.copy()
+    if col_eqt is not None:
+        hot = thermal == "muy_caliente"
+        combined.loc[hot] = size.loc[hot] + "_caliente"
+    return size, thermal, combined
+
+
+def _assert_same(expected: pd.Series, actual: pd.Series, name: str):
+    # None and NaN both mean "no label"
+    expected = expected.astype(object).fillna("<missing>")
+    actual = actual.astype(object).fillna("<missing>")
+    mismatches = (expected.to_numpy() != actual.to_numpy()).sum()
+    assert mismatches == 0, f"{name}: {mismatches} of {len(expected)} labels differ"
+
+
+def _check(df, col_rade, col_bmasse, col_bmassj, col_eqt):
+    size, thermal, combined = _reference_labels(df, col_rade, col_bmasse, col_bmassj, col_eqt)
+    fast_size = size_labels(df, col_rade, col_bmasse, col_bmassj)
+    fast_thermal = thermal_labels(df, col_eqt)
+    fast_type = type_labels(fast_size, fast_thermal if col_eqt is not None else None)
+    _assert_same(size, fast_size, "size_label")
+    _assert_same(thermal, fast_thermal, "thermal_label")
+    _assert_same(combined, fast_type, "type_label")
+
+
+def _edge_values(edges, rng, n):
+    values = [np.nan]
+    for e in edges:
+        values += [e, np.nextafter(e, -np.inf), np.nextafter(e, np.inf), e * 0.999, e * 1.001]
+    values = np.array(values, dtype=np.float64)
+    return rng.choice(values, size=n)
+
+
+def _planetary_systems_table(n=5000, seed=0):
+    """Synthetic pl_* table covering radius, Earth-mass and Jupiter-mass fallbacks."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "pl_rade": np.where(rng.random(n) < 0.3, np.nan, rng.lognormal(1.0, 1.0, n)),
+        "pl_bmasse": np.where(rng.random(n) < 0.5, np.nan, rng.lognormal(2.5, 2.0, n)),
+        "pl_bmassj": np.where(rng.random(n) < 0.5, np.nan, rng.lognormal(0.0, 1.5, n)),
+        "pl_eqt": np.where(rng.random(n) < 0.2, np.nan, rng.uniform(50, 2500, n)),
+    })
+    # Exact and adjacent threshold values
+    edge = rng.random(n) < 0.3
+    df.loc[edge, "pl_rade"] = _edge_values(RADIUS_EDGES, rng, edge.sum())
+    df.loc[edge, "pl_bmasse"] = _edge_values(MASS_EDGES, rng, edge.sum())
+    df.loc[edge, "pl_bmassj"] = _edge_values([e / MJUP_TO_MEARTH for e in MASS_EDGES], rng, edge.sum())
+    df.loc[edge, "pl_eqt"] = _edge_values(TEQ_EDGES, rng, edge.sum())
+    return df
+
+
+def test_kepler_koi_columns():
+    df = pd.read_csv(CSV_PATH, comment="#", encoding="utf-8-sig", engine="python")
+    _check(df, "koi_prad", None, None, "koi_teq")
+
+
+def test_kepler_float32_snapshot():
+    from ingest import load_catalogue
+    df = load_catalogue(CSV_PATH, ["koi_prad", "koi_teq"], use_snapshot=False)
+    _check(df, "koi_prad", None, None, "koi_teq")
+
+
+def test_planetary_systems_columns():
+    _check(_planetary_systems_table(), "pl_rade", "pl_bmasse", "pl_bmassj", "pl_eqt")
+
+
+def test_jupiter_mass_fallback_only():
+    df = _planetary_systems_table(seed=1).drop(columns=["pl_bmasse"])
+    _check(df, None, None, "pl_bmassj", "pl_eqt")
+
+
+def test_missing_columns():
+    df = _planetary_systems_table(seed=2)
+    _check(df, "pl_rade", "not_a_column", None, None)
+    # The row-wise reference cannot label an empty table; the vectorized one returns empty labels
+    assert size_labels(df.iloc[:0], "pl_rade", "pl_bmasse", "pl_bmassj").empty
+    assert thermal_labels(df.iloc[:0], "pl_eqt").empty
+
+
+def test_integer_and_nullable_columns():
+    df = pd.DataFrame({
+        "pl_rade": pd.array([1, None, 5, 7, None], dtype="Int64"),
+        "pl_bmasse": pd.array([None, 3.0, None, 700.0, None], dtype="Float64"),
+        "pl_eqt": [300, 1200, 1000, 999, 400],
+    })
+    size = size_labels(df, "pl_rade", "pl_bmasse", None)
+    assert size.tolist() == ["terraneo", "super_tierra", "neptuniano", "super_jupiter", None]
+    assert thermal_labels(df, "pl_eqt").tolist() == ["frio", "muy_caliente", "muy_caliente", "caliente", "templado"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
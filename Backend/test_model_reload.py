@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Check hot model reloading on a copy of modelos/ in a temporary directory:
+the registry swaps in rewritten artifacts, keeps the current bundle when
+nothing changed or the new one is rejected, and the /admin/reload-models
+endpoint and the file watcher do the same for the running app.
+
+Runs under pytest or directly: python test_model_reload.py
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import httpx
+import joblib
+
+import inference
+import main
+from model_registry import TYPE_MODEL_FILE, ModelRegistry, artifact_paths, get_registry
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLE = {"koi_prad": 11.2, "koi_teq": 1400, "koi_period": 3.5, "koi_steff": 5600.0, "koi_srad": 1.0}
+
+
+@contextmanager
+def model_copy():
+    """A temporary directory holding a copy of the artifacts in modelos/; yields its modelos/ path."""
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, "modelos")
+        os.makedirs(model_dir)
+        for path in artifact_paths(os.path.join(_HERE, "modelos")):
+            shutil.copy2(path, model_dir)
+        yield model_dir
+
+
+def rewrite_artifacts(model_dir: str):
+    """Save the type classifier again with compression: new file contents (a new version), same model."""
+    path = os.path.join(model_dir, TYPE_MODEL_FILE)
+    joblib.dump(joblib.load(path), path, compress=3)
+
+
+def reject(bundle):
+    raise ValueError("rejected by test")
+
+
+def test_reload_unchanged_keeps_bundle():
+    with model_copy() as model_dir:
+        registry = ModelRegistry(model_dir)
+        bundle = registry.get()
+        assert registry.reload() is bundle
+        assert registry.reloads == 0
+
+
+def test_reload_swaps_new_version():
+    with model_copy() as model_dir:
+        registry = ModelRegistry(model_dir)
+        old = registry.get()
+        rewrite_artifacts(model_dir)
+        assert registry.changed()
+        new = registry.reload(validate=inference.validate_bundle)
+        assert new.version != old.version
+        assert registry.get() is new and registry.reloads == 1
+        # Holders of the old bundle keep a complete, unchanged set of models
+        assert old.clf_type is not new.clf_type
+        assert inference.engine_for(old).predict_one(EXAMPLE)["type"] == \
+            inference.engine_for(new).predict_one(EXAMPLE)["type"]
+
+
+def test_rejected_reload_keeps_old_bundle():
+    with model_copy() as model_dir:
+        registry = ModelRegistry(model_dir)
+        old = registry.get()
+        rewrite_artifacts(model_dir)
+        try:
+            registry.reload(validate=reject)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("reload accepted a bundle that failed validation")
+        assert registry.get() is old
+        assert registry.failed_reloads == 1 and registry.reloads == 0
+        assert registry.last_reload_error == "rejected by test"
+
+
+def test_unreadable_artifacts_keep_old_bundle():
+    with model_copy() as model_dir:
+        registry = ModelRegistry(model_dir)
+        old = registry.get()
+        with open(os.path.join(model_dir, TYPE_MODEL_FILE), "wb") as fh:
+            fh.write(b"not a pickle")
+        try:
+            registry.reload()
+        except Exception:
+            pass
+        else:
+            raise AssertionError("reload accepted an unreadable artifact")
+        assert registry.get() is old and registry.failed_reloads == 1
+
+
+@contextmanager
+def serving_from(model_dir: str):
+    """Run the app's code from the directory above ``model_dir`` (it reads ``modelos/`` relative to the cwd)."""
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(model_dir))
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+async def _predicted_version(client) -> str:
+    response = await client.post("/predict", json=EXAMPLE)
+    assert response.status_code == 200, response.text
+    return response.json()["model_version"]
+
+
+def test_admin_reload_swaps_model_version():
+    async def run(model_dir):
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                old = await _predicted_version(client)
+
+                response = await client.post("/admin/reload-models")
+                assert response.status_code == 200, response.text
+                assert response.json()["reloaded"] is False
+
+                rewrite_artifacts(model_dir)
+                response = await client.post("/admin/reload-models")
+                assert response.status_code == 200, response.text
+                body = response.json()
+                assert body["reloaded"] is True
+                assert body["previous_version"] == old and body["model_version"] != old
+                assert await _predicted_version(client) == body["model_version"]
+
+    with model_copy() as model_dir, serving_from(model_dir):
+        asyncio.run(run(model_dir))
+
+
+def test_admin_reload_rejected_keeps_old_version():
+    async def run(model_dir):
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                old = await _predicted_version(client)
+                rewrite_artifacts(model_dir)
+                response = await client.post("/admin/reload-models")
+                assert response.status_code == 500
+                assert "rejected by test" in response.json()["detail"]
+                assert await _predicted_version(client) == old
+                assert get_registry("modelos").failed_reloads == 1
+
+    saved = inference.validate_bundle
+    inference.validate_bundle = reject
+    try:
+        with model_copy() as model_dir, serving_from(model_dir):
+            asyncio.run(run(model_dir))
+    finally:
+        inference.validate_bundle = saved
+
+
+def test_watcher_reloads_changed_files():
+    async def run(model_dir):
+        async with main.lifespan(main.app):
+            registry = get_registry("modelos")
+            old = registry.get().version
+            rewrite_artifacts(model_dir)
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                if registry.get().version != old:
+                    break
+            assert registry.get().version != old, "watcher did not pick up the new artifacts"
+            assert registry.reloads == 1
+
+    saved = main.MODEL_WATCH_INTERVAL_S
+    main.MODEL_WATCH_INTERVAL_S = 0.05
+    try:
+        with model_copy() as model_dir, serving_from(model_dir):
+            asyncio.run(run(model_dir))
+    finally:
+        main.MODEL_WATCH_INTERVAL_S = saved
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
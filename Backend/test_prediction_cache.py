@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for PredictionCache: version invalidation, LRU eviction, TTL
+expiry and quantized keys.
+
+Runs under pytest or directly: python test_prediction_cache.py
+"""
+import types
+
+import prediction_cache
+from prediction_cache import PredictionCache, parse_quantization
+
+COLUMNS = ("koi_prad", "koi_teq", "koi_period")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_version_change_empties_cache():
+    cache = PredictionCache()
+    cache.put(("a",), "v1", {"type": "joviano"})
+    cache.put(("b",), "v1", {"type": "terraneo"})
+    assert cache.get(("a",), "v1") == {"type": "joviano"}
+
+    assert cache.get(("a",), "v2") is None
+    stats = cache.stats()
+    assert stats["entries"] == 0 and stats["model_version"] == "v2"
+    assert stats["invalidations"] == 1
+    # Nothing from v1 comes back, even when asked for with v1 again
+    assert cache.get(("b",), "v1") is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put(("a",), "v1", {"n": 1})
+    cache.put(("b",), "v1", {"n": 2})
+    assert cache.get(("a",), "v1") == {"n": 1}  # "b" is now the oldest
+    cache.put(("c",), "v1", {"n": 3})
+
+    assert cache.get(("b",), "v1") is None
+    assert cache.get(("a",), "v1") == {"n": 1}
+    assert cache.get(("c",), "v1") == {"n": 3}
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    saved = prediction_cache.time
+    prediction_cache.time = types.SimpleNamespace(monotonic=clock.monotonic)
+    try:
+        cache = PredictionCache(ttl=10)
+        cache.put(("a",), "v1", {"n": 1})
+        clock.now += 9
+        assert cache.get(("a",), "v1") == {"n": 1}
+        clock.now += 2
+        assert cache.get(("a",), "v1") is None
+        stats = cache.stats()
+        assert stats["expirations"] == 1 and stats["entries"] == 0
+    finally:
+        prediction_cache.time = saved
+
+
+def test_no_ttl_keeps_entries():
+    clock = FakeClock()
+    saved = prediction_cache.time
+    prediction_cache.time = types.SimpleNamespace(monotonic=clock.monotonic)
+    try:
+        cache = PredictionCache()
+        cache.put(("a",), "v1", {"n": 1})
+        clock.now += 1e9
+        assert cache.get(("a",), "v1") == {"n": 1}
+    finally:
+        prediction_cache.time = saved
+
+
+def test_quantized_inputs_share_an_entry():
+    cache = PredictionCache(quantize=parse_quantization("koi_prad=0.1, koi_teq=10"))
+    first = cache.prepare({"koi_prad": 1.02, "koi_teq": 288.0, "koi_period": 365.25})
+    second = cache.prepare({"koi_prad": 0.98, "koi_teq": 291.0, "koi_period": 365.25})
+    assert abs(first["koi_prad"] - 1.0) < 1e-12 and first["koi_teq"] == 290.0
+    assert first["koi_period"] == 365.25  # not quantized
+
+    cache.put(cache.key(first, COLUMNS), "v1", {"n": 1})
+    assert cache.get(cache.key(second, COLUMNS), "v1") == {"n": 1}
+    assert cache.get(cache.key(cache.prepare({"koi_prad": 1.2, "koi_teq": 288.0}), COLUMNS), "v1") is None
+
+
+def test_quantization_leaves_missing_features_out():
+    cache = PredictionCache(quantize={"koi_prad": 0.1})
+    example = cache.prepare({"koi_teq": 300.0})
+    assert "koi_prad" not in example
+    assert cache.key(example, COLUMNS) == (None, 300.0, None)
+
+
+def test_parse_quantization():
+    assert parse_quantization("koi_prad=0.01,koi_teq=1") == {"koi_prad": 0.01, "koi_teq": 1.0}
+    assert parse_quantization("") == {}
+    try:
+        parse_quantization("koi_prad=0")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a zero step was accepted")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
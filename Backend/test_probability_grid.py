@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Check that the default probability grid serves what the game actually sends:
+the payload built by convertGameParametersToBackend in
+Frontend/src/lib/api.ts, posted to /predict, must be answered from the grid.
+
+Runs under pytest or directly: python test_probability_grid.py
+"""
+import asyncio
+import math
+
+import httpx
+import numpy as np
+
+import main
+from inference import get_engine
+from probability_grid import DEFAULT_AXES, GridAxis, build_grid
+
+
+def game_payload(radius, temperature, orbital_distance, mass, brightness):
+    """Python port of convertGameParametersToBackend (Frontend/src/lib/api.ts)."""
+    return {
+        "koi_prad": radius,
+        "koi_teq": temperature,
+        "koi_period": math.sqrt(orbital_distance ** 3) * 365.25,
+        "koi_model_snr": max(1.0, min(50.0, mass * radius * brightness * 5)),
+        "koi_steff": max(3000, 3000 + (brightness - 0.1) * 2000),
+        "koi_srad": max(0.1, min(10, mass * 0.5 + 0.5)),
+    }
+
+
+# Slider defaults and both ends of every slider (Frontend/src/app/components/ExoplanetSlider.ts)
+GAME_PAYLOADS = [
+    game_payload(1, 288, 1, 1, 1.0),
+    game_payload(0.1, 200, 0.01, 0.1, 0.1),
+    game_payload(2, 800, 5, 10, 3.0),
+]
+
+
+def _coarse_default_grid():
+    """The default axes with only their end points, so the test builds 64 cells instead of half a million."""
+    engine = get_engine("modelos")
+    axes = [GridAxis.parse(spec) for spec in DEFAULT_AXES]
+    axes = [GridAxis(a.name, a.values[[0, -1]], a.log) for a in axes]
+    return build_grid(engine, axes, {})
+
+
+def test_default_grid_covers_game_payloads():
+    grid = _coarse_default_grid()
+    for payload in GAME_PAYLOADS:
+        assert grid.covers(payload), payload
+
+
+def test_game_payload_is_a_grid_hit():
+    async def post_all():
+        saved = main.PROBABILITY_GRID_MODE, main.caches
+        main.PROBABILITY_GRID_MODE, main.caches = "nearest", {}
+        try:
+            async with main.lifespan(main.app):
+                main.grid = _coarse_default_grid()
+                main.grid_stats.update(hits=0, fallbacks=0)
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    for payload in GAME_PAYLOADS:
+                        response = await client.post("/predict", json=payload)
+                        assert response.status_code == 200, response.text
+                        assert np.isfinite(response.json()["is_exoplanet_proba"])
+                return dict(main.grid_stats)
+        finally:
+            main.PROBABILITY_GRID_MODE, main.caches = saved
+            main.grid = None
+
+    stats = asyncio.run(post_all())
+    assert stats == {"hits": len(GAME_PAYLOADS), "fallbacks": 0}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
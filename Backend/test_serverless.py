@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Check that the serverless handlers in ../api/ stay in step with the backend:
+the copied NumPy runtime is identical to compiled_model.py, and both api/
+runtimes report the backend's model version and predictions.
+
+Runs under pytest or directly: python test_serverless.py
+"""
+import os
+import sys
+
+from export_compiled import API_DIR, API_RUNTIME_COPY, RUNTIME_SOURCE
+
+sys.path.insert(0, API_DIR)
+from _predictor import Predictor  # noqa: E402
+
+MODEL_DIR = os.path.join(API_DIR, "modelos")
+EXAMPLES = [
+    {"koi_prad": 1.0, "koi_teq": 300, "koi_period": 365.0, "koi_steff": 5800.0, "koi_srad": 1.0},
+    {"koi_prad": 11.2, "koi_teq": 1400, "koi_period": 3.5, "koi_model_snr": 12.0, "koi_steff": 5600.0,
+     "koi_srad": 1.0},
+    {"koi_prad": 3.0, "koi_teq": 800},
+]
+
+
+def test_compiled_model_copy_is_identical():
+    with open(RUNTIME_SOURCE, "rb") as source, open(API_RUNTIME_COPY, "rb") as copy:
+        assert source.read() == copy.read(), \
+            "api/_compiled_model.py differs from compiled_model.py; run: python export_compiled.py --sync-api"
+
+
+def test_runtimes_match_backend():
+    from model_registry import load_bundle
+
+    version = load_bundle(MODEL_DIR).version
+    compiled = Predictor(MODEL_DIR, runtime="compiled")
+    fallback = Predictor(MODEL_DIR, runtime="joblib")
+    assert compiled.version == fallback.version == version
+    for example in EXAMPLES:
+        a, b = compiled.predict(example), fallback.predict(example)
+        assert a["type"] == b["type"]
+        assert abs(a["is_exoplanet_proba"] - b["is_exoplanet_proba"]) < 1e-6
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
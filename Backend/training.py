@@ -0,0 +1,170 @@
+"""
+Training driver: shared preprocessing and concurrent classifier fits.
+
+Putting one ``ColumnTransformer`` instance into two ``Pipeline`` objects and
+fitting both refits the same transformer twice (and leaves the first
+pipeline holding the second fit). Here preprocessing is fitted once per
+distinct training split and the transformed matrices are cached; the
+classifiers are then fitted on those matrices concurrently, each with its
+own OpenMP core budget (``HistGradientBoostingClassifier`` parallelizes
+with OpenMP), and reassembled into ``preprocessor -> clf`` pipelines so the
+saved artifacts keep their usual shape.
+
+Wall-clock time is recorded per stage with ``StageTimer``.
+"""
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+from executor import available_cpus
+
+TRAINING_MODES = ("thread", "process", "sequential")
+
+
+class StageTimer:
+    """Records wall-clock seconds per named stage, in the order they ran."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> str:
+        total = time.perf_counter() - self._start
+        lines = [f"  {name:<34} {seconds:8.2f}s" for name, seconds in self.stages.items()]
+        lines.append(f"  {'total (wall clock)':<34} {total:8.2f}s")
+        return "\n".join(lines)
+
+
+@dataclass
+class TrainingJob:
+    """One classifier to fit on one train/test split."""
+    name: str
+    estimator: object
+    X_train: pd.DataFrame
+    y_train: pd.Series
+    X_test: pd.DataFrame
+    y_test: pd.Series
+    cores: int = 0  # OpenMP threads for this fit; 0 = an even share of the budget
+
+
+@dataclass
+class TrainedModel:
+    name: str
+    pipeline: Pipeline
+    Xt_test: np.ndarray
+    fit_seconds: float
+    cores: int
+
+
+def _split_key(X_train: pd.DataFrame) -> str:
+    """Identifies a training split by its rows and columns."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(X_train.index).to_numpy().tobytes())
+    digest.update("\x00".join(map(str, X_train.columns)).encode())
+    return digest.hexdigest()
+
+
+def fit_preprocessing(preprocessor, jobs: List[TrainingJob],
+                      timer: Optional[StageTimer] = None) -> Dict[str, Tuple[object, np.ndarray, np.ndarray]]:
+    """
+    Fit one clone of ``preprocessor`` per distinct training split.
+
+    Returns:
+        ``{split key: (fitted preprocessor, transformed train, transformed test)}``;
+        jobs whose splits are identical share one entry
+    """
+    timer = timer or StageTimer()
+    fitted = {}
+    for job in jobs:
+        key = _split_key(job.X_train)
+        if key in fitted:
+            continue
+        with timer.stage(f"preprocess ({job.name} split)"):
+            prep = clone(preprocessor)
+            Xt_train = prep.fit_transform(job.X_train)
+            Xt_test = prep.transform(job.X_test)
+        fitted[key] = (prep, Xt_train, Xt_test)
+    return fitted
+
+
+def _fit_classifier(estimator, Xt_train, y_train, cores: int) -> Tuple[object, float]:
+    """Fit with at most ``cores`` OpenMP/BLAS threads (applies to the calling thread)."""
+    start = time.perf_counter()
+    with threadpool_limits(limits=cores):
+        estimator.fit(Xt_train, y_train)
+    return estimator, time.perf_counter() - start
+
+
+def core_budgets(jobs: List[TrainingJob], total_cores: int) -> List[int]:
+    """Explicit ``job.cores`` win; the remaining cores are split evenly among the other jobs."""
+    fixed = sum(job.cores for job in jobs if job.cores)
+    auto = [job for job in jobs if not job.cores]
+    share = max(1, (total_cores - fixed) // len(auto)) if auto else 0
+    return [job.cores or share for job in jobs]
+
+
+def train_all(preprocessor, jobs: List[TrainingJob], mode: str = "thread", total_cores: Optional[int] = None,
+              timer: Optional[StageTimer] = None) -> Dict[str, TrainedModel]:
+    """
+    Fit preprocessing once per split, then every job's classifier concurrently.
+
+    Args:
+        preprocessor: Unfitted preprocessing step (cloned per split, never fitted in place)
+        jobs: Classifiers to train
+        mode: ``thread`` (default), ``process`` (spawned workers) or ``sequential``
+        total_cores: Core budget shared by the jobs (default: available CPUs)
+        timer: Receives the per-stage timings
+
+    Returns:
+        ``{job name: TrainedModel}`` with fitted ``preprocessor -> clf`` pipelines
+    """
+    if mode not in TRAINING_MODES:
+        raise ValueError(f"Unknown training mode {mode!r}; expected one of {TRAINING_MODES}")
+
+    timer = timer or StageTimer()
+    splits = fit_preprocessing(preprocessor, jobs, timer)
+    budgets = core_budgets(jobs, total_cores or available_cpus())
+    inputs = [(clone(job.estimator), splits[_split_key(job.X_train)][1], job.y_train, cores)
+              for job, cores in zip(jobs, budgets)]
+
+    with timer.stage("train classifiers (" + ", ".join(j.name for j in jobs) + ")"):
+        if mode == "sequential":
+            results = [_fit_classifier(*args) for args in inputs]
+        else:
+            if mode == "thread":
+                pool = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="train")
+            else:
+                # spawn: forking after OpenMP threads started can deadlock
+                pool = ProcessPoolExecutor(max_workers=len(jobs), mp_context=multiprocessing.get_context("spawn"))
+            with pool:
+                results = list(pool.map(_fit_classifier, *zip(*inputs)))
+
+    trained = {}
+    for job, cores, (clf, seconds) in zip(jobs, budgets, results):
+        prep, _, Xt_test = splits[_split_key(job.X_train)]
+        trained[job.name] = TrainedModel(
+            name=job.name,
+            pipeline=Pipeline([("preprocessor", prep), ("clf", clf)]),
+            Xt_test=Xt_test,
+            fit_seconds=seconds,
+            cores=cores,
+        )
+    return trained
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency trade-off of the model variants (``full`` vs ``lite``).
+
+For every variant present in the model directory (``lite`` is trained with
+``TRAIN_LITE=1 python regenerate_models.py``):
+
+- quality on the held-out test split, from the version's manifest: macro F1
+  of both classifiers and per-class recall of the type classifier
+- single-row latency (p50/p99 of ``predict_one``) and batch throughput
+  (rows/sec of ``predict_batch``) on rows sampled from ``kepler.csv``
+- size: trees and nodes of the type classifier
+
+Usage:
+    python variant_report.py
+    python variant_report.py --model-dir modelos --json variants.json
+"""
+import argparse
+import json
+import os
+from typing import Dict, List
+
+from benchmark import latency_stats, sample_examples, throughput, time_calls
+from inference import engine_for
+from model_registry import MODEL_VARIANTS, TYPE_MODEL_FILE, load_bundle, resolve_artifact_dir, variant_dir
+from model_store import read_manifest
+
+SINGLE_ITERATIONS = 300
+BATCH_ROWS = 1000
+
+
+def variant_report(model_dir: str = "modelos", iterations: int = SINGLE_ITERATIONS,
+                   batch_rows: int = BATCH_ROWS, min_seconds: float = 0.5) -> List[Dict]:
+    """One entry per variant found in ``model_dir`` (quality from the manifest, latency measured here)."""
+    examples = sample_examples(max(iterations, batch_rows))
+    report = []
+    for variant in MODEL_VARIANTS:
+        path = variant_dir(model_dir, variant)
+        artifact_dir = resolve_artifact_dir(path) if os.path.isdir(path) else path
+        if not os.path.exists(os.path.join(artifact_dir, TYPE_MODEL_FILE)):
+            continue
+        engine = engine_for(load_bundle(path))
+        manifest = read_manifest(artifact_dir) or {}
+        quality = manifest.get("metrics", {})
+        ensemble = engine.compiled_type.ensemble if engine.compiled_type is not None else None
+        report.append({
+            "variant": variant,
+            "model_version": engine.version,
+            "type_macro_f1": quality.get("type", {}).get("macro_f1"),
+            "binary_macro_f1": quality.get("binary", {}).get("macro_f1"),
+            "type_recall": quality.get("type", {}).get("per_class_recall", {}),
+            "single": latency_stats(time_calls(engine.predict_one, examples[:iterations], warmup=20)),
+            "batch_rows_per_s": throughput(engine.predict_batch, examples[:batch_rows], min_seconds),
+            "type_trees": len(ensemble.roots) if ensemble is not None else None,
+            "type_nodes": len(ensemble.threshold) if ensemble is not None else None,
+        })
+    return report
+
+
+def _fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(report: List[Dict]):
+    print(f"{'variant':<8} {'version':<13} {'type F1':>8} {'bin F1':>8} {'p50':>9} {'p99':>9} "
+          f"{f'batch x{BATCH_ROWS}':>14} {'trees':>6} {'nodes':>7}")
+    for r in report:
+        print(f"{r['variant']:<8} {r['model_version']:<13} {_fmt(r['type_macro_f1'], '.4f'):>8} "
+              f"{_fmt(r['binary_macro_f1'], '.4f'):>8} {r['single']['p50_ms']:>7.3f}ms "
+              f"{r['single']['p99_ms']:>7.3f}ms {r['batch_rows_per_s']:>8.0f} rows/s "
+              f"{_fmt(r['type_trees'], 'd'):>6} {_fmt(r['type_nodes'], 'd'):>7}")
+
+    classes = sorted({c for r in report for c in r["type_recall"]})
+    if classes:
+        print("\nType recall per class:")
+        print(f"  {'class':<24}" + "".join(f"{r['variant']:>9}" for r in report))
+        for c in classes:
+            print(f"  {c:<24}" + "".join(f"{_fmt(r['type_recall'].get(c), '.3f'):>9}" for r in report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare accuracy and latency of the model variants")
+    parser.add_argument("--model-dir", default="modelos")
+    parser.add_argument("--iterations", type=int, default=SINGLE_ITERATIONS, help="Single-row predictions timed")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = variant_report(args.model_dir, args.iterations)
+    if not report:
+        print(f"❌ No models found in {args.model_dir}")
+        return
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"📄 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+Pandas-free "compiled" predictor for the fitted pipelines in ``modelos/``.
+
+For a single planet most of the time in ``Pipeline.predict_proba`` goes to
+building a DataFrame, column dispatch in ``ColumnTransformer`` and sklearn's
+input validation rather than to the trees. This module copies everything the
+pipelines need at prediction time into plain NumPy arrays:
+
+- imputer statistics, the ``log1p`` flag and the scaler mean/scale of the
+  numeric block, and the fill value and categories of the one-hot block;
+- the node tables of every ``HistGradientBoostingClassifier`` tree, flattened
+  into one array so all trees are walked together, one depth level per step;
+- the baseline prediction, the classes and the input column order.
+
+Only NumPy is used here, including while compiling: the fitted estimators are
+read through their public/fitted attributes, so this file can be shipped to
+runtimes that don't have scikit-learn installed.
+
+``CompiledPipeline.save`` writes a compiled pipeline to a ``.npz`` file that
+holds only NumPy arrays and a JSON header (no pickles), and
+``CompiledPipeline.load`` reads it back with nothing but NumPy, which is
+what the serverless handlers in ``api/`` run on. The file contains:
+
+- ``header``: UTF-8 JSON with ``format``, ``format_version``,
+  ``feature_order`` (input columns), ``blocks`` (kind, columns, ``log1p``;
+  fill value, categories and ``handle_unknown`` of one-hot blocks), ``loss``,
+  ``max_depth``, node/tree counts and ``source`` (where it was exported from)
+- ``block<i>_fill`` / ``block<i>_mean`` / ``block<i>_scale``: imputer
+  statistics and scaler parameters of numeric block ``i``
+- ``tree_feature_idx``, ``tree_threshold``, ``tree_missing_left``,
+  ``tree_left``, ``tree_right``, ``tree_value``: the flattened node table;
+  ``tree_roots`` and ``tree_output`` give each tree's root node and output
+- ``baseline`` and ``classes``
+
+Readers reject other format versions instead of guessing.
+
+``export_compiled.py`` copies this file to ``api/_compiled_model.py``, byte
+for byte; edit this file, not the copy.
+"""
+import json
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Compiled artifact format; bump FORMAT_VERSION on incompatible changes
+FORMAT_NAME = "nasa2025-compiled-pipeline"
+FORMAT_VERSION = 1
+COMPILED_SUFFIX = ".npz"
+
+# Node table arrays of CompiledEnsemble, in constructor order
+_NODE_ARRAYS = ("feature_idx", "threshold", "missing_left", "left", "right", "value", "roots", "tree_output")
+
+
+def _class_name(obj) -> str:
+    return type(obj).__name__
+
+
+def _pipeline_steps(obj) -> List[object]:
+    """Flatten an sklearn Pipeline (or a bare estimator) into its steps."""
+    if _class_name(obj) == "Pipeline":
+        steps = []
+        for _, step in obj.steps:
+            steps.extend(_pipeline_steps(step))
+        return steps
+    return [obj]
+
+
+class _NumericBlock:
+    """Imputer -> optional log1p -> optional standard scaling."""
+
+    def __init__(self, columns, fill, log1p, mean, scale):
+        self.columns = tuple(columns)
+        self.fill = np.asarray(fill, dtype=np.float64)
+        self.log1p = bool(log1p)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        self.width = len(self.columns)
+
+    @classmethod
+    def from_sklearn(cls, columns, transformer):
+        fill = np.full(len(columns), np.nan)
+        log1p, mean, scale = False, None, None
+        for step in _pipeline_steps(transformer):
+            name = _class_name(step)
+            if name == "SimpleImputer":
+                if step.add_indicator:
+                    raise ValueError("SimpleImputer(add_indicator=True) is not supported")
+                stats = np.asarray(step.statistics_, dtype=np.float64)
+                if np.isnan(stats).any():
+                    raise ValueError("SimpleImputer with empty (all-missing) features is not supported")
+                fill = stats
+            elif name == "FunctionTransformer":
+                if step.func is np.log1p:
+                    log1p = True
+                elif step.func is not None:
+                    raise ValueError(f"FunctionTransformer(func={step.func!r}) is not supported")
+            elif name == "StandardScaler":
+                mean = step.mean_ if step.with_mean else None
+                scale = step.scale_ if step.with_std else None
+            else:
+                raise ValueError(f"Unsupported numeric transformer: {name}")
+        return cls(columns, fill, log1p, mean, scale)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.where(np.isnan(X), self.fill, X)
+        if self.log1p:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                X = np.log1p(X)
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        return X
+
+
+class _OneHotBlock:
+    """Most-frequent imputer -> one-hot encoding of a single categorical column."""
+
+    def __init__(self, column, fill, categories, infrequent, handle_unknown):
+        self.columns = (column,)
+        self.fill = fill
+        self.categories = [str(c) for c in categories]
+        self.infrequent = [str(c) for c in infrequent]
+        self.handle_unknown = handle_unknown
+
+        # Output slot of each category; infrequent categories share the last slot
+        frequent = [c for c in self.categories if c not in set(self.infrequent)]
+        self.slots = {c: i for i, c in enumerate(frequent)}
+        if self.infrequent:
+            for c in self.infrequent:
+                self.slots[c] = len(frequent)
+        self.width = len(frequent) + (1 if self.infrequent else 0)
+
+    @classmethod
+    def from_sklearn(cls, columns, transformer):
+        if len(columns) != 1:
+            raise ValueError("Only single-column one-hot blocks are supported")
+        fill, encoder = None, None
+        for step in _pipeline_steps(transformer):
+            name = _class_name(step)
+            if name == "SimpleImputer":
+                if step.add_indicator:
+                    raise ValueError("SimpleImputer(add_indicator=True) is not supported")
+                fill = str(step.statistics_[0])
+            elif name == "OneHotEncoder":
+                encoder = step
+            else:
+                raise ValueError(f"Unsupported categorical transformer: {name}")
+        if encoder is None:
+            raise ValueError("Categorical block without a OneHotEncoder")
+        if getattr(encoder, "drop_idx_", None) is not None:
+            raise ValueError("OneHotEncoder(drop=...) is not supported")
+        infrequent = getattr(encoder, "infrequent_categories_", [None])[0]
+        return cls(
+            columns[0],
+            fill,
+            encoder.categories_[0],
+            [] if infrequent is None else infrequent,
+            encoder.handle_unknown,
+        )
+
+    def transform(self, values: Sequence[object]) -> np.ndarray:
+        out = np.zeros((len(values), self.width))
+        for row, value in enumerate(values):
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                value = self.fill
+            if value is None:
+                continue
+            slot = self.slots.get(str(value))
+            if slot is not None:
+                out[row, slot] = 1.0
+            elif self.handle_unknown == "infrequent_if_exist" and self.infrequent:
+                out[row, self.width - 1] = 1.0
+            elif self.handle_unknown == "error":
+                raise ValueError(f"Unknown category {value!r} for column {self.columns[0]!r}")
+        return out
+
+
+class CompiledPreprocessor:
+    """NumPy version of the fitted ``ColumnTransformer``."""
+
+    def __init__(self, blocks):
+        self.blocks = list(blocks)
+        self.n_features_out = sum(b.width for b in self.blocks)
+
+    @classmethod
+    def from_sklearn(cls, column_transformer) -> "CompiledPreprocessor":
+        if _class_name(column_transformer) != "ColumnTransformer":
+            raise ValueError(f"Expected a ColumnTransformer, got {_class_name(column_transformer)}")
+        blocks = []
+        for name, transformer, columns in column_transformer.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            columns = list(columns)
+            steps = [] if transformer == "passthrough" else _pipeline_steps(transformer)
+            if any(_class_name(s) == "OneHotEncoder" for s in steps):
+                blocks.append(_OneHotBlock.from_sklearn(columns, transformer))
+            elif transformer == "passthrough":
+                blocks.append(_NumericBlock(columns, np.full(len(columns), np.nan), False, None, None))
+            else:
+                blocks.append(_NumericBlock.from_sklearn(columns, transformer))
+        return cls(blocks)
+
+    def transform(self, examples: Sequence[Dict]) -> np.ndarray:
+        """Transform raw example dicts into the classifier's feature matrix."""
+        out = np.empty((len(examples), self.n_features_out))
+        offset = 0
+        for block in self.blocks:
+            if isinstance(block, _NumericBlock):
+                raw = np.array(
+                    [[_as_float(ex.get(c)) for c in block.columns] for ex in examples],
+                    dtype=np.float64,
+                ).reshape(len(examples), block.width)
+                out[:, offset:offset + block.width] = block.transform(raw)
+            else:
+                column = block.columns[0]
+                out[:, offset:offset + block.width] = block.transform([ex.get(column) for ex in examples])
+            offset += block.width
+        return out
+
+    def same_as(self, other: "CompiledPreprocessor") -> bool:
+        """True when both preprocessors produce identical features."""
+        if len(self.blocks) != len(other.blocks):
+            return False
+        for a, b in zip(self.blocks, other.blocks):
+            if type(a) is not type(b) or a.columns != b.columns:
+                return False
+            if isinstance(a, _NumericBlock):
+                same = (
+                    np.array_equal(a.fill, b.fill)
+                    and a.log1p == b.log1p
+                    and _same_optional(a.mean, b.mean)
+                    and _same_optional(a.scale, b.scale)
+                )
+            else:
+                same = (a.fill, a.slots, a.handle_unknown) == (b.fill, b.slots, b.handle_unknown)
+            if not same:
+                return False
+        return True
+
+
+def _same_optional(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return np.array_equal(a, b)
+
+
+def _as_float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+class CompiledEnsemble:
+    """
+    NumPy version of a fitted ``HistGradientBoostingClassifier``.
+
+    All trees are flattened into a single node table. Leaves point to
+    themselves, so walking ``max_depth`` levels from every root lands each
+    tree on its leaf without per-tree Python loops.
+    """
+
+    def __init__(self, feature_idx, threshold, missing_left, left, right, value,
+                 roots, tree_output, baseline, classes, max_depth, loss):
+        self.feature_idx = np.asarray(feature_idx, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.tree_output = np.asarray(tree_output, dtype=np.intp)
+        self.baseline = np.asarray(baseline, dtype=np.float64).ravel()
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.loss = loss
+        self.n_outputs = self.baseline.shape[0]
+
+    @classmethod
+    def from_sklearn(cls, clf) -> "CompiledEnsemble":
+        if _class_name(clf) != "HistGradientBoostingClassifier":
+            raise ValueError(f"Expected a HistGradientBoostingClassifier, got {_class_name(clf)}")
+        loss_name = _class_name(clf._loss)
+        if loss_name == "HalfBinomialLoss":
+            loss = "binomial"
+        elif loss_name == "HalfMultinomialLoss":
+            loss = "multinomial"
+        else:
+            raise ValueError(f"Unsupported loss: {loss_name}")
+
+        parts = {k: [] for k in ("feature_idx", "threshold", "missing_left", "left", "right", "value")}
+        roots, tree_output = [], []
+        max_depth, offset = 0, 0
+        for predictors in clf._predictors:
+            for k, predictor in enumerate(predictors):
+                nodes = predictor.nodes
+                if nodes["is_categorical"].any():
+                    raise ValueError("Categorical splits are not supported")
+                n = len(nodes)
+                is_leaf = nodes["is_leaf"].astype(bool)
+                own = np.arange(offset, offset + n)
+                parts["feature_idx"].append(np.where(is_leaf, 0, nodes["feature_idx"]))
+                parts["threshold"].append(nodes["num_threshold"])
+                parts["missing_left"].append(nodes["missing_go_to_left"].astype(bool))
+                parts["left"].append(np.where(is_leaf, own, nodes["left"].astype(np.intp) + offset))
+                parts["right"].append(np.where(is_leaf, own, nodes["right"].astype(np.intp) + offset))
+                parts["value"].append(nodes["value"])
+                roots.append(offset)
+                tree_output.append(k)
+                max_depth = max(max_depth, int(nodes["depth"].max()))
+                offset += n
+
+        return cls(
+            feature_idx=np.concatenate(parts["feature_idx"]),
+            threshold=np.concatenate(parts["threshold"]),
+            missing_left=np.concatenate(parts["missing_left"]),
+            left=np.concatenate(parts["left"]),
+            right=np.concatenate(parts["right"]),
+            value=np.concatenate(parts["value"]),
+            roots=roots,
+            tree_output=tree_output,
+            baseline=clf._baseline_prediction,
+            classes=clf.classes_,
+            max_depth=max_depth,
+            loss=loss,
+        )
+
+    def raw_predict(self, Xt: np.ndarray) -> np.ndarray:
+        """Sum of baseline and leaf values per output, shape ``(n_samples, n_outputs)``."""
+        n = Xt.shape[0]
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = Xt[rows, self.feature_idx[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaf_values = self.value[node]
+
+        raw = np.empty((n, self.n_outputs))
+        for k in range(self.n_outputs):
+            raw[:, k] = self.baseline[k] + leaf_values[:, self.tree_output == k].sum(axis=1)
+        return raw
+
+    def predict_proba(self, Xt: np.ndarray) -> np.ndarray:
+        raw = self.raw_predict(Xt)
+        if self.loss == "binomial":
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        raw = raw - raw.max(axis=1, keepdims=True)
+        proba = np.exp(raw)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+
+class CompiledPipeline:
+    """A compiled preprocessor followed by a compiled tree ensemble."""
+
+    def __init__(self, preprocessor: CompiledPreprocessor, ensemble: CompiledEnsemble):
+        self.preprocessor = preprocessor
+        self.ensemble = ensemble
+        self.classes = ensemble.classes
+        # Header "source" of the artifact this was loaded from
+        self.source: Dict = {}
+
+    @classmethod
+    def from_sklearn(cls, pipeline) -> "CompiledPipeline":
+        """Compile a fitted ``Pipeline([("prep", ColumnTransformer), ("clf", HGB)])``."""
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) != 2:
+            raise ValueError("Expected a two-step (preprocessing, classifier) pipeline")
+        return cls(CompiledPreprocessor.from_sklearn(steps[0]), CompiledEnsemble.from_sklearn(steps[1]))
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Input columns read by the preprocessor, in order."""
+        return tuple(c for block in self.preprocessor.blocks for c in block.columns)
+
+    def predict_proba(self, examples: Sequence[Dict]) -> np.ndarray:
+        return self.ensemble.predict_proba(self.preprocessor.transform(examples))
+
+    def save(self, path: str, source: Optional[Dict] = None):
+        """
+        Write the pipeline to a ``.npz`` file (atomically).
+
+        Args:
+            path: Output file, normally ``<artifact name>.npz``
+            source: Extra JSON-serializable details kept in the header (e.g. the
+                joblib file it was compiled from)
+        """
+        arrays = {}
+        blocks = []
+        for i, block in enumerate(self.preprocessor.blocks):
+            if isinstance(block, _NumericBlock):
+                blocks.append({"kind": "numeric", "columns": list(block.columns), "log1p": block.log1p})
+                arrays[f"block{i}_fill"] = block.fill
+                for name in ("mean", "scale"):
+                    if getattr(block, name) is not None:
+                        arrays[f"block{i}_{name}"] = getattr(block, name)
+            else:
+                blocks.append({
+                    "kind": "onehot",
+                    "columns": list(block.columns),
+                    "fill": block.fill,
+                    "categories": block.categories,
+                    "infrequent": block.infrequent,
+                    "handle_unknown": block.handle_unknown,
+                })
+        ensemble = self.ensemble
+        for name in _NODE_ARRAYS:
+            values = getattr(ensemble, name)
+            # Node indices fit in 32 bits; thresholds and leaf values stay float64 (exact)
+            arrays[f"tree_{name}"] = values.astype(np.int32) if values.dtype == np.intp else values
+        arrays["baseline"] = ensemble.baseline
+        classes = ensemble.classes
+        # sklearn keeps string labels in object arrays, which np.load can only read by unpickling
+        arrays["classes"] = classes.astype(str) if classes.dtype == object else classes
+
+        header = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "feature_order": list(self.columns),
+            "blocks": blocks,
+            "loss": ensemble.loss,
+            "max_depth": ensemble.max_depth,
+            "n_nodes": int(len(ensemble.threshold)),
+            "n_trees": int(len(ensemble.roots)),
+            "source": source or {},
+        }
+        arrays["header"] = np.frombuffer(json.dumps(header, sort_keys=True).encode(), dtype=np.uint8)
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez_compressed(fh, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledPipeline":
+        """
+        Read a pipeline written by ``save``.
+
+        Raises:
+            ValueError: If the file is not a compiled pipeline or has an unsupported format version
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        header = read_header(arrays)
+
+        blocks = []
+        for i, spec in enumerate(header["blocks"]):
+            if spec["kind"] == "numeric":
+                blocks.append(_NumericBlock(spec["columns"], arrays[f"block{i}_fill"], spec["log1p"],
+                                            arrays.get(f"block{i}_mean"), arrays.get(f"block{i}_scale")))
+            elif spec["kind"] == "onehot":
+                blocks.append(_OneHotBlock(spec["columns"][0], spec["fill"], spec["categories"],
+                                           spec["infrequent"], spec["handle_unknown"]))
+            else:
+                raise ValueError(f"{path}: unknown block kind {spec['kind']!r}")
+        ensemble = CompiledEnsemble(
+            **{name: arrays[f"tree_{name}"] for name in _NODE_ARRAYS},
+            baseline=arrays["baseline"],
+            classes=arrays["classes"],
+            max_depth=header["max_depth"],
+            loss=header["loss"],
+        )
+        pipeline = cls(CompiledPreprocessor(blocks), ensemble)
+        if list(pipeline.columns) != header["feature_order"]:
+            raise ValueError(f"{path}: feature order does not match the preprocessing blocks")
+        pipeline.source = header["source"]
+        return pipeline
+
+
+def read_header(arrays) -> Dict:
+    """
+    JSON header of a compiled artifact (``np.load`` result or dict of arrays).
+
+    Raises:
+        ValueError: If it is missing or has an unsupported format version
+    """
+    if "header" not in arrays:
+        raise ValueError("Not a compiled pipeline (no header)")
+    header = json.loads(bytes(arrays["header"]).decode())
+    if header.get("format") != FORMAT_NAME:
+        raise ValueError(f"Not a compiled pipeline (format {header.get('format')!r})")
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled format version {header.get('format_version')} "
+                         f"(this code reads version {FORMAT_VERSION})")
+    return header
+
+
+def max_proba_error(compiled: CompiledPipeline, pipeline, examples: Sequence[Dict],
+                    columns: Iterable[str]) -> float:
+    """
+    Largest absolute difference between the compiled and sklearn probabilities.
+
+    Needs pandas (imported lazily) because the reference side goes through
+    the original ``Pipeline``.
+    """
+    import pandas as pd
+
+    columns = list(columns)
+    X = pd.DataFrame([{c: ex.get(c, np.nan) for c in columns} for ex in examples], columns=columns)
+    return float(np.abs(compiled.predict_proba(examples) - pipeline.predict_proba(X)).max())
@@ -0,0 +1,148 @@
+"""
+Process-wide predictor for the serverless handlers.
+
+A cold start pays for every import and every artifact load before the first
+response, so the handlers go through this module, which imports nothing
+heavy at module level:
+
+- ``compiled`` runtime (default when ``modelos/`` has the ``.npz`` files
+  written by ``Backend/export_compiled.py``): NumPy plus ``_compiled_model``,
+  a few milliseconds to load
+- ``joblib`` runtime (fallback, or ``API_RUNTIME=joblib``): the sklearn
+  pipelines, loaded with joblib, which pulls in pandas and scikit-learn.
+  ``api/requirements.txt`` deploys NumPy only, so this runtime needs its
+  commented-out dependencies enabled there
+
+Both return the same response fields.
+
+``_compiled_model.py`` is a copy of ``Backend/compiled_model.py`` written by
+``Backend/export_compiled.py``; edit the Backend file, not the copy.
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+TYPE_MODEL_FILE = "clf_exoplanet_type"
+BINARY_MODEL_FILE = "clf_is_exoplanet"
+METADATA_FILE = "metadata.joblib"
+
+# "compiled", "joblib" or "auto" (compiled when its artifacts exist)
+API_RUNTIME = os.environ.get("API_RUNTIME", "auto")
+
+
+class Predictor:
+    """Scores one planet with either runtime."""
+
+    def __init__(self, model_dir: str, runtime: str = API_RUNTIME):
+        self.model_dir = model_dir
+        if runtime == "auto":
+            compiled = os.path.exists(os.path.join(model_dir, TYPE_MODEL_FILE + ".npz"))
+            runtime = "compiled" if compiled else "joblib"
+        if runtime not in ("compiled", "joblib"):
+            raise ValueError(f"Unknown API_RUNTIME {runtime!r}; expected compiled, joblib or auto")
+        self.runtime = runtime
+        self.version: Optional[str] = None
+        self._clf_type = None
+        self._clf_bin = None
+        self._cols: List[str] = []
+
+        if runtime == "compiled":
+            self._load_compiled()
+        else:
+            self._load_joblib()
+
+    def _load_compiled(self):
+        from _compiled_model import CompiledPipeline  # NumPy is the only third-party import on this path
+
+        path_type = os.path.join(self.model_dir, TYPE_MODEL_FILE + ".npz")
+        path_bin = os.path.join(self.model_dir, BINARY_MODEL_FILE + ".npz")
+        self._clf_type = CompiledPipeline.load(path_type)
+        self._clf_bin = CompiledPipeline.load(path_bin) if os.path.exists(path_bin) else None
+        self._cols = list(self._clf_type.columns)
+        self.version = self._clf_type.source.get("artifact_version")
+
+    def _load_joblib(self):
+        try:
+            import joblib
+        except ImportError as e:
+            raise RuntimeError(
+                f"The joblib runtime needs pandas, joblib and scikit-learn ({e}); export the .npz models with "
+                "Backend/export_compiled.py or enable the joblib dependencies in api/requirements.txt") from e
+
+        # Binary classifier is optional
+        path_bin = os.path.join(self.model_dir, BINARY_MODEL_FILE + ".joblib")
+        path_type = os.path.join(self.model_dir, TYPE_MODEL_FILE + ".joblib")
+        path_meta = os.path.join(self.model_dir, METADATA_FILE)
+        self._clf_bin = joblib.load(path_bin) if os.path.exists(path_bin) else None
+        self._clf_type = joblib.load(path_type)
+        meta = joblib.load(path_meta)
+        self._cols = list(meta["num_cols"]) + list(meta["cat_cols"])
+        self.version = _artifact_version([p for p in (path_bin, path_type, path_meta) if os.path.exists(p)])
+
+    def _predict_proba(self, clf, example: Dict):
+        if self.runtime == "compiled":
+            return clf.predict_proba([example])[0]
+        import numpy as np
+        import pandas as pd
+
+        X = pd.DataFrame([{c: example.get(c, np.nan) for c in self._cols}])
+        return clf.predict_proba(X)[0]
+
+    def predict(self, example: Dict) -> Dict:
+        """
+        Predict exoplanet characteristics for one input.
+
+        Args:
+            example: Dictionary containing exoplanet parameters
+
+        Returns:
+            ``is_exoplanet``/``is_exoplanet_proba`` (when the binary model
+            exists), ``type`` and ``type_top3``
+        """
+        import numpy as np
+
+        out = {}
+
+        # Binary classification (if model exists)
+        if self._clf_bin is not None:
+            proba = self._predict_proba(self._clf_bin, example)[1]
+            out["is_exoplanet"] = int(proba >= 0.5)
+            out["is_exoplanet_proba"] = float(proba)
+
+        # Type classification; the label is the most probable class
+        proba_type = self._predict_proba(self._clf_type, example)
+        classes = self._clf_type.classes if self.runtime == "compiled" else self._clf_type.named_steps["clf"].classes_
+
+        # Get top 3 predictions
+        topk = np.argsort(proba_type)[::-1][:3]
+        out["type"] = str(classes[topk[0]])
+        out["type_top3"] = [(str(classes[i]), float(proba_type[i])) for i in topk]
+        return out
+
+
+def _artifact_version(paths: List[str]) -> str:
+    """Short content hash of the artifact files, the same version ``Backend/model_registry.py`` reports."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+_predictors: Dict[str, Predictor] = {}
+_lock = threading.Lock()
+
+
+def get_predictor(model_dir: str) -> Predictor:
+    """Return the shared predictor for ``model_dir``, loading it on first use."""
+    key = os.path.abspath(model_dir)
+    predictor = _predictors.get(key)
+    if predictor is None:
+        with _lock:
+            predictor = _predictors.get(key)
+            if predictor is None:
+                predictor = _predictors[key] = Predictor(key)
+    return predictor
@@ -1,10 +1,21 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-import numpy as np
-import pandas as pd
-import joblib
-from typing import Dict, List, Tuple, Optional
+import sys
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(__file__))
+from _predictor import get_predictor
+
+# Models are loaded once per (warm) function instance, not once per request.
+# NumPy is imported here only if the compiled artifacts are used; pandas,
+# joblib and scikit-learn only on the joblib fallback.
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "modelos")
+try:
+    get_predictor(MODEL_DIR)
+except Exception:
+    # Surface the error through the request handler instead of the import
+    pass
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
@@ -65,49 +76,7 @@ class handler(BaseHTTPRequestHandler):
             Dictionary with prediction results
         """
         try:
-            model_dir = os.path.join(os.path.dirname(__file__), "modelos")
-            
-            # Load models
-            clf_bin = None
-            clf_type = None
-            meta = None
-            
-            # Load binary classifier if it exists
-            p_bin = os.path.join(model_dir, "clf_is_exoplanet.joblib")
-            if os.path.exists(p_bin):
-                clf_bin = joblib.load(p_bin)
-                
-            # Load type classifier (required)
-            clf_type = joblib.load(os.path.join(model_dir, "clf_exoplanet_type.joblib"))
-            
-            # Load metadata (required)
-            meta = joblib.load(os.path.join(model_dir, "metadata.joblib"))
-            
-            # Get required columns from metadata
-            cols = meta["num_cols"] + meta["cat_cols"]
-            
-            # Create DataFrame with the input data
-            X = pd.DataFrame([{c: example.get(c, np.nan) for c in cols}])
-            
-            out = {}
-            
-            # Binary classification (if model exists)
-            if clf_bin is not None:
-                proba = clf_bin.predict_proba(X)[0, 1]
-                out["is_exoplanet"] = int(proba >= 0.5)
-                out["is_exoplanet_proba"] = float(proba)
-            
-            # Type classification
-            proba_type = clf_type.predict_proba(X)[0]
-            pred_type = clf_type.predict(X)[0]
-            classes = clf_type.named_steps["clf"].classes_
-            
-            # Get top 3 predictions
-            topk = np.argsort(proba_type)[::-1][:3]
-            out["type"] = str(pred_type)
-            out["type_top3"] = [(str(classes[i]), float(proba_type[i])) for i in topk]
-            
-            return out
+            return get_predictor(MODEL_DIR).predict(example)
             
         except Exception as e:
             raise Exception(f"Error making prediction: {str(e)}")
@@ -1,8 +1,10 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-import joblib
-from pathlib import Path
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from _predictor import TYPE_MODEL_FILE, get_predictor
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -10,15 +12,19 @@ class handler(BaseHTTPRequestHandler):
             # Try to load models to check if they're available
             model_dir = os.path.join(os.path.dirname(__file__), "modelos")
             
-            # Check if model files exist
-            required_files = ["clf_exoplanet_type.joblib", "metadata.joblib"]
-            models_loaded = all(os.path.exists(os.path.join(model_dir, f)) for f in required_files)
+            # Check if model files exist (compiled artifact, or joblib pipelines and metadata)
+            compiled_files = [TYPE_MODEL_FILE + ".npz"]
+            joblib_files = [TYPE_MODEL_FILE + ".joblib", "metadata.joblib"]
+            models_loaded = any(
+                all(os.path.exists(os.path.join(model_dir, f)) for f in required_files)
+                for required_files in (compiled_files, joblib_files)
+            )
+            runtime = None
             
             if models_loaded:
-                # Try to actually load the models
+                # Try to actually load the models (shared with later requests)
                 try:
-                    joblib.load(os.path.join(model_dir, "clf_exoplanet_type.joblib"))
-                    joblib.load(os.path.join(model_dir, "metadata.joblib"))
+                    runtime = get_predictor(model_dir).runtime
                     status = "healthy"
                     error = None
                 except Exception as e:
@@ -30,7 +36,8 @@ class handler(BaseHTTPRequestHandler):
             
             response = {
                 "status": status,
-                "models_loaded": models_loaded
+                "models_loaded": models_loaded,
+                "runtime": runtime
             }
             
             if error:
@@ -35,6 +35,7 @@ def main():
     config_files = [
         ("vercel.json", "Configuración de Vercel"),
         ("requirements.txt", "Dependencias de Python"),
+        ("api/requirements.txt", "Dependencias de las funciones serverless"),
         (".vercelignore", "Archivos a ignorar en Vercel"),
         ("package.json", "Configuración de Node.js"),
     ]